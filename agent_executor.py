@@ -4,7 +4,9 @@ from dspy import Module, Signature, InputField, OutputField
 from dspy.teleprompt.bootstrap import BootstrapFewShot
 from dspy.predict.react import ReAct
 # 순환 import 방지를 위해 필요한 함수만 import
-from init_dspy import execute_with_sdk, execute_with_sdk_with_retry, get_optimal_model
+from init_dspy import execute_with_sdk, execute_with_sdk_with_retry, get_optimal_model, get_lm
+from model_router import route_model, get_session_override
+from utils import estimate_tokens
 import time
 import random
 
@@ -78,6 +80,24 @@ class AdvancedAnalysisPipeline(Module):
         strategy_result = self.strategy_generator(input + req_result + reasoning_result)
         return strategy_result
 
+def predict_with_model(signature_class, prompt: str, task: str, model: str = None):
+    """
+    호출 단위로 모델을 지정하여 DSPy Predict 실행
+    
+    전역 dspy.settings.lm을 바꾸지 않고 dspy.context로 이 호출(현재 스레드)에만 LM을 적용하므로
+    여러 세션이 서로 다른 모델로 동시에 실행해도 간섭하지 않습니다.
+    
+    Args:
+        signature_class: DSPy Signature
+        prompt: input 필드 값
+        task: 모델 라우팅 작업 유형 (MODEL_ROUTES로 작업별 재정의 가능)
+        model: 모델명 (None이면 model_router로 선택)
+    """
+    if model is None:
+        model = route_model(task, estimate_tokens(prompt), override=get_session_override()).model
+    with dspy.context(lm=get_lm(model)):
+        return dspy.Predict(signature_class)(input=prompt)
+
 def execute_with_retry(func, *args, max_retries=3, **kwargs):
     """재시도 로직을 포함한 함수 실행"""
     for attempt in range(max_retries):
@@ -114,12 +134,12 @@ def execute_agent_hybrid(prompt: str, model: str = None, use_sdk: bool = True):
             print(f"SDK 실행 실패, DSPy로 폴백: {e}")
     
     # DSPy 폴백
-    return execute_with_retry(lambda: dspy.Predict(OptimizationConditionSignature)(input=prompt))
+    return execute_with_retry(lambda: predict_with_model(OptimizationConditionSignature, prompt, "optimization_analysis", model))
 
 # --- 기존 함수들 (하위 호환성 유지) - 재시도 로직 추가
-def run_requirement_table(full_prompt):
+def run_requirement_table(full_prompt, model: str = None):
     def _run():
-        result = dspy.Predict(RequirementTableSignature)(input=full_prompt)
+        result = predict_with_model(RequirementTableSignature, full_prompt, "requirement_table", model)
         value = getattr(result, "requirement_table", "")
         if not value or value.strip() == "" or "error" in value.lower():
             return "⚠️ 결과 생성 실패: 요구사항표가 정상적으로 생성되지 않았습니다."
@@ -127,9 +147,9 @@ def run_requirement_table(full_prompt):
     
     return execute_with_retry(_run)
 
-def run_ai_reasoning(full_prompt):
+def run_ai_reasoning(full_prompt, model: str = None):
     def _run():
-        result = dspy.Predict(AIReasoningSignature)(input=full_prompt)
+        result = predict_with_model(AIReasoningSignature, full_prompt, "ai_reasoning", model)
         value = getattr(result, "ai_reasoning", "")
         if not value or value.strip() == "" or "error" in value.lower():
             return "⚠️ 결과 생성 실패: AI reasoning이 정상적으로 생성되지 않았습니다."
@@ -137,9 +157,9 @@ def run_ai_reasoning(full_prompt):
     
     return execute_with_retry(_run)
 
-def run_precedent_comparison(full_prompt):
+def run_precedent_comparison(full_prompt, model: str = None):
     def _run():
-        result = dspy.Predict(PrecedentComparisonSignature)(input=full_prompt)
+        result = predict_with_model(PrecedentComparisonSignature, full_prompt, "precedent_comparison", model)
         value = getattr(result, "precedent_comparison", "")
         if not value or value.strip() == "" or "error" in value.lower():
             return "⚠️ 결과 생성 실패: 유사 사례 비교가 정상적으로 생성되지 않았습니다."
@@ -147,9 +167,9 @@ def run_precedent_comparison(full_prompt):
     
     return execute_with_retry(_run)
 
-def run_strategy_recommendation(full_prompt):
+def run_strategy_recommendation(full_prompt, model: str = None):
     def _run():
-        result = dspy.Predict(StrategyRecommendationSignature)(input=full_prompt)
+        result = predict_with_model(StrategyRecommendationSignature, full_prompt, "strategy_recommendation", model)
         value = getattr(result, "strategy_recommendation", "")
         if not value or value.strip() == "" or "error" in value.lower():
             return "⚠️ 결과 생성 실패: 전략 제언이 정상적으로 생성되지 않았습니다."
@@ -157,10 +177,10 @@ def run_strategy_recommendation(full_prompt):
     
     return execute_with_retry(_run)
 
-def execute_agent(prompt):
+def execute_agent(prompt, model: str = None):
     """기존 DSPy 기반 실행 함수 (하위 호환성)"""
     def _run():
-        result = dspy.Predict(OptimizationConditionSignature)(input=prompt)
+        result = predict_with_model(OptimizationConditionSignature, prompt, "optimization_analysis", model)
         value = getattr(result, "optimization_analysis", "")
         if not value or value.strip() == "" or "error" in value.lower():
             return "⚠️ 결과 생성 실패: AI 분석이 정상적으로 생성되지 않았습니다."
@@ -168,10 +188,10 @@ def execute_agent(prompt):
     
     return execute_with_retry(_run)
 
-def generate_narrative(prompt):
+def generate_narrative(prompt, model: str = None):
     """Narrative 생성 함수 - 소설처럼 감성적이고 몰입감 있는 스토리텔링"""
     def _run():
-        result = dspy.Predict(NarrativeGenerationSignature)(input=prompt)
+        result = predict_with_model(NarrativeGenerationSignature, prompt, "narrative_generation", model)
         value = getattr(result, "narrative_story", "")
         if not value or value.strip() == "" or "error" in value.lower():
             return "⚠️ 결과 생성 실패: Narrative가 정상적으로 생성되지 않았습니다."
@@ -10,7 +10,7 @@
 - 전체 순서 확정 및 분석 실행
 """
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 from dataclasses import dataclass
 from enum import Enum
 
@@ -38,6 +38,39 @@ class ObjectiveType(Enum):
     OPERATION_MANAGEMENT = "운영/관리"
     OTHER = "기타"
 
+# 단계별 직접 선행 단계 (결과를 프롬프트 맥락으로 넘겨받는 단계)
+STEP_DEPENDENCIES: Dict[str, List[str]] = {
+    "document_analyzer": [],
+    "requirement_analyzer": ["document_analyzer"],
+    "task_comprehension": ["document_analyzer", "requirement_analyzer"],
+    "risk_strategist": ["requirement_analyzer", "task_comprehension"],
+    "site_regulation_analysis": ["document_analyzer"],
+    "compliance_analyzer": ["requirement_analyzer", "site_regulation_analysis"],
+    "precedent_benchmarking": ["task_comprehension"],
+    "competitor_analyzer": ["task_comprehension", "precedent_benchmarking"],
+    "design_trend_application": ["task_comprehension", "precedent_benchmarking"],
+    "mass_strategy": ["task_comprehension", "site_regulation_analysis", "compliance_analyzer"],
+    "flexible_space_strategy": ["requirement_analyzer", "mass_strategy"],
+    "concept_development": ["task_comprehension", "competitor_analyzer", "design_trend_application", "mass_strategy"],
+    "area_programming": ["requirement_analyzer", "site_regulation_analysis", "concept_development"],
+    "schematic_space_plan": ["mass_strategy", "flexible_space_strategy", "area_programming"],
+    "ux_circulation_simulation": ["schematic_space_plan"],
+    "design_requirement_summary": ["requirement_analyzer", "compliance_analyzer", "concept_development",
+                                   "area_programming", "schematic_space_plan"],
+    "cost_estimation": ["risk_strategist", "mass_strategy", "area_programming"],
+    "architectural_branding_identity": ["document_analyzer", "competitor_analyzer", "concept_development"],
+    "action_planner": ["risk_strategist", "design_requirement_summary", "cost_estimation"],
+    "proposal_framework": ["task_comprehension", "concept_development", "design_requirement_summary",
+                           "architectural_branding_identity", "action_planner"],
+}
+
+
+def get_step_dependencies(step_id: str) -> Optional[List[str]]:
+    """단계의 직접 선행 단계 ID 목록 (의존성 정보가 없는 단계는 None)"""
+    dependencies = STEP_DEPENDENCIES.get(step_id)
+    return list(dependencies) if dependencies is not None else None
+
+
 @dataclass
 class AnalysisStep:
     """분석 단계 정보"""
@@ -53,7 +86,7 @@ class AnalysisStep:
     
     def __post_init__(self):
         if self.dependencies is None:
-            self.dependencies = []
+            self.dependencies = get_step_dependencies(self.id) or []
 
 @dataclass
 class AnalysisWorkflow:
@@ -248,14 +281,18 @@ class AnalysisSystem:
         return progress
 
     def can_execute_step(self, workflow: AnalysisWorkflow, step_id: str, completed_steps: List[str]) -> bool:
-        """단계 실행 가능 여부 확인"""
-        step = next((s for s in self.get_final_workflow(workflow) if s.id == step_id), None)
+        """단계 실행 가능 여부 확인 (completed_steps는 완료된 단계 ID 또는 제목)"""
+        final_steps = self.get_final_workflow(workflow)
+        step = next((s for s in final_steps if s.id == step_id), None)
         if not step:
             return False
         
-        # 의존성 확인
+        # 의존성 확인 - 워크플로우에 포함된 선행 단계만 대상
+        titles_by_id = {s.id: s.title for s in final_steps}
         for dependency in step.dependencies:
-            if dependency not in completed_steps:
+            if dependency not in titles_by_id:
+                continue
+            if dependency not in completed_steps and titles_by_id[dependency] not in completed_steps:
                 return False
         
         return True
@@ -832,7 +869,8 @@ class AnalysisSystem:
                     "is_recommended": step.is_recommended,
                     "is_optional": step.is_optional,
                     "order": step.order,
-                    "category": step.category
+                    "category": step.category,
+                    "dependencies": step.dependencies
                 }
                 for step in self.get_final_workflow(workflow)
             ]
@@ -853,7 +891,8 @@ class AnalysisSystem:
                 is_recommended=step_config["is_recommended"],
                 is_optional=step_config["is_optional"],
                 order=step_config["order"],
-                category=step_config["category"]
+                category=step_config["category"],
+                dependencies=step_config.get("dependencies")
             )
             steps.append(step)
         
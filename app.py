@@ -3,7 +3,7 @@
 import streamlit as st
 import os
 import time
-from prompt_loader import load_prompt_blocks
+from prompt_loader import get_prompt_block_registry
 from user_state import (
     init_user_state, get_user_inputs, save_step_result, append_step_history, get_current_step_index
 )
@@ -87,13 +87,22 @@ with st.sidebar:
         if 'selected_model' not in st.session_state:
             st.session_state.selected_model = "claude-3-5-sonnet-20241022"
         
+        # 작업별 모델 자동 선택 (끄면 아래에서 선택한 모델을 모든 작업에 사용)
+        auto_routing = st.checkbox(
+            "작업별 모델 자동 선택",
+            value=st.session_state.get('auto_model_routing', True),
+            key="auto_model_routing",
+            help="PDF 유형 감지·청크 요약 등 가벼운 작업은 Haiku, 분석 블록은 Sonnet을 사용합니다"
+        )
+        
         # 모델 선택 드롭다운
         selected_model = st.selectbox(
             "Claude 모델 선택",
             options=display_models,
             index=display_models.index(st.session_state.selected_model) if st.session_state.selected_model in display_models else 0,
             format_func=lambda x: f"{x} (SDK)" if x in sdk_models else f"{x} (기본)",
-            help="분석에 사용할 Claude 모델을 선택하세요"
+            help="분석에 사용할 Claude 모델을 선택하세요 (작업별 모델 자동 선택을 끄면 적용)",
+            disabled=auto_routing
         )
         
         # 모델 변경 시 세션 상태만 업데이트 (DSPy 설정 변경 안함)
@@ -105,11 +114,51 @@ with st.sidebar:
         st.error(f"모델 설정 오류: {e}")
         st.info("기본 모델을 사용합니다.")
 
+    # 이전 분석 결과 전달 예산
+    from context_manager import DEFAULT_CONTEXT_TOKEN_BUDGET
+    st.number_input(
+        "이전 결과 토큰 예산",
+        min_value=500,
+        max_value=50000,
+        value=st.session_state.get('context_token_budget', DEFAULT_CONTEXT_TOKEN_BUDGET),
+        step=500,
+        key="context_token_budget",
+        help="다음 단계 프롬프트에 포함할 이전 분석 결과(다이제스트)의 최대 토큰 수"
+    )
+    st.checkbox(
+        "프롬프트 압축",
+        key="compact_prompts",
+        help="반복되는 지시문과 자리표시 줄을 줄여 입력 토큰을 절감합니다 (출력 섹션 구성은 동일)"
+    )
+    st.checkbox(
+        "웹 검색 본문 보강",
+        key="enrich_web_search",
+        help="웹 검색 결과 페이지 본문을 가져와 요약을 함께 전달합니다 (검색 시간이 늘어날 수 있음)"
+    )
+    st.checkbox(
+        "PDF 일괄 처리 (Message Batch)",
+        key="pdf_batch_mode",
+        help="큰 PDF의 청크 분석을 배치 하나로 제출합니다 (완료까지 수 분 이상 걸릴 수 있지만 비용이 낮음)"
+    )
+    st.checkbox(
+        "응답 캐시 사용",
+        value=st.session_state.get('use_response_cache', True),
+        key="use_response_cache",
+        help="같은 모델·프롬프트로 다시 실행하면 저장된 응답을 바로 사용합니다 (끄면 항상 새로 생성)"
+    )
+
 
 
 # ─── 초기화 ─────────────────────────────────────────────
 init_user_state()
 
+# 프롬프트 블록 스키마 검증 (잘못된 블록은 분석 도중이 아니라 시작 시점에 중단)
+try:
+    get_prompt_block_registry().get_block_models()
+except ValueError as e:
+    st.error(f"❌ 프롬프트 블록 정의 오류: {e}")
+    st.stop()
+
 
 
 # ─── 1. 프로젝트 기본 정보 입력 (탭 위에 배치) ─────────────────────────
@@ -153,7 +202,10 @@ with st.expander("프로젝트 정보 입력", expanded=st.session_state.get('sh
         pdf_text = extract_text_from_pdf(pdf_bytes, "bytes")
 
         # 새로운 고급 분석 사용 (청크 분석)
-        comprehensive_result = analyze_pdf_in_chunks(pdf_text)
+        comprehensive_result = analyze_pdf_in_chunks(
+            pdf_text,
+            batch=st.session_state.get('pdf_batch_mode', False)
+        )
 
         # 기존 호환성을 위한 처리
         pdf_summary = comprehensive_result["summary"]
@@ -202,10 +254,8 @@ with st.expander("프로젝트 정보 입력", expanded=st.session_state.get('sh
 if not st.session_state.get('show_project_info', True):
     st.sidebar.markdown("### 추가 선택 가능한 단계")
     
-    # 프롬프트 블록 로드
-    from prompt_loader import load_prompt_blocks
-    blocks = load_prompt_blocks()
-    extra_blocks = blocks["extra"]
+    # 프롬프트 블록 로드 (레지스트리 캐시 사용)
+    extra_blocks = get_prompt_block_registry().get_extra_blocks()
     
     # 현재 선택된 단계들 (editable_steps 기준으로 확인)
     current_step_ids = set()
@@ -165,6 +165,73 @@ def admin_panel():
             else:
                 st.error("사용자를 삭제할 수 없습니다.")
 
+    # 프롬프트 구성 분석
+    with st.expander("프롬프트 구성 분석"):
+        from prompt_anatomy import get_prompt_anatomy_log, summarize_prompt_anatomy
+
+        anatomy_summary = summarize_prompt_anatomy()
+        if not anatomy_summary:
+            st.info("아직 기록된 프롬프트가 없습니다.")
+        else:
+            regressions = [row["step"] for row in anatomy_summary if row["regression"]]
+            if regressions:
+                st.warning(f"이전 실행 대비 프롬프트가 커진 단계: {', '.join(regressions)}")
+            st.markdown("**블록별 집계 (추정 토큰)**")
+            st.dataframe(anatomy_summary, use_container_width=True)
+            st.markdown("**최근 단계별 섹션 토큰**")
+            st.dataframe(list(reversed(get_prompt_anatomy_log()[-50:])), use_container_width=True)
+
+    # LLM 호출 현황 (프로세스 전체)
+    with st.expander("LLM 게이트웨이"):
+        from llm_gateway import get_llm_gateway
+
+        gateway_stats = get_llm_gateway().stats()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("남은 토큰 예산 (분당)", f"{gateway_stats['tokens_available']:,} / {gateway_stats['tokens_per_minute']:,}")
+        col2.metric("Rate limit 응답", gateway_stats["rate_limited"])
+        col3.metric("호출 일시 중지 (초)", gateway_stats["paused_seconds"])
+        if gateway_stats["models"]:
+            st.dataframe(
+                [{"model": model, **lane} for model, lane in gateway_stats["models"].items()],
+                use_container_width=True
+            )
+        else:
+            st.info("아직 게이트웨이를 거친 호출이 없습니다.")
+
+    # PDF 검색 결과 캐시 (프로세스 전체)
+    with st.expander("PDF 검색 캐시"):
+        from utils_pdf import get_search_cache_stats
+
+        search_stats = get_search_cache_stats()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("저장된 결과", f"{search_stats['size']} / {search_stats['max_size']}")
+        col2.metric("적중률", f"{search_stats['hit_rate']}%")
+        col3.metric("적중 / 실패", f"{search_stats['hits']} / {search_stats['misses']}")
+
+    # 작업별 모델 선택 기록
+    with st.expander("모델 라우팅"):
+        from model_router import get_routing_log
+
+        routing_log = get_routing_log()
+        if routing_log:
+            st.dataframe(list(reversed(routing_log[-100:])), use_container_width=True)
+        else:
+            st.info("아직 기록된 모델 선택이 없습니다.")
+
+    # 완전 일치 응답 캐시
+    with st.expander("LLM 응답 캐시"):
+        from init_dspy import get_response_cache, LLM_CACHE_MAX_BYTES
+
+        response_cache = get_response_cache()
+        cache_stats = response_cache.stats()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("저장된 응답", cache_stats["entries"])
+        col2.metric("적중률", f"{cache_stats['hit_rate']}%")
+        col3.metric("용량 (MB)", f"{(cache_stats['size_bytes'] or 0) / 1024 / 1024:.1f} / {LLM_CACHE_MAX_BYTES / 1024 / 1024:.0f}")
+        if st.button("응답 캐시 비우기", type="secondary"):
+            response_cache.clear()
+            st.success("응답 캐시를 비웠습니다.")
+
 def logout():
     """로그아웃"""
     st.session_state.authenticated = False
@@ -0,0 +1,67 @@
+# benchmarks/bench_prompt_templates.py
+
+"""
+convert_dsl_to_prompt 템플릿 사전 컴파일 마이크로 벤치마크
+
+실행: python benchmarks/bench_prompt_templates.py
+- 매번 컴파일 (기존 방식과 동일한 작업량) vs 캐시된 템플릿의 동적 슬롯만 렌더링
+"""
+
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from prompt_loader import get_prompt_block_registry
+from dsl_to_prompt import compile_dsl_block, convert_dsl_to_prompt, render_project_info, render_site_fields
+
+USER_INPUTS = {
+    "project_name": "Woori Bank Dasan Campus",
+    "owner": "Woori Bank",
+    "site_location": "Namyangju-si, Gyeonggi-do",
+    "site_area": "30,396.0㎡",
+    "building_type": "Training Center",
+    "project_goal": "Develop an innovative training campus",
+}
+SITE_FIELDS = {"site_area": "30,396㎡", "zoning": "자연녹지지역", "traffic": "국도 인접"}
+PREVIOUS = "**문서 분석**: " + "이전 분석 결과 " * 200
+PDF_SUMMARY = "PDF 요약 " * 300
+
+
+def render_uncached(block):
+    """매 호출마다 블록 전체를 다시 컴파일 (기존 문자열 연결 방식과 같은 작업량)"""
+    template = compile_dsl_block(block)
+    return template.render({
+        "project_info": render_project_info(USER_INPUTS),
+        "site_fields": render_site_fields(SITE_FIELDS),
+        "previous_results": f"# 📚 이전 분석 결과\n{PREVIOUS}\n",
+        "pdf_summary": f"# 📄 PDF 문서 요약\n{PDF_SUMMARY}\n",
+        "web_results": "",
+    })
+
+
+def render_cached(block):
+    return convert_dsl_to_prompt(block, USER_INPUTS, PREVIOUS, PDF_SUMMARY, SITE_FIELDS, include_web_search=False)
+
+
+def main(repeat: int = 200):
+    blocks = get_prompt_block_registry().get_extra_blocks()
+
+    for block in blocks:
+        assert render_uncached(block) == render_cached(block), block["id"]
+
+    uncached = min(timeit.repeat(lambda: [render_uncached(b) for b in blocks], number=repeat, repeat=3))
+    cached = min(timeit.repeat(lambda: [render_cached(b) for b in blocks], number=repeat, repeat=3))
+
+    per_call = lambda total: total / (repeat * len(blocks)) * 1e6
+    print(f"블록 수: {len(blocks)}, 반복: {repeat}")
+    print(f"매번 컴파일     : {per_call(uncached):8.1f} µs/호출")
+    print(f"사전 컴파일 템플릿: {per_call(cached):8.1f} µs/호출")
+    print(f"속도 향상       : {uncached / cached:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/check_prompt_compaction.py
+
+"""
+프롬프트 압축 골든 비교
+
+실행: python benchmarks/check_prompt_compaction.py
+- 20개 블록 각각 압축 전/후 프롬프트의 추정 토큰 수와 절감률 출력
+- 출력 섹션 구성(구조 제목, 섹션 템플릿, 섹션별 필수 컬럼, 필수 포함 문구)이 같지 않으면 실패 (종료 코드 1)
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from prompt_loader import get_prompt_block_registry
+from dsl_to_prompt import convert_dsl_to_cacheable_prompt
+from prompt_compactor import compaction_report, verify_section_coverage
+
+USER_INPUTS = {
+    "project_name": "Woori Bank Dasan Campus",
+    "owner": "Woori Bank",
+    "site_location": "Namyangju-si, Gyeonggi-do",
+    "site_area": "30,396.0㎡",
+    "building_type": "Training Center",
+    "project_goal": "Develop an innovative training campus",
+}
+SITE_FIELDS = {"site_area": "30,396㎡", "zoning": "자연녹지지역"}
+PREVIOUS = "**문서 분석**: 이전 분석 결과"
+PDF_SUMMARY = "PDF 요약"
+
+
+def render(block, compact):
+    prefix, suffix = convert_dsl_to_cacheable_prompt(
+        block, USER_INPUTS, PREVIOUS, PDF_SUMMARY, SITE_FIELDS,
+        include_web_search=False, compact=compact
+    )
+    return f"{prefix}\n\n{suffix}"
+
+
+def main() -> int:
+    blocks = get_prompt_block_registry().get_extra_blocks()
+    failures = 0
+    total_original = total_compact = 0
+
+    print(f"{'블록':<34}{'원본':>8}{'압축':>8}{'절감':>8}")
+    for block in blocks:
+        original = render(block, compact=False)
+        compacted = render(block, compact=True)
+        report = compaction_report(original, compacted)
+        total_original += report["original_tokens"]
+        total_compact += report["compact_tokens"]
+        print(f"{block['id']:<34}{report['original_tokens']:>8,}{report['compact_tokens']:>8,}{report['saved_percent']:>7.1f}%")
+
+        differences = verify_section_coverage(original, compacted)
+        if differences:
+            failures += 1
+            for difference in differences:
+                print(f"  ❌ {difference}")
+
+    saved = (total_original - total_compact) / total_original * 100 if total_original else 0.0
+    print(f"{'합계':<34}{total_original:>8,}{total_compact:>8,}{saved:>7.1f}%")
+    print("✅ 출력 섹션 구성 동일" if not failures else f"❌ 섹션 구성이 달라진 블록 {failures}개")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
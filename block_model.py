@@ -0,0 +1,223 @@
+# block_model.py
+
+"""
+프롬프트 블록 타입 모델
+- JSON 블록을 로드 시점에 한 번 검증하여 불변(frozen) 슬롯 데이터클래스로 변환
+- 출력 구조 마커 등 파생 데이터를 미리 계산
+- 잘못된 블록은 분석 도중이 아니라 로드 시점에 BlockValidationError로 실패
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class BlockValidationError(ValueError):
+    """블록 스키마 오류"""
+
+
+def _require_str(value: Any, path: str, allow_empty: bool = True) -> str:
+    if not isinstance(value, str):
+        raise BlockValidationError(f"{path}: 문자열이어야 합니다. ({type(value).__name__})")
+    if not allow_empty and not value.strip():
+        raise BlockValidationError(f"{path}: 비어 있을 수 없습니다.")
+    return value
+
+
+def _str_tuple(value: Any, path: str) -> Tuple[str, ...]:
+    if value is None:
+        return ()
+    if not isinstance(value, list):
+        raise BlockValidationError(f"{path}: 목록이어야 합니다. ({type(value).__name__})")
+    return tuple(_require_str(item, f"{path}[{i}]") for i, item in enumerate(value))
+
+
+def _mapping(value: Any, path: str) -> Dict[str, Any]:
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise BlockValidationError(f"{path}: 객체여야 합니다. ({type(value).__name__})")
+    return value
+
+
+def build_output_markers(output_structure: Tuple[str, ...]) -> Tuple[Tuple[str, ...], ...]:
+    """
+    구조별 결과 탐색 마커 (우선순위 순)
+
+    Returns:
+        Tuple[Tuple[str, ...], ...]: 구조마다 ("## i. 이름", "## 이름", "i. 이름", "### 이름", "**이름**", "이름")
+    """
+    return tuple(
+        (f"## {i}. {name}", f"## {name}", f"{i}. {name}", f"### {name}", f"**{name}**", name)
+        for i, name in enumerate(output_structure, 1)
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class AnalysisFramework:
+    approach: str
+    methodology: str
+    criteria: Tuple[str, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class QualityStandards:
+    constraints: Tuple[str, ...]
+    required_phrases: Tuple[str, ...]
+    validation_rules: Tuple[str, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class SectionTemplate:
+    name: str
+    table_title: str
+    required_columns: Tuple[str, ...]
+    narrative_template: str
+    diagram_title: str
+
+
+@dataclass(frozen=True, slots=True)
+class Presentation:
+    language_tone: str
+    target_format: str
+    explanatory_template: str
+    visual_elements: Tuple[str, ...]
+    section_templates: Tuple[SectionTemplate, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class BlockDSL:
+    goal: str
+    role: Optional[str]                         # None이면 기본 역할 사용
+    context: str
+    source: Tuple[str, ...]
+    tasks: Tuple[str, ...]
+    output_structure: Tuple[str, ...]
+    analysis_framework: Optional[AnalysisFramework]
+    quality_standards: Optional[QualityStandards]
+    presentation: Optional[Presentation]
+
+
+@dataclass(frozen=True, slots=True)
+class PromptBlock:
+    """검증된 분석 블록"""
+    id: str
+    title: str
+    description: str
+    dsl: BlockDSL
+    output_markers: Tuple[Tuple[str, ...], ...]
+
+    @property
+    def output_structure(self) -> Tuple[str, ...]:
+        return self.dsl.output_structure
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PromptBlock":
+        """
+        JSON 블록 검증 및 변환
+
+        Raises:
+            BlockValidationError: 필수 항목 누락, 타입 오류, 출력 구조 중복 등
+        """
+        if not isinstance(data, dict):
+            raise BlockValidationError(f"블록은 객체여야 합니다. ({type(data).__name__})")
+        block_id = _require_str(data.get("id"), "id", allow_empty=False)
+        path = f"블록 '{block_id}'"
+        title = _require_str(data.get("title"), f"{path}.title", allow_empty=False)
+        description = _require_str(data.get("description", ""), f"{path}.description")
+
+        if "content_dsl" not in data:
+            raise BlockValidationError(f"{path}: content_dsl이 없습니다.")
+        dsl = _mapping(data["content_dsl"], f"{path}.content_dsl")
+        dsl_path = f"{path}.content_dsl"
+
+        output_structure = _str_tuple(dsl.get("output_structure"), f"{dsl_path}.output_structure")
+        if any(not name.strip() for name in output_structure):
+            raise BlockValidationError(f"{dsl_path}.output_structure: 빈 구조명이 있습니다.")
+        duplicates = sorted({name for name in output_structure if output_structure.count(name) > 1})
+        if duplicates:
+            raise BlockValidationError(f"{dsl_path}.output_structure: 중복된 구조명 {duplicates}")
+
+        framework = _mapping(dsl.get("analysis_framework"), f"{dsl_path}.analysis_framework")
+        quality = _mapping(dsl.get("quality_standards"), f"{dsl_path}.quality_standards")
+        presentation = _mapping(dsl.get("presentation"), f"{dsl_path}.presentation")
+
+        role = dsl.get("role")
+        block_dsl = BlockDSL(
+            goal=_require_str(dsl.get("goal", ""), f"{dsl_path}.goal"),
+            role=_require_str(role, f"{dsl_path}.role") if role is not None else None,
+            context=_require_str(dsl.get("context") or "", f"{dsl_path}.context"),
+            source=_str_tuple(dsl.get("source"), f"{dsl_path}.source"),
+            tasks=_str_tuple(dsl.get("tasks"), f"{dsl_path}.tasks"),
+            output_structure=output_structure,
+            analysis_framework=AnalysisFramework(
+                approach=_require_str(framework.get("approach", ""), f"{dsl_path}.analysis_framework.approach"),
+                methodology=_require_str(framework.get("methodology", ""), f"{dsl_path}.analysis_framework.methodology"),
+                criteria=_str_tuple(framework.get("criteria"), f"{dsl_path}.analysis_framework.criteria"),
+            ) if framework else None,
+            quality_standards=QualityStandards(
+                constraints=_str_tuple(quality.get("constraints"), f"{dsl_path}.quality_standards.constraints"),
+                required_phrases=_str_tuple(quality.get("required_phrases"), f"{dsl_path}.quality_standards.required_phrases"),
+                validation_rules=_str_tuple(quality.get("validation_rules"), f"{dsl_path}.quality_standards.validation_rules"),
+            ) if quality else None,
+            presentation=_build_presentation(presentation, f"{dsl_path}.presentation") if presentation else None,
+        )
+
+        return cls(
+            id=block_id,
+            title=title,
+            description=description,
+            dsl=block_dsl,
+            output_markers=build_output_markers(output_structure),
+        )
+
+
+def _build_presentation(presentation: Dict[str, Any], path: str) -> Presentation:
+    templates = _mapping(presentation.get("section_templates"), f"{path}.section_templates")
+    section_templates = []
+    for name, template in templates.items():
+        template_path = f"{path}.section_templates.{name}"
+        template = _mapping(template, template_path)
+        section_templates.append(SectionTemplate(
+            name=name,
+            table_title=_require_str(template.get("table_title", ""), f"{template_path}.table_title"),
+            required_columns=_str_tuple(template.get("required_columns"), f"{template_path}.required_columns"),
+            narrative_template=_require_str(template.get("narrative_template", ""), f"{template_path}.narrative_template"),
+            diagram_title=_require_str(template.get("diagram_title", ""), f"{template_path}.diagram_title"),
+        ))
+
+    return Presentation(
+        language_tone=_require_str(presentation.get("language_tone", ""), f"{path}.language_tone"),
+        target_format=_require_str(presentation.get("target_format", ""), f"{path}.target_format"),
+        explanatory_template=_require_str(presentation.get("explanatory_template", ""), f"{path}.explanatory_template"),
+        visual_elements=_str_tuple(presentation.get("visual_elements"), f"{path}.visual_elements"),
+        section_templates=tuple(section_templates),
+    )
+
+
+def as_block_model(block) -> PromptBlock:
+    """dict 블록이면 검증하여 변환, 이미 PromptBlock이면 그대로 반환"""
+    if isinstance(block, PromptBlock):
+        return block
+    return PromptBlock.from_dict(block)
+
+
+def build_block_models(blocks: List[Dict[str, Any]]) -> Dict[str, PromptBlock]:
+    """
+    블록 목록 전체 검증 (ID 중복 포함)
+
+    Returns:
+        Dict[str, PromptBlock]: 블록 ID → 모델 (원래 순서)
+
+    Raises:
+        BlockValidationError: 첫 번째로 발견된 오류
+    """
+    models: Dict[str, PromptBlock] = {}
+    for index, block in enumerate(blocks):
+        try:
+            model = PromptBlock.from_dict(block)
+        except BlockValidationError as e:
+            raise BlockValidationError(f"blocks[{index}] {e}") from None
+        if model.id in models:
+            raise BlockValidationError(f"blocks[{index}]: 중복된 블록 ID '{model.id}'")
+        models[model.id] = model
+    return models
@@ -0,0 +1,140 @@
+# chunk_dedup.py
+
+"""
+MinHash/LSH 기반 유사 중복 청크 제거
+- 입찰 문서의 부록마다 반복되는 조항을 묶어 대표 청크만 LLM에 전달
+- 나머지 청크는 대표 청크의 분석 결과를 재사용
+"""
+
+import random
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+# 기본 설정: 64개 해시 = 16 밴드 × 4행 (후보 임계값 약 0.5, 최종 판정은 similarity_threshold)
+NUM_PERMUTATIONS = 64
+NUM_BANDS = 16
+SHINGLE_SIZE = 5
+SIMILARITY_THRESHOLD = 0.8
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+@dataclass
+class DedupResult:
+    """중복 제거 결과"""
+    representatives: List[int]                              # LLM에 보낼 청크 인덱스
+    representative_of: Dict[int, int] = field(default_factory=dict)  # 청크 인덱스 → 대표 인덱스
+    clusters: List[List[int]] = field(default_factory=list)         # 2개 이상으로 묶인 클러스터
+
+    @property
+    def calls_saved(self) -> int:
+        """절약된 LLM 호출 수"""
+        return len(self.representative_of) - len(self.representatives)
+
+
+def _shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """공백을 정규화한 문자 n-gram 집합"""
+    normalized = re.sub(r"\s+", " ", text.lower()).strip()
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+
+class MinHasher:
+    """고정 시드 해시 함수 집합으로 MinHash 시그니처 계산"""
+
+    def __init__(self, num_perm: int = NUM_PERMUTATIONS, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, shingles: set) -> List[int]:
+        if not shingles:
+            return [_MAX_HASH] * self.num_perm
+        hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles]
+        return [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._params
+        ]
+
+
+def estimate_similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """시그니처 일치 비율로 Jaccard 유사도 추정"""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+def find_near_duplicates(
+    chunks: List[str],
+    similarity_threshold: float = SIMILARITY_THRESHOLD,
+    num_perm: int = NUM_PERMUTATIONS,
+    num_bands: int = NUM_BANDS
+) -> DedupResult:
+    """
+    유사 중복 청크 클러스터링
+
+    LSH 밴드가 겹치는 후보 쌍만 비교하고, 추정 유사도가 임계값 이상이면 같은 클러스터로 묶습니다.
+    각 클러스터의 대표는 가장 앞선 청크입니다.
+
+    Args:
+        chunks: 청크 텍스트 목록
+        similarity_threshold: 중복으로 판정할 추정 Jaccard 유사도
+        num_perm: MinHash 해시 수
+        num_bands: LSH 밴드 수 (num_perm의 약수)
+
+    Returns:
+        DedupResult: 대표 청크 및 매핑 정보
+    """
+    if num_perm % num_bands:
+        raise ValueError("num_perm은 num_bands로 나누어떨어져야 합니다.")
+    rows = num_perm // num_bands
+
+    hasher = MinHasher(num_perm)
+    signatures = [hasher.signature(_shingles(chunk)) for chunk in chunks]
+
+    parent = list(range(len(chunks)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i: int, j: int):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            # 작은 인덱스를 루트로 유지 (대표 = 가장 앞선 청크)
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    compared = set()
+    for band in range(num_bands):
+        buckets: Dict[tuple, List[int]] = {}
+        for i, sig in enumerate(signatures):
+            if not chunks[i].strip():
+                continue
+            buckets.setdefault(tuple(sig[band * rows:(band + 1) * rows]), []).append(i)
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    pair = (members[x], members[y])
+                    if pair in compared:
+                        continue
+                    compared.add(pair)
+                    if estimate_similarity(signatures[pair[0]], signatures[pair[1]]) >= similarity_threshold:
+                        union(*pair)
+
+    representative_of = {i: find(i) for i in range(len(chunks))}
+    groups: Dict[int, List[int]] = {}
+    for i, root in representative_of.items():
+        groups.setdefault(root, []).append(i)
+
+    return DedupResult(
+        representatives=sorted(groups),
+        representative_of=representative_of,
+        clusters=[members for _, members in sorted(groups.items()) if len(members) > 1]
+    )
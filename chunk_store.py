@@ -0,0 +1,231 @@
+# chunk_store.py
+
+"""
+오프셋 보존 청크 저장소
+- 한국어 문장 종결에 맞춘 문장 분리
+- 청크마다 문서 ID, 페이지, 시작/끝 오프셋 기록
+- 검색 결과 인용 및 주변 문맥 조회 (텍스트 재추출 없음)
+"""
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# 문장 경계: 한국어 종결어미(다/요/까/죠/음/함/임/됨 등) + 마침표, 한글 뒤 물음표·느낌표,
+# 영문 문장부호(목록 번호 "1." 제외), 전각 문장부호, 빈 줄, 글머리 줄바꿈
+# (줄 맨 앞의 "다." "라." 같은 개요 번호는 split_sentences_ko에서 제외)
+_SENTENCE_END = re.compile(
+    r"(?:(?<=[다요까죠음함임됨오자라])\.)"
+    r"|(?:(?<=[가-힣])[!?])"
+    r"|(?:(?<=[a-zA-Z)\]\"'])[.!?](?=\s))"
+    r"|[。！？]"
+    r"|\n\s*\n"
+    r"|\n(?=\s*(?:[-•·▪■□○●※▶]|\d+[.)]|[가-하][.)]|\(\d+\)))"
+)
+
+# 줄 맨 앞 한글 개요 번호 (가. 나) 다. ...)
+_OUTLINE_MARKER = re.compile(r"[가-하][.)]")
+
+
+def _is_outline_marker(text: str, end: int) -> bool:
+    """text[:end]가 줄 맨 앞의 한글 개요 번호로 끝나는지 여부"""
+    line_start = text.rfind("\n", 0, end) + 1
+    return _OUTLINE_MARKER.fullmatch(text[line_start:end].strip()) is not None
+
+
+@dataclass
+class Chunk:
+    """페이지 내 위치 정보를 가진 청크"""
+    chunk_id: int
+    doc_id: str
+    page: int          # 1부터 시작
+    start: int         # 페이지 텍스트 내 시작 오프셋
+    end: int           # 페이지 텍스트 내 끝 오프셋 (미포함)
+    text: str
+
+    @property
+    def citation(self) -> str:
+        """인용 표기 (예: [projectA p.3, 120-480])"""
+        return f"[{self.doc_id} p.{self.page}, {self.start}-{self.end}]"
+
+
+def split_sentences_ko(text: str) -> List[Tuple[int, int]]:
+    """
+    한국어 문장 단위 분리
+
+    Args:
+        text: 분리할 텍스트
+
+    Returns:
+        List[Tuple[int, int]]: 문장별 (시작, 끝) 오프셋 - 앞뒤 공백 제외
+    """
+    spans = []
+    position = 0
+    for match in _SENTENCE_END.finditer(text):
+        end = match.end()
+        if match.group() == "." and _is_outline_marker(text, end):
+            continue
+        spans.append((position, end))
+        position = end
+    if position < len(text):
+        spans.append((position, len(text)))
+
+    # 공백만 있는 구간 제거 및 공백 제외 오프셋으로 조정
+    trimmed = []
+    for start, end in spans:
+        segment = text[start:end]
+        stripped = segment.strip()
+        if not stripped:
+            continue
+        lead = len(segment) - len(segment.lstrip())
+        trimmed.append((start + lead, start + lead + len(stripped)))
+    return trimmed
+
+
+def chunk_page(text: str, chunk_size: int = 400) -> List[Tuple[int, int]]:
+    """
+    페이지 텍스트를 문장 경계 기준 청크 구간으로 분할
+
+    chunk_size를 넘지 않도록 문장을 묶으며, 한 문장이 chunk_size보다 길면 단독 청크가 됩니다.
+
+    Returns:
+        List[Tuple[int, int]]: 청크별 (시작, 끝) 오프셋
+    """
+    chunks = []
+    current_start = current_end = None
+    for start, end in split_sentences_ko(text):
+        if current_start is None:
+            current_start, current_end = start, end
+        elif end - current_start <= chunk_size:
+            current_end = end
+        else:
+            chunks.append((current_start, current_end))
+            current_start, current_end = start, end
+    if current_start is not None:
+        chunks.append((current_start, current_end))
+    return chunks
+
+
+class ChunkStore:
+    """문서별 청크와 페이지 텍스트를 보관하는 저장소"""
+
+    def __init__(self, chunk_size: int = 400):
+        self.chunk_size = chunk_size
+        self._chunks: List[Optional[Chunk]] = []   # 교체된 문서의 자리는 None (청크 ID 유지)
+        self._pages: Dict[str, List[str]] = {}
+        self._doc_chunk_ids: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def add_document(self, doc_id: str, pages: List[str]) -> List[Chunk]:
+        """
+        페이지 텍스트 목록으로 문서 등록 (같은 ID가 있으면 교체)
+
+        Args:
+            doc_id: 문서 식별자
+            pages: 페이지별 텍스트
+
+        Returns:
+            List[Chunk]: 생성된 청크 목록
+        """
+        with self._lock:
+            if doc_id in self._doc_chunk_ids:
+                self._remove(doc_id)
+
+            chunk_ids = []
+            for page_num, page_text in enumerate(pages, 1):
+                for start, end in chunk_page(page_text, self.chunk_size):
+                    chunk = Chunk(
+                        chunk_id=len(self._chunks),
+                        doc_id=doc_id,
+                        page=page_num,
+                        start=start,
+                        end=end,
+                        text=page_text[start:end]
+                    )
+                    self._chunks.append(chunk)
+                    chunk_ids.append(chunk.chunk_id)
+
+            self._pages[doc_id] = list(pages)
+            self._doc_chunk_ids[doc_id] = chunk_ids
+            return [self._chunks[i] for i in chunk_ids]
+
+    def _remove(self, doc_id: str):
+        """문서 제거 - 자리만 비워 다른 문서의 청크 ID는 바뀌지 않음 (잠금 안에서 호출)"""
+        for chunk_id in self._doc_chunk_ids.pop(doc_id, []):
+            self._chunks[chunk_id] = None
+        self._pages.pop(doc_id, None)
+
+    def has_document(self, doc_id: str) -> bool:
+        return doc_id in self._doc_chunk_ids
+
+    def get_chunks(self, doc_id: str) -> List[Chunk]:
+        """문서의 전체 청크 (페이지·오프셋 순)"""
+        return [self._chunks[i] for i in self._doc_chunk_ids.get(doc_id, [])]
+
+    def get_chunk(self, chunk_id: int) -> Optional[Chunk]:
+        if 0 <= chunk_id < len(self._chunks):
+            return self._chunks[chunk_id]
+        return None
+
+    def locate(self, doc_id: str, text: str) -> Optional[Chunk]:
+        """
+        문서 안에서 text가 시작되는 위치의 청크 (다른 검색 결과에 인용 표기를 붙일 때 사용)
+
+        Returns:
+            Optional[Chunk]: 찾지 못하면 None
+        """
+        # 페이지는 줄바꿈으로 이어 붙여 추출되므로 첫 줄은 한 페이지 안에 있음
+        head = text.strip().split("\n", 1)[0][:60]
+        if not head:
+            return None
+        for page_num, page_text in enumerate(self._pages.get(doc_id, []), 1):
+            offset = page_text.find(head)
+            if offset < 0:
+                continue
+            for chunk in self.get_chunks(doc_id):
+                if chunk.page == page_num and chunk.start <= offset < chunk.end:
+                    return chunk
+        return None
+
+    def get_page_text(self, doc_id: str, page: int) -> str:
+        """페이지 원문 (1부터 시작)"""
+        pages = self._pages.get(doc_id, [])
+        return pages[page - 1] if 0 < page <= len(pages) else ""
+
+    def get_neighbors(self, chunk_id: int, window: int = 1) -> List[Chunk]:
+        """
+        같은 문서 안에서 앞뒤 window개 청크를 포함한 주변 문맥
+
+        Returns:
+            List[Chunk]: 원래 순서대로 정렬된 청크 목록 (자기 자신 포함)
+        """
+        chunk = self.get_chunk(chunk_id)
+        if chunk is None:
+            return []
+        doc_ids = self._doc_chunk_ids.get(chunk.doc_id, [])
+        position = doc_ids.index(chunk_id)
+        selected = doc_ids[max(0, position - window):position + window + 1]
+        return [self._chunks[i] for i in selected]
+
+    def search(self, query: str, doc_id: Optional[str] = None, top_k: int = 3) -> List[Tuple[int, Chunk]]:
+        """
+        키워드 일치 개수 기준 청크 검색
+
+        Returns:
+            List[Tuple[int, Chunk]]: (관련도, 청크) 목록
+        """
+        keywords = re.findall(r'\w+', query.lower())
+        if doc_id is not None:
+            candidates = self.get_chunks(doc_id)
+        else:
+            candidates = [chunk for chunk in self._chunks if chunk is not None]
+
+        scored = []
+        for chunk in candidates:
+            text_lower = chunk.text.lower()
+            score = sum(1 for keyword in keywords if keyword in text_lower)
+            if score > 0:
+                scored.append((score, chunk))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return scored[:top_k]
@@ -0,0 +1,295 @@
+# context_manager.py
+
+"""
+이전 분석 결과 전달(carry-forward) 관리
+- 완료된 단계마다 간결한 다이제스트를 만들어 캐시 (로컬 추출 방식, 필요 시 digest_fn으로 저비용 모델 사용)
+- 토큰 예산 안에서 현재 블록과 관련도가 높고 최근인 단계부터 선택
+- 전체 결과를 모두 이어 붙이던 방식의 단계별 입력 증가(누적 시 제곱 증가)를 차단
+- 의존성 정보가 있는 단계는 선행 단계 결과만 전달
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import streamlit as st
+
+from analysis_system import get_step_dependencies
+from block_model import PromptBlock
+from prompt_loader import get_prompt_block_registry
+from utils import estimate_tokens, extract_insight
+
+# 이전 결과에 배정하는 기본 토큰 예산 (세션의 context_token_budget으로 변경 가능)
+DEFAULT_CONTEXT_TOKEN_BUDGET = 4000
+
+# 단계별 다이제스트 최대 길이 (문자)
+DIGEST_MAX_CHARS = 700
+
+# 직전 단계는 예산의 이 비율 안에 들어오면 전체 결과를 그대로 전달
+RECENT_FULL_RESULT_RATIO = 0.5
+
+# 최근성 가중치 (관련도 0~1에 더해짐)
+RECENCY_WEIGHT = 0.5
+
+_DIGEST_CACHE_MAX_SIZE = 512
+# 키 → (digest_fn, 다이제스트) - 함수 참조를 함께 보관해 항목이 남아 있는 동안 id()가 재사용되지 않게 함
+_digest_cache: "OrderedDict[str, Tuple[Optional[Callable[[str], str]], str]]" = OrderedDict()
+_digest_lock = threading.Lock()
+
+
+def _keywords(text: str) -> set:
+    """2자 이상 단어 집합"""
+    return {word for word in re.findall(r"\w{2,}", text.lower())}
+
+
+def make_local_digest(result: str, max_chars: int = DIGEST_MAX_CHARS) -> str:
+    """
+    분석 결과에서 제목과 각 섹션의 첫 문장, 전략적 제언을 추출해 다이제스트 생성
+
+    Args:
+        result: 단계 분석 결과 전문
+        max_chars: 다이제스트 최대 길이
+
+    Returns:
+        str: 다이제스트
+    """
+    lines = []
+    expect_lead = False
+    for raw_line in result.splitlines():
+        line = raw_line.strip()
+        if not line or set(line) <= set("-|:= "):
+            continue
+        if line.startswith("#"):
+            lines.append("- " + line.lstrip("#").strip())
+            expect_lead = True
+        elif expect_lead and not line.startswith("|"):
+            sentence = re.split(r"(?<=[.!?다])\s", line.lstrip("-*• ").strip(), maxsplit=1)[0]
+            lines.append("  " + sentence)
+            expect_lead = False
+
+    insight = extract_insight(result)
+    if not insight.startswith("※"):
+        lines.append("- 제언: " + re.sub(r"\s+", " ", insight))
+
+    lines = list(dict.fromkeys(lines))  # 반복되는 제목·문장 제거
+    digest = "\n".join(lines) if lines else re.sub(r"\s+", " ", result.strip())
+    if len(digest) > max_chars:
+        digest = digest[:max_chars].rstrip() + "..."
+    return digest
+
+
+def get_step_digest(result: str, digest_fn: Optional[Callable[[str], str]] = None,
+                    max_chars: int = DIGEST_MAX_CHARS, digest_name: Optional[str] = None) -> str:
+    """
+    결과 해시 기준으로 캐시된 다이제스트 조회 (없으면 생성)
+
+    Args:
+        result: 단계 분석 결과 전문
+        digest_fn: 다이제스트 생성 함수 (예: 저비용 모델 호출). 없으면 로컬 추출
+        max_chars: 로컬 다이제스트 최대 길이
+        digest_name: 캐시 키로 쓸 digest_fn 이름 (같은 이름이면 다른 함수 객체와도 캐시 공유).
+            없으면 함수 객체 자체(id) 기준이므로 호출마다 새로 만든 lambda는 캐시를 공유하지 않음
+
+    Returns:
+        str: 다이제스트
+    """
+    if digest_fn is None:
+        fn_key = "local"
+    else:
+        fn_key = f"name:{digest_name}" if digest_name else f"id:{id(digest_fn)}"
+    key = hashlib.sha1(f"{fn_key}:{max_chars}:{result}".encode("utf-8")).hexdigest()
+
+    with _digest_lock:
+        if key in _digest_cache:
+            _digest_cache.move_to_end(key)
+            return _digest_cache[key][1]
+
+    digest = None
+    if digest_fn is not None:
+        try:
+            digest = digest_fn(result)
+        except Exception as e:
+            print(f"⚠️ 다이제스트 생성 실패, 로컬 추출로 대체: {e}")
+    if not digest:
+        digest = make_local_digest(result, max_chars)
+
+    with _digest_lock:
+        _digest_cache[key] = (digest_fn, digest)
+        while len(_digest_cache) > _DIGEST_CACHE_MAX_SIZE:
+            _digest_cache.popitem(last=False)
+    return digest
+
+
+def _block_keywords(block: PromptBlock) -> set:
+    """현재 블록의 제목·목표·작업에서 키워드 추출"""
+    return _keywords(" ".join([block.title, block.dsl.goal, *block.dsl.tasks]))
+
+
+def build_carry_forward_context(
+    history: List[Dict],
+    current_block: PromptBlock,
+    token_budget: int = DEFAULT_CONTEXT_TOKEN_BUDGET,
+    exclude_steps: Optional[set] = None,
+    digest_fn: Optional[Callable[[str], str]] = None,
+    include_step_ids: Optional[set] = None,
+    step_ids_by_title: Optional[Dict[str, str]] = None,
+    digest_name: Optional[str] = None
+) -> str:
+    """
+    토큰 예산 안에서 이전 단계 결과를 조립
+
+    각 단계의 다이제스트를 관련도(현재 블록과의 키워드 겹침)와 최근성 점수 순으로 예산에 채우고,
+    남은 예산이 충분하면 직전 단계는 전체 결과로 교체합니다. 출력은 원래 분석 순서를 유지합니다.
+
+    Args:
+        history: cot_history 항목 목록 ({'step', 'result'})
+        current_block: 현재 분석 블록
+        token_budget: 이전 결과에 사용할 최대 토큰 수
+        exclude_steps: 제외할 단계 제목
+        digest_fn: 다이제스트 생성 함수 (없으면 로컬 추출)
+        include_step_ids: 포함할 단계 ID (None이면 전체)
+        step_ids_by_title: step_id가 없는 이전 기록용 제목 → 단계 ID 매핑
+        digest_name: digest_fn의 캐시 키 이름 (get_step_digest 참고)
+
+    Returns:
+        str: 프롬프트에 넣을 이전 분석 결과
+    """
+    exclude_steps = exclude_steps or set()
+    step_ids_by_title = step_ids_by_title or {}
+    entries = [h for h in history if h.get("result") and h.get("step") not in exclude_steps]
+    if include_step_ids is not None:
+        entries = [
+            h for h in entries
+            if (h.get("step_id") or step_ids_by_title.get(h.get("step"))) in include_step_ids
+        ]
+    if not entries:
+        return ""
+
+    block_keywords = _block_keywords(current_block)
+    candidates = []
+    for position, entry in enumerate(entries):
+        digest = get_step_digest(entry["result"], digest_fn, digest_name=digest_name)
+        formatted = f"**{entry['step']}**: {digest}"
+
+        relevance = len(block_keywords & _keywords(digest)) / len(block_keywords) if block_keywords else 0.0
+        recency = (position + 1) / len(entries)
+        candidates.append({
+            "position": position,
+            "step": entry["step"],
+            "text": formatted,
+            "tokens": estimate_tokens(formatted),
+            "score": relevance + RECENCY_WEIGHT * recency,
+        })
+
+    selected, skipped = [], []
+    remaining = token_budget
+    for candidate in sorted(candidates, key=lambda c: c["score"], reverse=True):
+        if candidate["tokens"] <= remaining:
+            selected.append(candidate)
+            remaining -= candidate["tokens"]
+        else:
+            skipped.append(candidate)
+
+    # 남은 예산으로 직전 단계를 전체 결과로 교체
+    latest = next((c for c in selected if c["position"] == len(entries) - 1), None)
+    if latest is not None:
+        full_text = f"**{latest['step']}**: {entries[-1]['result']}"
+        full_tokens = estimate_tokens(full_text)
+        if (full_tokens <= token_budget * RECENT_FULL_RESULT_RATIO
+                and full_tokens - latest["tokens"] <= remaining):
+            latest["text"] = full_text
+
+    parts = [c["text"] for c in sorted(selected, key=lambda c: c["position"])]
+    if skipped:
+        skipped_titles = ", ".join(c["step"] for c in sorted(skipped, key=lambda c: c["position"]))
+        parts.append(f"(토큰 예산으로 생략된 단계: {skipped_titles})")
+    return "\n\n".join(parts)
+
+
+def get_context_token_budget() -> int:
+    """세션에 설정된 이전 결과 토큰 예산"""
+    return int(st.session_state.get("context_token_budget", DEFAULT_CONTEXT_TOKEN_BUDGET))
+
+
+def _step_dependencies(step_id: str, steps_by_id: Dict) -> Optional[List[str]]:
+    """
+    워크플로우 단계(AnalysisStep)의 의존성
+
+    단계에 의존성이 없거나 워크플로우에 없는 단계는 기본 의존성 정보를 사용합니다
+    (AnalysisStep은 정보가 없는 단계도 빈 목록이라 "선행 단계 없음"과 구분되지 않음).
+    """
+    step = steps_by_id.get(step_id)
+    if step is not None and step.dependencies:
+        return list(step.dependencies)
+    return get_step_dependencies(step_id)
+
+
+def resolve_upstream_step_ids(step_id: str, steps_by_id: Dict) -> Optional[set]:
+    """
+    결과를 넘겨받을 선행 단계 ID
+
+    직접 선행 단계가 현재 워크플로우에 없으면 그 단계의 선행 단계로 거슬러 올라가 워크플로우 안의
+    가장 가까운 선행 단계를 찾습니다.
+
+    Args:
+        step_id: 현재 단계 ID
+        steps_by_id: 현재 워크플로우의 단계 ID → AnalysisStep (비어 있으면 워크플로우 정보 없음)
+
+    Returns:
+        Optional[set]: 선행 단계 ID. 의존성 정보가 없거나 워크플로우 안에서 선행 단계를 찾지 못하면
+            None (완료된 모든 이전 단계 사용)
+    """
+    dependencies = _step_dependencies(step_id, steps_by_id)
+    if dependencies is None:
+        return None
+    if not dependencies or not steps_by_id:
+        return set(dependencies)
+
+    upstream = set()
+    visited = {step_id}
+    pending = list(dependencies)
+    while pending:
+        dependency = pending.pop()
+        if dependency in visited:
+            continue
+        visited.add(dependency)
+        if dependency in steps_by_id:
+            upstream.add(dependency)
+        else:
+            pending.extend(_step_dependencies(dependency, steps_by_id) or [])
+    return upstream or None
+
+
+def get_carry_forward_context(current_block: PromptBlock, exclude_current: bool = False) -> str:
+    """
+    세션의 cot_history로 현재 블록에 전달할 이전 분석 결과 생성
+
+    현재 단계(워크플로우의 AnalysisStep)에 의존성 정보가 있으면 선행 단계 결과만 포함합니다.
+
+    Args:
+        current_block: 현재 분석 블록
+        exclude_current: 재분석 시 현재 단계 결과 제외 여부
+
+    Returns:
+        str: 이전 분석 결과 (없으면 빈 문자열)
+    """
+    history = st.session_state.get("cot_history", [])
+    exclude_steps = {current_block.title} if exclude_current else None
+
+    steps_by_id = {step.id: step for step in st.session_state.get("workflow_steps", [])}
+    include_step_ids = resolve_upstream_step_ids(current_block.id, steps_by_id)
+    step_ids_by_title = {
+        block["title"]: block_id
+        for block_id, block in get_prompt_block_registry().get_blocks_by_id().items()
+    }
+
+    return build_carry_forward_context(
+        history,
+        current_block,
+        token_budget=get_context_token_budget(),
+        exclude_steps=exclude_steps,
+        include_step_ids=include_step_ids,
+        step_ids_by_title=step_ids_by_title
+    )
@@ -1,8 +1,15 @@
 from utils_pdf import search_pdf_chunks  # 통합된 PDF 모듈 사용
-from search_helper import search_web_serpapi  # 주석 해제
+from search_helper import search_web_many, prefetch_web_searches  # 주석 해제
+from utils import estimate_tokens
+from prompt_compactor import compact_prompt
+from prompt_caching import CachePrefix
+from block_model import PromptBlock, as_block_model
 
-def get_web_search_for_block(block_id: str, user_inputs: dict) -> str:
-    """각 블록별로 관련된 웹 검색 수행"""
+# 프롬프트 구성 분석 섹션 (dsl = 블록 DSL의 정적 구간 전체)
+PROMPT_SECTIONS = ["dsl", "project_info", "site_fields", "previous_results", "pdf_summary", "web_results"]
+
+def get_search_queries_for_block(block_id: str, user_inputs: dict) -> list:
+    """블록별 웹 검색어 목록"""
     
     # 블록별 검색 쿼리 매핑
     search_queries = {
@@ -29,199 +36,444 @@ def get_web_search_for_block(block_id: str, user_inputs: dict) -> str:
 
     }
     
-    queries = search_queries.get(block_id, ["건축 분석 2024"])
+    return search_queries.get(block_id, ["건축 분석 2024"])
+
+
+def get_web_search_for_block(block_id: str, user_inputs: dict, enrich: bool = False) -> str:
+    """각 블록별로 관련된 웹 검색 수행 (enrich=True이면 결과 페이지 본문 요약 포함)"""
+    queries = get_search_queries_for_block(block_id, user_inputs)
     
+    # 검색어를 동시에 실행하여 블록의 검색 지연을 가장 느린 검색어 하나로 제한
     all_results = []
-    for query in queries:
-        try:
-            result = search_web_serpapi(query)
-            if result and result != "[검색 API 키 없음]":
-                all_results.append(f"검색어: {query}\n{result}")
-        except Exception as e:
-            print(f"웹 검색 실패 ({query}): {e}")
+    for query, result in search_web_many(queries, enrich=enrich):
+        if result and result != "[검색 API 키 없음]":
+            all_results.append(f"검색어: {query}\n{result}")
     
     return "\n\n".join(all_results) if all_results else ""
 
-def convert_dsl_to_prompt(
-    dsl_block: dict,
-    user_inputs: dict,
-    previous_summary: str = "",
-    pdf_summary: dict = None,
-    site_fields: dict = None,
-    include_web_search: bool = True
-) -> str:
-    """완전히 개선된 DSL을 프롬프트로 변환"""
+
+def prefetch_web_search_for_blocks(block_ids: list, user_inputs: dict, enrich: bool = False) -> int:
+    """
+    주어진 블록(웹 검색을 켠 단계)의 웹 검색을 백그라운드에서 미리 실행하여 검색 캐시를 채움
     
-    dsl = dsl_block.get("content_dsl", {})
+    Returns:
+        int: 새로 시작한 검색 수
+    """
+    queries = []
+    for block_id in block_ids:
+        queries.extend(get_search_queries_for_block(block_id, user_inputs))
+    return len(prefetch_web_searches(queries, enrich=enrich))
+
+class CompiledPromptTemplate:
+    """
+    DSL 블록을 한 번 컴파일한 프롬프트 템플릿
+    
+    정적 구간(목표, 프레임워크, 작업, 품질 기준, 섹션 템플릿, 출력 구조)은 문자열로 미리 만들어 두고,
+    호출마다 달라지는 구간(프로젝트 정보, 사이트 정보, 이전 결과, PDF, 웹 검색)만 슬롯으로 채웁니다.
+    """
+    
+    def __init__(self, block_id: str, block_title: str, segments: list,
+                 context_segments: list = None, prefix_segments: list = None, suffix_segments: list = None):
+        self.block_id = block_id
+        self.block_title = block_title
+        # ("static", 텍스트) 또는 ("slot", 슬롯 이름)
+        self.segments = segments
+        # 프롬프트 캐싱용 배치:
+        #   context_segments - 모든 단계에서 같은 프로젝트 맥락 (첫 번째 캐시 지점)
+        #   prefix_segments  - 이 블록의 DSL (두 번째 캐시 지점)
+        #   suffix_segments  - 매 단계 달라지는 부분
+        self.context_segments = context_segments or []
+        self.prefix_segments = prefix_segments or []
+        self.suffix_segments = suffix_segments or []
+    
+    @staticmethod
+    def _render_segments(segments: list, slot_values: dict) -> str:
+        prompt_parts = []
+        for kind, value in segments:
+            if kind == "static":
+                prompt_parts.append(value)
+            else:
+                slot_text = slot_values.get(value)
+                if slot_text:
+                    prompt_parts.append(slot_text)
+        return "\n\n".join(prompt_parts)
+    
+    def render(self, slot_values: dict) -> str:
+        """슬롯 값을 채워 최종 프롬프트 생성 - 값이 비어 있는 슬롯은 생략"""
+        return self._render_segments(self.segments, slot_values)
+    
+    def breakdown(self, slot_values: dict) -> dict:
+        """섹션별 추정 토큰 수 (PROMPT_SECTIONS 순서)"""
+        sections = {name: 0 for name in PROMPT_SECTIONS}
+        for kind, value in self.segments:
+            if kind == "static":
+                sections["dsl"] += estimate_tokens(value)
+            else:
+                sections[value] += estimate_tokens(slot_values.get(value) or "")
+        return sections
+    
+    def render_cacheable(self, slot_values: dict) -> tuple:
+        """(단계 공통 맥락, 블록 DSL 접두부, 가변 접미부) 생성"""
+        return (
+            self._render_segments(self.context_segments, slot_values),
+            self._render_segments(self.prefix_segments, slot_values),
+            self._render_segments(self.suffix_segments, slot_values)
+        )
+
+
+def _compile_static_head(block: PromptBlock) -> str:
+    """블록 헤더부터 출력 형식까지 정적 구간 생성"""
+    dsl = block.dsl
     prompt_parts = []
     
     # 0. 블록 ID 및 제목 명시 (새로 추가)
-    block_id = dsl_block.get("id", "")
-    block_title = dsl_block.get("title", "")
     prompt_parts.append(f"# 현재 분석 블록\n")
-    prompt_parts.append(f"**블록 ID:** {block_id}\n")
-    prompt_parts.append(f"**블록 제목:** {block_title}\n")
+    prompt_parts.append(f"**블록 ID:** {block.id}\n")
+    prompt_parts.append(f"**블록 제목:** {block.title}\n")
     prompt_parts.append(f"**분석 목적:** 이 블록만의 고유한 분석을 수행하세요.\n\n")
     
     # 1. 기본 역할 및 목표
-    prompt_parts.append(f"# 분석 목표\n{dsl.get('goal', '')}")
-    prompt_parts.append(f"# 역할\n{dsl.get('role', '건축 분석 전문가')}")
+    prompt_parts.append(f"# 분석 목표\n{dsl.goal}")
+    prompt_parts.append(f"# 역할\n{dsl.role if dsl.role is not None else '건축 분석 전문가'}")
     
-    if dsl.get('context'):
-        prompt_parts.append(f"# 맥락\n{dsl['context']}")
+    if dsl.context:
+        prompt_parts.append(f"# 맥락\n{dsl.context}")
     
     # 2. 분석 프레임워크
-    framework = dsl.get('analysis_framework', {})
+    framework = dsl.analysis_framework
     if framework:
-        framework_text = f"# 분석 프레임워크\n"
-        framework_text += f"접근 방식: {framework.get('approach', '')}\n"
-        framework_text += f"방법론: {framework.get('methodology', '')}\n"
+        framework_lines = [
+            f"# 분석 프레임워크",
+            f"접근 방식: {framework.approach}",
+            f"방법론: {framework.methodology}"
+        ]
         
-        criteria = framework.get('criteria', [])
-        if criteria:
-            framework_text += f"\n평가 기준:\n"
-            for i, criterion in enumerate(criteria, 1):
-                framework_text += f"{i}. {criterion}\n"
+        if framework.criteria:
+            framework_lines.append(f"\n평가 기준:")
+            for i, criterion in enumerate(framework.criteria, 1):
+                framework_lines.append(f"{i}. {criterion}")
         
-        prompt_parts.append(framework_text)
+        prompt_parts.append("\n".join(framework_lines) + "\n")
     
     # 3. 작업 목록
-    tasks = dsl.get('tasks', [])
-    if tasks:
-        tasks_text = f"# 📋 주요 분석 작업\n"
-        for i, task in enumerate(tasks, 1):
-            tasks_text += f"{i}. {task}\n"
-        prompt_parts.append(tasks_text)
+    if dsl.tasks:
+        tasks_lines = [f"# 📋 주요 분석 작업"]
+        for i, task in enumerate(dsl.tasks, 1):
+            tasks_lines.append(f"{i}. {task}")
+        prompt_parts.append("\n".join(tasks_lines) + "\n")
     
     # 4. 품질 기준 - 확장된 버전
-    quality = dsl.get('quality_standards', {})
+    quality = dsl.quality_standards
     if quality:
-        quality_text = f"# ⚠️ 품질 기준\n"
+        quality_lines = [f"# ⚠️ 품질 기준"]
         
-        constraints = quality.get('constraints', [])
-        if constraints:
-            quality_text += f"제약사항:\n"
-            for constraint in constraints:
-                quality_text += f"- {constraint}\n"
+        if quality.constraints:
+            quality_lines.append(f"제약사항:")
+            for constraint in quality.constraints:
+                quality_lines.append(f"- {constraint}")
         
-        required_phrases = quality.get('required_phrases', [])
-        if required_phrases:
-            quality_text += f"\n필수 포함 문구: {', '.join(required_phrases)}\n"
+        if quality.required_phrases:
+            quality_lines.append(f"\n필수 포함 문구: {', '.join(quality.required_phrases)}")
         
-        validation_rules = quality.get('validation_rules', [])
-        if validation_rules:
-            quality_text += f"\n검증 규칙:\n"
-            for rule in validation_rules:
-                quality_text += f"- {rule}\n"
+        if quality.validation_rules:
+            quality_lines.append(f"\n검증 규칙:")
+            for rule in quality.validation_rules:
+                quality_lines.append(f"- {rule}")
         
-        prompt_parts.append(quality_text)
+        prompt_parts.append("\n".join(quality_lines) + "\n")
     
     # 5. 출력 형식 - 대폭 확장된 버전
-    presentation = dsl.get('presentation', {})
+    presentation = dsl.presentation
     if presentation:
-        presentation_text = f"# 📋 출력 형식\n"
-        presentation_text += f"언어 톤: {presentation.get('language_tone', '')}\n"
-        presentation_text += f"형식: {presentation.get('target_format', '')}\n"
+        presentation_lines = [
+            f"# 📋 출력 형식",
+            f"언어 톤: {presentation.language_tone}",
+            f"형식: {presentation.target_format}"
+        ]
         
-        # 새로 추가된 explanatory_template 처리
-        explanatory_template = presentation.get('explanatory_template', '')
-        if explanatory_template:
-            presentation_text += f"해설 템플릿: {explanatory_template}\n"
+        if presentation.explanatory_template:
+            presentation_lines.append(f"해설 템플릿: {presentation.explanatory_template}")
         
-        visual_elements = presentation.get('visual_elements', [])
-        if visual_elements:
-            presentation_text += f"시각 요소: {', '.join(visual_elements)}\n"
+        if presentation.visual_elements:
+            presentation_lines.append(f"시각 요소: {', '.join(presentation.visual_elements)}")
         
-        # 새로 추가된 section_templates 처리 - 대폭 확장
-        section_templates = presentation.get('section_templates', {})
-        if section_templates:
-            presentation_text += f"\n## 📋 섹션별 상세 템플릿:\n"
-            for section_name, template in section_templates.items():
-                presentation_text += f"\n### {section_name}:\n"
+        # 섹션별 상세 템플릿
+        if presentation.section_templates:
+            presentation_lines.append(f"\n## 📋 섹션별 상세 템플릿:")
+            for template in presentation.section_templates:
+                presentation_lines.append(f"\n### {template.name}:")
                 
-                # table_title 처리
-                table_title = template.get('table_title', '')
-                if table_title:
-                    presentation_text += f"- **표 제목:** {table_title}\n"
+                if template.table_title:
+                    presentation_lines.append(f"- **표 제목:** {template.table_title}")
                 
-                # required_columns 처리 - 배열 형태로 확장
-                required_columns = template.get('required_columns', [])
-                if required_columns:
-                    presentation_text += f"- **필수 컬럼:**\n"
-                    for i, column in enumerate(required_columns, 1):
-                        if isinstance(column, str):
-                            presentation_text += f"  {i}. {column}\n"
-                        else:
-                            presentation_text += f"  {i}. {column}\n"
+                if template.required_columns:
+                    presentation_lines.append(f"- **필수 컬럼:**")
+                    for i, column in enumerate(template.required_columns, 1):
+                        presentation_lines.append(f"  {i}. {column}")
                 
-                # narrative_template 처리
-                narrative_template = template.get('narrative_template', '')
-                if narrative_template:
-                    presentation_text += f"- **해설 템플릿:** {narrative_template}\n"
+                if template.narrative_template:
+                    presentation_lines.append(f"- **해설 템플릿:** {template.narrative_template}")
                 
-                # diagram_title 처리 (새로 추가)
-                diagram_title = template.get('diagram_title', '')
-                if diagram_title:
-                    presentation_text += f"- **다이어그램 제목:** {diagram_title}\n"
+                if template.diagram_title:
+                    presentation_lines.append(f"- **다이어그램 제목:** {template.diagram_title}")
         
-        prompt_parts.append(presentation_text)
-    
-    # 6. 프로젝트 기본 정보
-    project_info = f"# 프로젝트 기본 정보\n"
-    project_info += f"- 프로젝트명: {user_inputs.get('project_name', 'N/A')}\n"
-    project_info += f"- 소유자: {user_inputs.get('owner', 'N/A')}\n"
-    project_info += f"- 위치: {user_inputs.get('site_location', 'N/A')}\n"
-    project_info += f"- 면적: {user_inputs.get('site_area', 'N/A')}\n"
-    project_info += f"- 건물유형: {user_inputs.get('building_type', 'N/A')}\n"
-    project_info += f"- 프로젝트 목표: {user_inputs.get('project_goal', 'N/A')}\n"
-    prompt_parts.append(project_info)
-    
-    # 7. 사이트 분석 정보
-    if site_fields:
-        site_text = f"# 사이트 분석 정보\n"
-        for key, value in site_fields.items():
-            if value and str(value).strip():
-                readable_key = key.replace('_', ' ').title()
-                site_text += f"- {readable_key}: {value}\n"
-        prompt_parts.append(site_text)
+        prompt_parts.append("\n".join(presentation_lines) + "\n")
     
+    return "\n\n".join(prompt_parts)
+
+
+def _compile_output_structure(block: PromptBlock) -> str:
+    """출력 구조 지시문 생성 (출력 구조가 없으면 빈 문자열)"""
     # 8. 출력 구조 - 강화된 버전
-    output_structure = dsl.get('output_structure', [])
-    if output_structure:
-        structure_text = f"# 📋 출력 구조\n"
-        structure_text += f"**중요: 이 블록({block_title})의 고유한 분석만 수행하세요.**\n\n"
-        structure_text += f"다음 구조로 분석 결과를 제공하세요. 각 구조는 반드시 지정된 형식으로 작성하세요:\n\n"
-        
-        for i, structure in enumerate(output_structure, 1):
-            structure_text += f"## {i}. {structure}\n"
-            structure_text += f"[{structure}에 해당하는 내용만 여기에 작성]\n\n"
-        
-        structure_text += f"⚠️ **중요 지시사항:**\n"
-        structure_text += f"1. 각 구조는 반드시 '## 번호. 구조명' 형식으로 시작하세요\n"
-        structure_text += f"2. 각 구조의 내용은 해당 구조에만 관련된 내용으로 작성하세요\n"
-        structure_text += f"3. 모든 구조를 빠짐없이 작성하되, 내용이 중복되지 않도록 하세요\n"
-        structure_text += f"4. 구조 간 구분을 명확히 하세요\n"
-        structure_text += f"5. 각 구조는 독립적으로 완성된 내용이어야 합니다\n"
-        structure_text += f"6. **이 블록의 고유한 분석만 수행하고, 다른 블록의 내용을 포함하지 마세요**\n\n"
-        
-        prompt_parts.append(structure_text)
+    output_structure = block.output_structure
+    if not output_structure:
+        return ""
+    
+    structure_lines = [
+        f"# 📋 출력 구조",
+        f"**중요: 이 블록({block.title})의 고유한 분석만 수행하세요.**\n",
+        f"다음 구조로 분석 결과를 제공하세요. 각 구조는 반드시 지정된 형식으로 작성하세요:\n"
+    ]
+    
+    for i, structure in enumerate(output_structure, 1):
+        structure_lines.append(f"## {i}. {structure}")
+        structure_lines.append(f"[{structure}에 해당하는 내용만 여기에 작성]\n")
+    
+    structure_lines += [
+        f"⚠️ **중요 지시사항:**",
+        f"1. 각 구조는 반드시 '## 번호. 구조명' 형식으로 시작하세요",
+        f"2. 각 구조의 내용은 해당 구조에만 관련된 내용으로 작성하세요",
+        f"3. 모든 구조를 빠짐없이 작성하되, 내용이 중복되지 않도록 하세요",
+        f"4. 구조 간 구분을 명확히 하세요",
+        f"5. 각 구조는 독립적으로 완성된 내용이어야 합니다",
+        f"6. **이 블록의 고유한 분석만 수행하고, 다른 블록의 내용을 포함하지 마세요**\n\n"
+    ]
+    return "\n".join(structure_lines)
+
+
+def resolve_block_model(dsl_block) -> PromptBlock:
+    """
+    PromptBlock 반환 - 레지스트리가 로드한 블록 dict는 로드 시점에 검증된 모델을 그대로 사용하고,
+    그 밖에서 만든 dict만 새로 검증
+    """
+    if isinstance(dsl_block, PromptBlock):
+        return dsl_block
+    from prompt_loader import get_prompt_block_registry
+    registry = get_prompt_block_registry()
+    block_id = dsl_block.get("id", "")
+    if registry.get_block(block_id) is dsl_block:
+        model = registry.get_block_model(block_id)
+        if model is not None:
+            return model
+    return as_block_model(dsl_block)
+
+
+def compile_dsl_block(dsl_block, compact: bool = False) -> CompiledPromptTemplate:
+    """
+    DSL 블록을 정적/동적 구간으로 나뉜 템플릿으로 컴파일
+    
+    Args:
+        dsl_block: PromptBlock 또는 블록 dict (resolve_block_model로 변환)
+        compact: True이면 정적 구간에 프롬프트 압축(prompt_compactor) 적용
+    """
+    block = resolve_block_model(dsl_block)
+    head_text = _compile_static_head(block)
+    structure_text = _compile_output_structure(block)
+    if compact:
+        head_text = compact_prompt(head_text)
+        structure_text = compact_prompt(structure_text) if structure_text else ""
+    head = ("static", head_text)
+    structure = [("static", structure_text)] if structure_text else []
+    
+    segments = [head, ("slot", "project_info"), ("slot", "site_fields")] + structure + [
+        ("slot", "previous_results"),
+        ("slot", "pdf_summary"),
+        ("slot", "web_results"),
+    ]
     
-    # 9. 이전 분석 결과
-    if previous_summary:
-        prompt_parts.append(f"# 📚 이전 분석 결과\n{previous_summary}\n")
+    # 캐싱용 배치: 프로젝트/사이트 → PDF 요약은 모든 단계에서 같으므로 맨 앞에 두고,
+    # 블록 DSL은 그 뒤에 두어 단계가 바뀌어도 앞 구간의 캐시를 재사용
+    context_segments = [
+        ("slot", "project_info"),
+        ("slot", "site_fields"),
+        ("slot", "pdf_summary"),
+    ]
+    prefix_segments = [head] + structure
+    suffix_segments = [
+        ("slot", "previous_results"),
+        ("slot", "web_results"),
+    ]
+    return CompiledPromptTemplate(
+        block.id, block.title, segments,
+        context_segments, prefix_segments, suffix_segments
+    )
+
+
+# (블록 ID, 압축 여부) → (컴파일에 사용한 블록 객체, 템플릿)
+# 레지스트리가 파일을 다시 읽으면 블록 객체가 바뀌므로 자동으로 재컴파일됨
+_compiled_templates = {}
+
+
+def _block_id(dsl_block) -> str:
+    """PromptBlock 또는 블록 dict의 ID"""
+    if isinstance(dsl_block, PromptBlock):
+        return dsl_block.id
+    return dsl_block.get("id", "")
+
+
+def get_compiled_template(dsl_block, compact: bool = False) -> CompiledPromptTemplate:
+    """캐시된 템플릿 반환 - 같은 블록 객체(PromptBlock 또는 dict)에 대해서는 한 번만 컴파일"""
+    cache_key = (_block_id(dsl_block), compact)
+    cached = _compiled_templates.get(cache_key)
+    if cached is not None and cached[0] is dsl_block:
+        return cached[1]
     
-    # 10. PDF 요약
-    if pdf_summary:
-        prompt_parts.append(f"# 📄 PDF 문서 요약\n{pdf_summary}\n")
+    template = compile_dsl_block(dsl_block, compact)
+    _compiled_templates[cache_key] = (dsl_block, template)
+    return template
+
+
+def render_project_info(user_inputs: dict) -> str:
+    """6. 프로젝트 기본 정보"""
+    return (
+        f"# 프로젝트 기본 정보\n"
+        f"- 프로젝트명: {user_inputs.get('project_name', 'N/A')}\n"
+        f"- 소유자: {user_inputs.get('owner', 'N/A')}\n"
+        f"- 위치: {user_inputs.get('site_location', 'N/A')}\n"
+        f"- 면적: {user_inputs.get('site_area', 'N/A')}\n"
+        f"- 건물유형: {user_inputs.get('building_type', 'N/A')}\n"
+        f"- 프로젝트 목표: {user_inputs.get('project_goal', 'N/A')}\n"
+    )
+
+
+def render_site_fields(site_fields: dict) -> str:
+    """7. 사이트 분석 정보"""
+    if not site_fields:
+        return ""
+    site_lines = [f"# 사이트 분석 정보\n"]
+    for key, value in site_fields.items():
+        if value and str(value).strip():
+            readable_key = key.replace('_', ' ').title()
+            site_lines.append(f"- {readable_key}: {value}\n")
+    return "".join(site_lines)
+
+
+def _build_slot_values(
+    dsl_block,
+    user_inputs: dict,
+    previous_summary: str,
+    pdf_summary,
+    site_fields: dict,
+    include_web_search: bool,
+    enrich_web_search: bool = False
+) -> dict:
+    """호출마다 달라지는 동적 슬롯 값 생성"""
+    slot_values = {
+        "project_info": render_project_info(user_inputs),
+        "site_fields": render_site_fields(site_fields),
+        # 9. 이전 분석 결과
+        "previous_results": f"# 📚 이전 분석 결과\n{previous_summary}\n" if previous_summary else "",
+        # 10. PDF 요약
+        "pdf_summary": f"# 📄 PDF 문서 요약\n{pdf_summary}\n" if pdf_summary else "",
+        "web_results": ""
+    }
     
     # 11. 웹 검색 결과
     if include_web_search:
-        web_search_results = get_web_search_for_block(dsl_block.get("id", ""), user_inputs)
+        web_search_results = get_web_search_for_block(_block_id(dsl_block), user_inputs, enrich=enrich_web_search)
         if web_search_results:
-            web_search_text = f"# 🌐 최신 웹 검색 결과\n{web_search_results}\n"
-            prompt_parts.append(web_search_text)
+            slot_values["web_results"] = f"# 🌐 최신 웹 검색 결과\n{web_search_results}\n"
     
-    return "\n\n".join(prompt_parts)
+    return slot_values
+
+
+def convert_dsl_to_prompt(
+    dsl_block,
+    user_inputs: dict,
+    previous_summary: str = "",
+    pdf_summary: dict = None,
+    site_fields: dict = None,
+    include_web_search: bool = True,
+    return_breakdown: bool = False,
+    compact: bool = False,
+    enrich_web_search: bool = False
+):
+    """
+    완전히 개선된 DSL을 프롬프트로 변환 (컴파일된 템플릿의 동적 슬롯만 채움)
+    
+    Args:
+        dsl_block: PromptBlock 또는 블록 dict
+        return_breakdown: True이면 (프롬프트, 섹션별 추정 토큰 dict) 반환
+        compact: True이면 반복 지시문·자리표시 줄을 줄인 압축 템플릿 사용
+        enrich_web_search: True이면 웹 검색 결과 페이지 본문 요약 포함
+    
+    Returns:
+        str 또는 tuple: 프롬프트 (return_breakdown=True이면 (프롬프트, breakdown))
+    """
+    
+    template = get_compiled_template(dsl_block, compact)
+    slot_values = _build_slot_values(
+        dsl_block, user_inputs, previous_summary, pdf_summary, site_fields, include_web_search, enrich_web_search
+    )
+    prompt = template.render(slot_values)
+    if return_breakdown:
+        breakdown = template.breakdown(slot_values)
+        breakdown["total"] = estimate_tokens(prompt)
+        return prompt, breakdown
+    return prompt
+
+
+def get_core_principles() -> str:
+    """모든 분석 앞에 놓이는 핵심 원칙 블럭 내용"""
+    from prompt_loader import get_prompt_block_registry, CORE_PRINCIPLES_BLOCK
+    core = get_prompt_block_registry().get_blocks()["core"]
+    if core and core[0].get("content"):
+        return core[0]["content"]
+    return CORE_PRINCIPLES_BLOCK["content"]
+
+
+def convert_dsl_to_cacheable_prompt(
+    dsl_block,
+    user_inputs: dict,
+    previous_summary: str = "",
+    pdf_summary: dict = None,
+    site_fields: dict = None,
+    include_web_search: bool = True,
+    return_breakdown: bool = False,
+    compact: bool = False,
+    enrich_web_search: bool = False
+) -> tuple:
+    """
+    프롬프트 캐싱용 배치로 변환
+    
+    Args:
+        dsl_block: PromptBlock 또는 블록 dict
+        return_breakdown: True이면 섹션별 추정 토큰 dict를 세 번째 값으로 함께 반환
+            (핵심 원칙은 core_principles 항목으로 별도 집계)
+        compact: True이면 핵심 원칙과 압축 템플릿 사용
+        enrich_web_search: True이면 웹 검색 결과 페이지 본문 요약 포함
+    
+    Returns:
+        tuple: (cache_prefix, suffix) 또는 (cache_prefix, suffix, breakdown)
+            - cache_prefix: CachePrefix - 캐시 지점 2개
+                1) 핵심 원칙 + 프로젝트·사이트 정보 + PDF 요약 (한 프로젝트의 모든 단계에서 고정)
+                2) 블록 DSL (같은 블록에서 고정)
+            - suffix: 이전 분석 결과 + 웹 검색 결과 (단계마다 변함)
+    """
+    template = get_compiled_template(dsl_block, compact)
+    slot_values = _build_slot_values(
+        dsl_block, user_inputs, previous_summary, pdf_summary, site_fields, include_web_search, enrich_web_search
+    )
+    core_principles = get_core_principles()
+    if compact:
+        core_principles = compact_prompt(core_principles)
+    context, block_prefix, suffix = template.render_cacheable(slot_values)
+    cache_prefix = CachePrefix([f"{core_principles}\n\n{context}" if context else core_principles, block_prefix])
+    if return_breakdown:
+        breakdown = {"core_principles": estimate_tokens(core_principles), **template.breakdown(slot_values)}
+        breakdown["total"] = estimate_tokens(cache_prefix) + estimate_tokens(suffix)
+        return cache_prefix, suffix, breakdown
+    return cache_prefix, suffix
 
 # 단계별 특화된 프롬프트 함수들 - 확장된 버전
 def prompt_requirement_table(dsl_block, user_inputs, previous_summary="", pdf_summary=None, site_fields=None):
@@ -236,7 +488,7 @@ def prompt_requirement_table(dsl_block, user_inputs, previous_summary="", pdf_su
 
 def prompt_ai_reasoning(dsl_block, user_inputs, previous_summary="", pdf_summary=None, site_fields=None):
     base = convert_dsl_to_prompt(dsl_block, user_inputs, previous_summary, pdf_summary, site_fields)
-    output_structure = dsl_block.get("content_dsl", {}).get("output_structure", [])
+    output_structure = resolve_block_model(dsl_block).output_structure
     
     if output_structure and len(output_structure) >= 2:
         target = output_structure[1]  # 두 번째 출력 구조
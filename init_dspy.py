@@ -4,11 +4,17 @@ import dspy
 import os
 import time
 import random
+import threading
 from dotenv import load_dotenv
 # 순환 import 방지를 위해 제거
 # from agent_executor import RequirementTableSignature 
 import anthropic
 from anthropic import Anthropic
+from prompt_caching import build_message_content, extract_usage, cache_usage_stats
+from llm_gateway import get_llm_gateway, PRIORITY_INTERACTIVE, PRIORITY_NORMAL
+from utils import estimate_tokens
+from persistent_cache import PersistentCache, make_cache_key
+from model_router import route_model
 
 load_dotenv()
 
@@ -21,9 +27,83 @@ if not anthropic_api_key:
 # Anthropic SDK 클라이언트 추가
 anthropic_client = Anthropic(api_key=anthropic_api_key)
 
+# SDK 호출 설정 (temperature None = API 기본값)
+SDK_MAX_TOKENS = 8000
+SDK_TEMPERATURE = None
+
+# 모델별 최대 출력 토큰 (없는 모델은 요청값 그대로)
+MODEL_MAX_OUTPUT_TOKENS = {
+    "claude-3-opus-20240229": 4096,
+    "claude-3-sonnet-20240229": 4096,
+    "claude-3-haiku-20240307": 4096,
+}
+
+def max_output_tokens(model: str, requested: int = SDK_MAX_TOKENS) -> int:
+    """요청한 최대 출력 토큰을 모델 한도 이내로 제한"""
+    return min(requested, MODEL_MAX_OUTPUT_TOKENS.get(model, requested))
+
+# 응답 캐시 (같은 모델·프롬프트·설정의 재실행은 API 호출 없이 저장된 응답 사용)
+LLM_RESPONSE_CACHE = os.environ.get("LLM_RESPONSE_CACHE", "1") != "0"
+LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", 30 * 24 * 3600))
+LLM_CACHE_MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache() -> PersistentCache:
+    """LLM 응답 캐시 (완전 일치 키, 용량 초과 시 오래된 응답부터 삭제)"""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = PersistentCache(
+                "llm_responses", ttl_seconds=LLM_CACHE_TTL,
+                stale_retention_seconds=0, max_bytes=LLM_CACHE_MAX_BYTES
+            )
+        return _response_cache
+
+def response_cache_key(model: str, prompt: str, cache_prefix: str = None,
+                       max_tokens: int = SDK_MAX_TOKENS, temperature=SDK_TEMPERATURE) -> str:
+    """응답 캐시 키 - 모델, 전체 프롬프트(접두부 포함), max_tokens, temperature의 해시"""
+    full_prompt = f"{cache_prefix}\n\n{prompt}" if cache_prefix else prompt
+    return make_cache_key("anthropic", model, full_prompt, max_output_tokens(model, max_tokens), temperature)
+
+def _get_cached_response(cache_key: str, use_cache: bool):
+    if not (use_cache and LLM_RESPONSE_CACHE):
+        return None
+    cached = get_response_cache().get(cache_key)
+    if cached is None:
+        return None
+    print(f"💾 응답 캐시 사용 ({cached.age_seconds / 60:.0f}분 전 응답)")
+    return cached.value
+
+def _store_response(cache_key: str, text: str):
+    # 캐시를 쓰지 않은 호출(다시 생성)의 응답도 저장하여 다음 재실행에 사용
+    if LLM_RESPONSE_CACHE and text:
+        get_response_cache().set(cache_key, text)
+
+def _message_params(model: str, prompt: str, cache_prefix: str = None) -> dict:
+    """messages.create / messages.stream 공통 인자 (응답 캐시 키와 같은 설정)"""
+    params = {
+        "model": model,
+        "max_tokens": max_output_tokens(model),
+        "messages": [{"role": "user", "content": build_message_content(prompt, cache_prefix)}],
+    }
+    if SDK_TEMPERATURE is not None:
+        params["temperature"] = SDK_TEMPERATURE
+    return params
+
+class GatewayLM(dspy.LM):
+    """LLM 게이트웨이를 거쳐 호출하는 DSPy LM (모델별 동시 실행 수·토큰 예산 공유)"""
+    
+    def __call__(self, prompt=None, messages=None, **kwargs):
+        texts = [prompt or ""] + [str(message.get("content", "")) for message in messages or []]
+        with get_llm_gateway().slot(self.model, sum(estimate_tokens(text) for text in texts), PRIORITY_NORMAL):
+            return super().__call__(prompt=prompt, messages=messages, **kwargs)
+
+
 if not getattr(dspy.settings, "lm", None):
     try:
-        lm = dspy.LM(
+        lm = GatewayLM(
             "claude-3-5-sonnet-20241022",  # 올바른 모델명
             provider="anthropic",
             api_key=anthropic_api_key,
@@ -55,19 +135,20 @@ def get_available_models_sdk():
         print(f"⚠️ SDK 모델 목록 조회 실패: {e}")
         return available_models  # 폴백
 
-def execute_with_sdk_with_retry(prompt: str, model: str = None, max_retries: int = 3):
-    """Anthropic SDK로 직접 실행 - 재시도 로직 포함"""
-    if model is None:
-        model = "claude-3-5-sonnet-20241022"
+def _call_with_retry(call, max_retries: int = 3) -> str:
+    """
+    SDK 호출 재시도 (Rate limit·과부하·일반 오류 시 지수 백오프)
+    
+    Args:
+        call: 응답 텍스트를 반환하는 함수 (시도마다 다시 호출)
+        max_retries: 최대 시도 횟수
     
+    Returns:
+        str: 응답 텍스트 또는 "❌ ..." 오류 메시지
+    """
     for attempt in range(max_retries):
         try:
-            response = anthropic_client.messages.create(
-                model=model,
-                max_tokens=8000,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            return response.content[0].text
+            return call()
             
         except anthropic.RateLimitError:
             wait_time = (2 ** attempt) + random.uniform(0, 1)  # 지수 백오프
@@ -91,66 +172,154 @@ def execute_with_sdk_with_retry(prompt: str, model: str = None, max_retries: int
     
     return "❌ 최대 재시도 횟수 초과. 잠시 후 다시 시도해주세요."
 
+def _record_usage(message, cache_prefix: str = None, slot=None):
+    usage = extract_usage(message)
+    cache_usage_stats.record(usage)
+    if slot is not None:
+        # 캐시 읽기 토큰은 분당 입력 토큰 한도에 포함되지 않음
+        slot.record_usage(usage['input_tokens'] + usage['cache_creation_input_tokens'])
+    if cache_prefix:
+        print(f"📦 프롬프트 캐시: 읽기 {usage['cache_read_input_tokens']} / 생성 {usage['cache_creation_input_tokens']} / 일반 입력 {usage['input_tokens']} 토큰")
+
+def execute_with_sdk_with_retry(prompt: str, model: str = None, max_retries: int = 3, cache_prefix: str = None,
+                                priority: int = PRIORITY_INTERACTIVE, use_cache: bool = True):
+    """
+    Anthropic SDK로 직접 실행 - 재시도 로직 포함
+    
+    cache_prefix가 주어지면 고정 접두부에 cache_control을 지정하여 프롬프트 캐싱을 사용합니다.
+    이때 prompt는 접두부 뒤에 붙는 가변 부분입니다.
+    호출은 LLM 게이트웨이에서 priority 순서로 실행 순서를 배정받습니다.
+    use_cache=True이면 같은 모델·프롬프트의 저장된 응답을 API 호출 없이 반환합니다.
+    """
+    if model is None:
+        model = "claude-3-5-sonnet-20241022"
+    cache_key = response_cache_key(model, prompt, cache_prefix)
+    cached = _get_cached_response(cache_key, use_cache)
+    if cached is not None:
+        return cached
+    estimated_tokens = estimate_tokens(prompt) + estimate_tokens(cache_prefix or "")
+    
+    def call():
+        with get_llm_gateway().slot(model, estimated_tokens, priority) as slot:
+            response = anthropic_client.messages.create(**_message_params(model, prompt, cache_prefix))
+            _record_usage(response, cache_prefix, slot)
+        text = response.content[0].text
+        _store_response(cache_key, text)
+        return text
+    
+    return _call_with_retry(call, max_retries)
+
+def execute_with_sdk_streaming(prompt: str, model: str = None, max_retries: int = 3,
+                               cache_prefix: str = None, on_text=None, priority: int = PRIORITY_INTERACTIVE,
+                               use_cache: bool = True):
+    """
+    Anthropic SDK 스트리밍 실행 - 생성되는 대로 on_text로 전달하고 완성된 전체 텍스트 반환
+    
+    Args:
+        prompt: 프롬프트 (cache_prefix가 있으면 접두부 뒤의 가변 부분)
+        model: 모델명
+        max_retries: 최대 시도 횟수 (도중에 실패하면 처음부터 다시 생성)
+        cache_prefix: 프롬프트 캐싱용 고정 접두부
+        on_text: 지금까지 누적된 텍스트를 받는 콜백 (재시도 시 빈 문자열부터 다시 호출)
+        priority: LLM 게이트웨이 우선순위
+        use_cache: 저장된 응답 사용 여부 (적중 시 on_text로 전체 응답을 한 번 전달)
+    
+    Returns:
+        str: 전체 응답 텍스트 또는 "❌ ..." 오류 메시지
+    """
+    if model is None:
+        model = "claude-3-5-sonnet-20241022"
+    
+    cache_key = response_cache_key(model, prompt, cache_prefix)
+    cached = _get_cached_response(cache_key, use_cache)
+    if cached is not None:
+        if on_text:
+            on_text(cached)
+        return cached
+    
+    estimated_tokens = estimate_tokens(prompt) + estimate_tokens(cache_prefix or "")
+    
+    def call():
+        started = time.perf_counter()
+        first_token_at = None
+        text = ""
+        with get_llm_gateway().slot(model, estimated_tokens, priority) as slot:
+            with anthropic_client.messages.stream(**_message_params(model, prompt, cache_prefix)) as stream:
+                for delta in stream.text_stream:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter() - started
+                    text += delta
+                    if on_text:
+                        on_text(text)
+                final_message = stream.get_final_message()
+            _record_usage(final_message, cache_prefix, slot)
+        
+        _store_response(cache_key, text)
+        if first_token_at is not None:
+            print(f"⏱️ 첫 토큰 {first_token_at:.2f}초 / 전체 {time.perf_counter() - started:.2f}초")
+        return text
+    
+    return _call_with_retry(call, max_retries)
+
 def execute_with_sdk(prompt: str, model: str = None):
     """Anthropic SDK로 직접 실행 - 기존 함수 호환성 유지"""
     return execute_with_sdk_with_retry(prompt, model, max_retries=3)
 
 def get_optimal_model(task_type: str) -> str:
-    """작업 유형에 따른 최적 모델 선택"""
-    model_mapping = {
-        "quick_analysis": "claude-3-5-haiku-20241022",  # 빠른 분석
-        "detailed_analysis": "claude-3-5-sonnet-20241022",  # 상세 분석
-        "complex_analysis": "claude-3-opus-20240229",  # 복잡한 분석
-        "cost_sensitive": "claude-3-haiku-20240307"  # 비용 민감
-    }
-    return model_mapping.get(task_type, "claude-3-5-sonnet-20241022")
+    """작업 유형에 따른 최적 모델 선택 (model_router 정책 사용)"""
+    return route_model(task_type).model
 
-def configure_model(model_name: str):
-    """모델 동적 변경 - 스레드 안전 버전"""
-    if model_name not in available_models:
-        raise ValueError(f"지원하지 않는 모델: {model_name}")
+_lm_handles = {}
+_lm_handles_lock = threading.Lock()
+
+def get_lm(model_name: str, max_tokens: int = 8000) -> "GatewayLM":
+    """
+    모델별 DSPy LM 핸들 (프로세스 전체 재사용)
     
-    try:
-        # 기존 설정 제거
-        if hasattr(dspy.settings, "lm"):
-            delattr(dspy.settings, "lm")
-        
-        # 새 모델 설정
-        lm = dspy.LM(
-            model_name,
-            provider="anthropic",
-            api_key=anthropic_api_key,
-            max_tokens=8000
-        )
-        dspy.configure(lm=lm, track_usage=True)
-        print(f"✅ 모델이 {model_name}로 변경되었습니다.")
-    except Exception as e:
-        print(f"❌ 모델 변경 실패: {e}")
-        # 기본 모델로 복구
-        try:
-            lm = dspy.LM(
-                "claude-3-5-sonnet-20241022",
+    전역 설정을 바꾸지 않고 호출 단위로 모델을 지정할 때 사용합니다:
+        with dspy.context(lm=get_lm(model)):
+            result = dspy.Predict(...)(...)
+    """
+    key = (model_name, max_output_tokens(model_name, max_tokens))
+    with _lm_handles_lock:
+        lm = _lm_handles.get(key)
+        if lm is None:
+            lm = _lm_handles[key] = GatewayLM(
+                model_name,
                 provider="anthropic",
                 api_key=anthropic_api_key,
-                max_tokens=5000
+                max_tokens=key[1]
             )
-            dspy.configure(lm=lm, track_usage=True)
-        except:
-            pass
-        raise
+        return lm
 
-def run_analysis_with_optimal_model(task_type: str, prompt: str, signature_class=None):
-    """작업 유형에 따른 최적 모델로 분석 실행"""
-    optimal_model = get_optimal_model(task_type)
+def configure_model(model_name: str) -> "GatewayLM":
+    """
+    모델 LM 핸들 반환 - 전역 dspy.settings.lm은 바꾸지 않음
+    
+    전역 LM을 교체하면 동시에 실행 중인 다른 세션의 호출까지 모델이 바뀌고,
+    DSPy는 처음 설정한 스레드 밖에서의 dspy.configure를 허용하지 않습니다.
+    호출 단위로 모델을 지정하세요:
+        with dspy.context(lm=configure_model(model_name)):
+            result = dspy.Predict(...)(...)
     
-    # 모델 변경
-    configure_model(optimal_model)
+    Raises:
+        ValueError: 지원하지 않는 모델
+    """
+    if model_name not in available_models:
+        raise ValueError(f"지원하지 않는 모델: {model_name}")
+    return get_lm(model_name)
+
+def run_analysis_with_optimal_model(task_type: str, prompt: str, signature_class=None):
+    """작업 유형에 따른 최적 모델로 분석 실행 (전역 모델 설정은 바꾸지 않고 이 호출에만 적용)"""
+    decision = route_model(task_type, estimate_tokens(prompt))
     
     # 분석 실행 (기본값 또는 지정된 Signature 사용)
     if signature_class is None:
+        from agent_executor import RequirementTableSignature  # 순환 import 방지를 위해 지연 import
         signature_class = RequirementTableSignature  # 기본값
     
-    result = dspy.Predict(signature_class)(input=prompt)
+    with dspy.context(lm=get_lm(decision.model)):
+        result = dspy.Predict(signature_class)(input=prompt)
     return result
 
 # 모델 정보 제공 함수
@@ -0,0 +1,310 @@
+# llm_gateway.py
+
+"""
+프로세스 전체 LLM 호출 게이트웨이
+- 모든 LLM 호출(Anthropic SDK, DSPy)이 실행 전 여기서 실행 순서를 배정받음
+- 모델별 동시 실행 수 제한, 분당 입력 토큰 예산(토큰 버킷), 우선순위 대기열
+- 429(Rate limit) 응답을 받으면 모든 호출을 잠시 멈춰 요청이 한꺼번에 다시 몰리지 않게 함
+
+배정(스케줄링)은 별도 스레드의 asyncio 이벤트 루프에서 처리하고, 실제 호출은 호출한 스레드에서 실행합니다.
+(Streamlit 화면 갱신과 DSPy 설정은 스레드별이므로 호출 스레드를 바꾸지 않음)
+
+사용법:
+    with get_llm_gateway().slot(model, estimated_tokens, priority=PRIORITY_INTERACTIVE) as slot:
+        response = client.messages.create(...)
+        slot.record_usage(input_tokens)
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# 우선순위 (작을수록 먼저)
+PRIORITY_INTERACTIVE = 0   # 사용자가 화면에서 기다리는 분석
+PRIORITY_NORMAL = 5        # PDF 요약 등 일반 작업
+
+# 모델 계열별 동시 실행 수 (모델명에 포함된 계열 이름으로 판단)
+MODEL_CONCURRENCY = {"opus": 2, "sonnet": 4, "haiku": 8}
+DEFAULT_MODEL_CONCURRENCY = 4
+
+# 분당 입력 토큰 예산 (프로세스 전체 공유)
+LLM_TOKENS_PER_MINUTE = int(os.environ.get("LLM_TOKENS_PER_MINUTE", 80000))
+
+# 실행 순서를 기다리는 최대 시간 (초)
+LLM_QUEUE_TIMEOUT = float(os.environ.get("LLM_QUEUE_TIMEOUT", 300))
+
+# 429 응답에 retry-after가 없을 때 전체 호출을 멈추는 시간 (초)
+RATE_LIMIT_COOLDOWN = 5.0
+
+
+class GatewayTimeout(TimeoutError):
+    """대기열에서 LLM_QUEUE_TIMEOUT 안에 실행 순서를 받지 못함"""
+
+
+def get_model_concurrency(model: str) -> int:
+    """모델명으로 동시 실행 수 결정"""
+    name = (model or "").lower()
+    for family, limit in MODEL_CONCURRENCY.items():
+        if family in name:
+            return limit
+    return DEFAULT_MODEL_CONCURRENCY
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """SDK/LiteLLM 공통 429 판별 (특정 라이브러리 예외 클래스에 의존하지 않음)"""
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def _retry_after_seconds(error: BaseException) -> float:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return RATE_LIMIT_COOLDOWN
+
+
+class _Waiter:
+    __slots__ = ("priority", "sequence", "tokens", "future", "enqueued_at")
+
+    def __init__(self, priority: int, sequence: int, tokens: int, future: asyncio.Future):
+        self.priority = priority
+        self.sequence = sequence
+        self.tokens = tokens
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+
+class _ModelLane:
+    """모델별 실행 중 수 + 우선순위 대기열 (이벤트 루프 스레드에서만 접근)"""
+
+    def __init__(self, model: str, limit: int):
+        self.model = model
+        self.limit = limit
+        self.active = 0
+        self.waiters: List[_Waiter] = []
+        self.granted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+
+class GatewaySlot:
+    """배정받은 실행 순서 - 반드시 release (with 문 사용 권장)"""
+
+    def __init__(self, gateway: "LLMGateway", model: str, tokens: int, waited: float):
+        self.gateway = gateway
+        self.model = model
+        self.tokens = tokens
+        self.waited = waited
+        self.actual_tokens: Optional[int] = None
+        self._released = False
+
+    def record_usage(self, input_tokens: int):
+        """실제 입력 토큰 수 기록 (추정치와의 차이만큼 예산 보정)"""
+        self.actual_tokens = input_tokens
+
+    def release(self, error: Optional[BaseException] = None):
+        if self._released:
+            return
+        self._released = True
+        delta = (self.actual_tokens - self.tokens) if self.actual_tokens is not None else 0
+        cooldown = _retry_after_seconds(error) if error is not None and is_rate_limit_error(error) else 0.0
+        self.gateway._call_in_loop(self.gateway._release, self.model, delta, cooldown)
+
+    def __enter__(self) -> "GatewaySlot":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release(exc)
+        return False
+
+
+class LLMGateway:
+    """
+    LLM 호출 배정기
+
+    Args:
+        tokens_per_minute: 분당 입력 토큰 예산 (토큰 버킷 용량, 초당 1/60씩 채워짐)
+        queue_timeout: 실행 순서 최대 대기 시간 (초)
+    """
+
+    def __init__(self, tokens_per_minute: int = LLM_TOKENS_PER_MINUTE, queue_timeout: float = LLM_QUEUE_TIMEOUT):
+        self.capacity = max(1, tokens_per_minute)
+        self.queue_timeout = queue_timeout
+        self._tokens = float(self.capacity)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._rate_limited = 0
+        self._lanes: Dict[str, _ModelLane] = {}
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-gateway", daemon=True)
+        self._thread.start()
+
+    # --- 호출 스레드에서 사용 ---
+
+    def slot(self, model: str, estimated_tokens: int, priority: int = PRIORITY_NORMAL,
+             timeout: Optional[float] = None) -> GatewaySlot:
+        """
+        실행 순서 대기 (호출 스레드를 막음)
+
+        Args:
+            model: 모델명 (동시 실행 수 구분)
+            estimated_tokens: 추정 입력 토큰 수 (예산 차감)
+            priority: PRIORITY_* (작을수록 먼저)
+            timeout: 최대 대기 시간 (None이면 queue_timeout)
+
+        Returns:
+            GatewaySlot: with 문으로 사용 (블록을 벗어나면 반납)
+
+        Raises:
+            GatewayTimeout: 대기 시간 초과
+        """
+        tokens = min(max(1, int(estimated_tokens)), self.capacity)
+        timeout = self.queue_timeout if timeout is None else timeout
+        # 시간 초과 판단은 이벤트 루프 안에서 하므로 배정과 취소가 엇갈려 실행 슬롯이 새지 않음
+        future = asyncio.run_coroutine_threadsafe(self._acquire(model, tokens, priority, timeout), self._loop)
+        waited = future.result()
+        return GatewaySlot(self, model, tokens, waited)
+
+    def stats(self) -> Dict[str, Any]:
+        """모델별 실행 중/대기 수, 남은 토큰 예산, 평균·최대 대기 시간"""
+        return self._call_in_loop(self._stats, wait=True)
+
+    def _call_in_loop(self, fn, *args, wait: bool = False):
+        if not wait:
+            self._loop.call_soon_threadsafe(fn, *args)
+            return None
+
+        async def run():
+            return fn(*args)
+        return asyncio.run_coroutine_threadsafe(run(), self._loop).result()
+
+    # --- 이벤트 루프 스레드 ---
+
+    def _lane(self, model: str) -> _ModelLane:
+        lane = self._lanes.get(model)
+        if lane is None:
+            lane = self._lanes[model] = _ModelLane(model, get_model_concurrency(model))
+        return lane
+
+    async def _acquire(self, model: str, tokens: int, priority: int, timeout: Optional[float]) -> float:
+        lane = self._lane(model)
+        waiter = _Waiter(priority, next(self._sequence), tokens, self._loop.create_future())
+        heapq.heappush(lane.waiters, waiter)
+        self._dispatch()
+        try:
+            # shield: 시간 초과 시 waiter.future는 그대로 두고 아래에서 배정 여부를 확인
+            return await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except asyncio.TimeoutError:
+            # 이벤트 루프 안이므로 확인과 취소 사이에 _dispatch가 끼어들지 않음
+            if waiter.future.done():
+                return waiter.future.result()
+            waiter.future.cancel()
+            raise GatewayTimeout(f"LLM 호출 대기 시간 초과 ({model})") from None
+        except asyncio.CancelledError:
+            # 이벤트 루프 종료 등으로 취소되었는데 그 사이 배정되었다면 슬롯과 토큰을 즉시 반납
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release(model, -tokens, 0.0)
+            else:
+                waiter.future.cancel()
+            raise
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._refilled_at) * self.capacity / 60)
+        self._refilled_at = now
+
+    def _dispatch(self):
+        """실행 가능한 대기 호출 배정 - 모델 간에는 우선순위가 높은 대기 호출부터 토큰 예산 사용"""
+        self._refill()
+        now = time.monotonic()
+        retry_in = None
+        if now < self._paused_until:
+            retry_in = self._paused_until - now
+        else:
+            while True:
+                candidates = []
+                for lane in self._lanes.values():
+                    while lane.waiters and lane.waiters[0].future.done():
+                        heapq.heappop(lane.waiters)   # 취소된 대기 호출
+                    if lane.waiters and lane.active < lane.limit:
+                        candidates.append((lane.waiters[0], lane))
+                if not candidates:
+                    break
+                waiter, lane = min(candidates, key=lambda candidate: candidate[0])
+                if waiter.tokens > self._tokens:
+                    # 예산이 찰 때까지 대기 (우선순위 역전을 막기 위해 뒤 호출도 함께 대기)
+                    retry_in = (waiter.tokens - self._tokens) * 60 / self.capacity
+                    break
+                heapq.heappop(lane.waiters)
+                self._tokens -= waiter.tokens
+                lane.active += 1
+                waited = now - waiter.enqueued_at
+                lane.granted += 1
+                lane.total_wait += waited
+                lane.max_wait = max(lane.max_wait, waited)
+                waiter.future.set_result(waited)
+
+        if retry_in is not None and self._wakeup is None:
+            self._wakeup = self._loop.call_later(max(retry_in, 0.01), self._wake)
+
+    def _wake(self):
+        self._wakeup = None
+        self._dispatch()
+
+    def _release(self, model: str, token_delta: int, cooldown: float):
+        lane = self._lane(model)
+        lane.active = max(0, lane.active - 1)
+        # 실제 사용량이 추정보다 많으면 예산에서 더 차감 (적으면 돌려받음)
+        self._tokens = min(self.capacity, self._tokens - token_delta)
+        if cooldown:
+            self._rate_limited += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + cooldown)
+            print(f"⚠️ LLM 게이트웨이: Rate limit 응답으로 {cooldown:.1f}초 동안 새 호출을 멈춥니다.")
+            if self._wakeup is not None:
+                self._wakeup.cancel()
+                self._wakeup = None
+        self._dispatch()
+
+    def _stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "tokens_per_minute": self.capacity,
+            "tokens_available": int(self._tokens),
+            "paused_seconds": round(max(0.0, self._paused_until - time.monotonic()), 1),
+            "rate_limited": self._rate_limited,
+            "models": {
+                model: {
+                    "limit": lane.limit,
+                    "active": lane.active,
+                    "queued": sum(1 for w in lane.waiters if not w.future.done()),
+                    "granted": lane.granted,
+                    "avg_wait": round(lane.total_wait / lane.granted, 2) if lane.granted else 0.0,
+                    "max_wait": round(lane.max_wait, 2),
+                }
+                for model, lane in self._lanes.items()
+            },
+        }
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """프로세스 전체 공유 게이트웨이 (첫 사용 시 이벤트 루프 스레드 시작)"""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
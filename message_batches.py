@@ -0,0 +1,140 @@
+# message_batches.py
+
+"""
+Anthropic Message Batches 실행
+- 대화형 응답 속도가 필요 없는 대량 요청(PDF 청크 요약·추출)을 배치 하나로 제출
+- 완료될 때까지 주기적으로 상태를 확인하고, 결과를 custom_id로 원래 요청에 대응
+- 배치 요청은 일반 호출보다 비용이 낮고 일반 호출의 분당 한도와 별도로 처리됨 (LLM 게이트웨이를 거치지 않음)
+
+오프라인 검증:
+    python mock_anthropic_server.py --port 8765
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 streamlit run app.py
+"""
+
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+# 상태 확인 간격, 최대 대기 시간 (초)
+BATCH_POLL_INTERVAL = float(os.environ.get("BATCH_POLL_INTERVAL", 10))
+BATCH_TIMEOUT = float(os.environ.get("BATCH_TIMEOUT", 3600))
+
+# 시간 초과로 취소한 뒤 이미 처리된 결과를 받기 위해 더 기다리는 시간 (초)
+BATCH_CANCEL_GRACE = 60
+
+BATCH_DEFAULT_MODEL = "claude-3-5-sonnet-20241022"
+BATCH_MAX_TOKENS = 4000
+
+# API 제약: custom_id는 영문·숫자·_·- 1~64자
+CUSTOM_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+@dataclass
+class BatchResult:
+    """배치 안 요청 하나의 결과"""
+    custom_id: str
+    status: str                  # succeeded / errored / canceled / expired
+    text: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status == "succeeded"
+
+
+def build_batch_requests(prompts: Dict[str, str], model: str, max_tokens: int = BATCH_MAX_TOKENS) -> list:
+    """
+    custom_id → 프롬프트를 Message Batches 요청 목록으로 변환
+
+    Raises:
+        ValueError: custom_id 형식 오류
+    """
+    requests = []
+    for custom_id, prompt in prompts.items():
+        if not CUSTOM_ID_PATTERN.match(custom_id):
+            raise ValueError(f"잘못된 custom_id: {custom_id!r}")
+        requests.append({
+            "custom_id": custom_id,
+            "params": {
+                "model": model,
+                "max_tokens": max_tokens,
+                "messages": [{"role": "user", "content": prompt}],
+            },
+        })
+    return requests
+
+
+def _wait_until_ended(client, batch, deadline: float, poll_interval: float, on_progress):
+    while batch.processing_status != "ended" and time.monotonic() < deadline:
+        time.sleep(poll_interval)
+        batch = client.messages.batches.retrieve(batch.id)
+        if on_progress:
+            on_progress(batch)
+    return batch
+
+
+def _collect_results(client, batch_id: str) -> Dict[str, BatchResult]:
+    results = {}
+    for entry in client.messages.batches.results(batch_id):
+        result = entry.result
+        if result.type == "succeeded":
+            text = "".join(block.text for block in result.message.content if block.type == "text")
+            results[entry.custom_id] = BatchResult(entry.custom_id, result.type, text=text)
+        elif result.type == "errored":
+            results[entry.custom_id] = BatchResult(entry.custom_id, result.type, error=str(result.error))
+        else:
+            results[entry.custom_id] = BatchResult(entry.custom_id, result.type)
+    return results
+
+
+def run_message_batch(prompts: Dict[str, str], model: Optional[str] = None, max_tokens: int = BATCH_MAX_TOKENS,
+                      client=None, poll_interval: Optional[float] = None, timeout: Optional[float] = None,
+                      on_progress: Optional[Callable] = None) -> Dict[str, BatchResult]:
+    """
+    프롬프트 묶음을 Message Batch 하나로 제출하고 완료될 때까지 대기
+
+    Args:
+        prompts: custom_id → 프롬프트
+        model: 모델명 (None이면 BATCH_DEFAULT_MODEL)
+        max_tokens: 요청별 최대 출력 토큰
+        client: Anthropic 클라이언트 (None이면 init_dspy.anthropic_client)
+        poll_interval: 상태 확인 간격 (None이면 BATCH_POLL_INTERVAL)
+        timeout: 최대 대기 시간 (None이면 BATCH_TIMEOUT, 초과 시 배치를 취소하고 처리된 결과만 반환)
+        on_progress: 상태를 확인할 때마다 배치 객체(request_counts 포함)를 받는 콜백
+
+    Returns:
+        Dict[str, BatchResult]: custom_id → 결과 (제출 실패 시 빈 딕셔너리, 결과가 없는 요청은 빠질 수 있음)
+    """
+    if not prompts:
+        return {}
+    if client is None:
+        from init_dspy import anthropic_client as client
+    model = model or BATCH_DEFAULT_MODEL
+    poll_interval = BATCH_POLL_INTERVAL if poll_interval is None else poll_interval
+    timeout = BATCH_TIMEOUT if timeout is None else timeout
+
+    started = time.monotonic()
+    try:
+        batch = client.messages.batches.create(requests=build_batch_requests(prompts, model, max_tokens))
+        print(f"📦 Message Batch 제출: {batch.id} ({len(prompts)}개 요청)")
+        if on_progress:
+            on_progress(batch)
+
+        batch = _wait_until_ended(client, batch, started + timeout, poll_interval, on_progress)
+        if batch.processing_status != "ended":
+            print(f"⚠️ Message Batch 시간 초과 ({timeout:.0f}초) - 취소 후 처리된 결과만 사용합니다: {batch.id}")
+            client.messages.batches.cancel(batch.id)
+            batch = _wait_until_ended(client, batch, time.monotonic() + BATCH_CANCEL_GRACE, poll_interval, on_progress)
+            if batch.processing_status != "ended":
+                return {}
+
+        results = _collect_results(client, batch.id)
+    except Exception as e:
+        print(f"❌ Message Batch 실행 실패: {e}")
+        return {}
+
+    succeeded = sum(1 for result in results.values() if result.succeeded)
+    print(f"✅ Message Batch 완료: {batch.id} - 성공 {succeeded}/{len(prompts)}, {time.monotonic() - started:.1f}초")
+    return results
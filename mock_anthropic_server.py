@@ -0,0 +1,476 @@
+# mock_anthropic_server.py
+
+"""
+로컬 Anthropic API 모의 서버 (오프라인 개발·검증용)
+- POST /v1/messages 요청 형식 검증 (content 블록, cache_control 위치/개수)
+- 프롬프트 캐싱 동작 모사: 같은 캐시 접두부가 다시 오면 cache_read_input_tokens로 보고
+- "stream": true 요청은 SSE 이벤트(message_start → content_block_delta … → message_stop)로 나눠 응답
+- Message Batches: POST /v1/messages/batches 로 만든 배치는 batch_processing_seconds 뒤 ended가 되고
+  GET .../results 로 요청별 결과(JSONL)를 반환 (batch_errored_ids에 든 custom_id는 errored)
+
+사용법:
+    python mock_anthropic_server.py --port 8765
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 streamlit run app.py
+
+    python mock_anthropic_server.py --self-check   # 캐시 배치 요청·스트리밍·Message Batches 응답 형식 확인
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+# Anthropic API 제약: 요청당 cache_control 지점은 최대 4개
+MAX_CACHE_BREAKPOINTS = 4
+
+
+class RequestValidationError(ValueError):
+    """요청 형식 오류 (400 invalid_request_error로 응답)"""
+
+
+def estimate_tokens(text: str) -> int:
+    """모의 토큰 수 (한국어 기준 대략 2자당 1토큰)"""
+    return max(1, len(text) // 2) if text else 0
+
+
+def _iter_blocks(content) -> List[Dict[str, Any]]:
+    if isinstance(content, str):
+        return [{"type": "text", "text": content}]
+    if not isinstance(content, list) or not content:
+        raise RequestValidationError("content는 문자열 또는 비어 있지 않은 블록 목록이어야 합니다.")
+    for block in content:
+        if not isinstance(block, dict) or block.get("type") != "text" or not isinstance(block.get("text"), str):
+            raise RequestValidationError(f"지원하지 않는 content 블록: {block!r}")
+        if not block["text"]:
+            raise RequestValidationError("빈 text 블록은 허용되지 않습니다.")
+        cache_control = block.get("cache_control")
+        if cache_control is not None and cache_control.get("type") != "ephemeral":
+            raise RequestValidationError(f"cache_control.type은 'ephemeral'이어야 합니다: {cache_control!r}")
+    return content
+
+
+def validate_messages_request(payload: Dict[str, Any]) -> List[Tuple[str, bool]]:
+    """
+    /v1/messages 요청 검증
+
+    Returns:
+        List[Tuple[str, bool]]: 프롬프트 순서대로 (텍스트, cache_control 여부)
+    """
+    if not isinstance(payload.get("model"), str) or not payload["model"]:
+        raise RequestValidationError("model이 필요합니다.")
+    if not isinstance(payload.get("max_tokens"), int) or payload["max_tokens"] <= 0:
+        raise RequestValidationError("max_tokens는 양의 정수여야 합니다.")
+
+    segments = []
+    system = payload.get("system")
+    if system is not None:
+        for block in _iter_blocks(system):
+            segments.append((block["text"], "cache_control" in block))
+
+    messages = payload.get("messages")
+    if not isinstance(messages, list) or not messages:
+        raise RequestValidationError("messages가 비어 있습니다.")
+    if messages[0].get("role") != "user":
+        raise RequestValidationError("첫 메시지는 user여야 합니다.")
+    for message in messages:
+        if message.get("role") not in ("user", "assistant"):
+            raise RequestValidationError(f"잘못된 role: {message.get('role')!r}")
+        for block in _iter_blocks(message.get("content")):
+            segments.append((block["text"], "cache_control" in block))
+
+    breakpoints = sum(1 for _, cached in segments if cached)
+    if breakpoints > MAX_CACHE_BREAKPOINTS:
+        raise RequestValidationError(f"cache_control 지점은 최대 {MAX_CACHE_BREAKPOINTS}개입니다. ({breakpoints}개)")
+    return segments
+
+
+def _timestamp(value: Optional[float]) -> Optional[str]:
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class MockBatch:
+    """모의 Message Batch (생성 후 processing_seconds가 지나면 ended)"""
+
+    def __init__(self, requests: List[Dict[str, Any]], processing_seconds: float):
+        self.id = f"msgbatch_mock_{uuid.uuid4().hex[:24]}"
+        self.requests = requests
+        self.created_at = time.time()
+        self.processing_seconds = processing_seconds
+        self.cancel_initiated_at: Optional[float] = None
+        self.results: Optional[List[Dict[str, Any]]] = None
+
+    @property
+    def ended_at(self) -> Optional[float]:
+        if self.cancel_initiated_at is not None:
+            return self.cancel_initiated_at
+        ends = self.created_at + self.processing_seconds
+        return ends if time.time() >= ends else None
+
+    def to_dict(self, base_url: str) -> Dict[str, Any]:
+        ended = self.ended_at is not None
+        counts = {"processing": 0, "succeeded": 0, "errored": 0, "canceled": 0, "expired": 0}
+        if ended and self.results is not None:
+            for result in self.results:
+                counts[result["result"]["type"]] += 1
+        else:
+            counts["processing"] = len(self.requests)
+        return {
+            "id": self.id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": counts,
+            "created_at": _timestamp(self.created_at),
+            "expires_at": _timestamp(self.created_at + 24 * 3600),
+            "ended_at": _timestamp(self.ended_at),
+            "cancel_initiated_at": _timestamp(self.cancel_initiated_at),
+            "archived_at": None,
+            "results_url": f"{base_url}/v1/messages/batches/{self.id}/results" if ended else None,
+        }
+
+
+class MockAnthropicState:
+    """서버 상태: 캐시된 접두부, 수신 요청 기록, Message Batches"""
+
+    def __init__(self, response_text: str = "## 1. 모의 응답\n모의 서버에서 생성한 분석 결과입니다.",
+                 stream_chunk_chars: int = 8, stream_chunk_delay: float = 0.02,
+                 batch_processing_seconds: float = 1.0):
+        self.response_text = response_text
+        # 스트리밍 응답: 몇 글자씩, 몇 초 간격으로 보낼지
+        self.stream_chunk_chars = stream_chunk_chars
+        self.stream_chunk_delay = stream_chunk_delay
+        # Message Batches: 처리 완료까지 걸리는 시간, 응답 텍스트(None이면 response_text), 실패시킬 custom_id
+        self.batch_processing_seconds = batch_processing_seconds
+        self.batch_response_text: Optional[str] = None
+        self.batch_errored_ids = set()
+        self.batches: Dict[str, MockBatch] = {}
+        self.cached_prefixes = set()
+        self.requests: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+
+    def usage_for(self, segments: List[Tuple[str, bool]]) -> Dict[str, int]:
+        """마지막 cache_control 지점까지를 캐시 접두부로 보고 사용량 계산"""
+        last_breakpoint = max((i for i, (_, cached) in enumerate(segments) if cached), default=-1)
+        prefix_text = "".join(text for text, _ in segments[:last_breakpoint + 1])
+        rest_text = "".join(text for text, _ in segments[last_breakpoint + 1:])
+
+        usage = {
+            "input_tokens": estimate_tokens(rest_text),
+            "output_tokens": estimate_tokens(self.response_text),
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0,
+        }
+        if last_breakpoint < 0:
+            usage["input_tokens"] = estimate_tokens(prefix_text + rest_text)
+            return usage
+
+        key = hashlib.sha256(prefix_text.encode("utf-8")).hexdigest()
+        with self.lock:
+            if key in self.cached_prefixes:
+                usage["cache_read_input_tokens"] = estimate_tokens(prefix_text)
+            else:
+                self.cached_prefixes.add(key)
+                usage["cache_creation_input_tokens"] = estimate_tokens(prefix_text)
+        return usage
+
+
+class MockAnthropicHandler(BaseHTTPRequestHandler):
+    server_version = "MockAnthropic/1.0"
+
+    @property
+    def state(self) -> MockAnthropicState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        if getattr(self.server, "verbose", False):
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, body: Dict[str, Any]):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status: int, error_type: str, message: str):
+        self._send_json(status, {"type": "error", "error": {"type": error_type, "message": message}})
+
+    def _read_json(self) -> Optional[Dict[str, Any]]:
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError as e:
+            self._send_error(400, "invalid_request_error", f"JSON 파싱 실패: {e}")
+            return None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _build_message(self, payload: Dict[str, Any], usage: Dict[str, int], text: str) -> Dict[str, Any]:
+        return {
+            "id": f"msg_mock_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": payload["model"],
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": usage,
+        }
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        if path == "/v1/messages/batches":
+            self._create_batch()
+            return
+        if path.startswith("/v1/messages/batches/") and path.endswith("/cancel"):
+            self._cancel_batch(path.split("/")[-2])
+            return
+        if path != "/v1/messages":
+            self._send_error(404, "not_found_error", f"알 수 없는 경로: {self.path}")
+            return
+
+        payload = self._read_json()
+        if payload is None:
+            return
+        try:
+            segments = validate_messages_request(payload)
+        except RequestValidationError as e:
+            self._send_error(400, "invalid_request_error", str(e))
+            return
+
+        usage = self.state.usage_for(segments)
+        with self.state.lock:
+            self.state.requests.append({"payload": payload, "usage": usage})
+
+        message = self._build_message(payload, usage, self.state.response_text)
+        if payload.get("stream"):
+            self._send_stream(message)
+        else:
+            self._send_json(200, message)
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        parts = path.split("/")
+        if path.startswith("/v1/messages/batches/") and len(parts) == 5:
+            batch = self.state.batches.get(parts[4])
+            if batch is None:
+                self._send_error(404, "not_found_error", f"배치 없음: {parts[4]}")
+            else:
+                self._send_json(200, batch.to_dict(self.base_url))
+        elif path.startswith("/v1/messages/batches/") and len(parts) == 6 and parts[5] == "results":
+            self._send_batch_results(parts[4])
+        else:
+            self._send_error(404, "not_found_error", f"알 수 없는 경로: {self.path}")
+
+    def _create_batch(self):
+        """요청 목록을 검증하여 배치 생성 (결과는 만들 때 미리 계산, 조회 시 처리 시간 경과 후 공개)"""
+        payload = self._read_json()
+        if payload is None:
+            return
+        requests = payload.get("requests")
+        if not isinstance(requests, list) or not requests:
+            self._send_error(400, "invalid_request_error", "requests가 비어 있습니다.")
+            return
+        custom_ids = [request.get("custom_id") for request in requests]
+        if len(set(custom_ids)) != len(custom_ids) or not all(isinstance(c, str) and c for c in custom_ids):
+            self._send_error(400, "invalid_request_error", "custom_id는 비어 있지 않고 배치 안에서 고유해야 합니다.")
+            return
+
+        results = []
+        for request in requests:
+            params = request.get("params") or {}
+            if params.get("stream"):
+                self._send_error(400, "invalid_request_error", "배치 요청에는 stream을 사용할 수 없습니다.")
+                return
+            try:
+                segments = validate_messages_request(params)
+            except RequestValidationError as e:
+                self._send_error(400, "invalid_request_error", f"{request['custom_id']}: {e}")
+                return
+            if request["custom_id"] in self.state.batch_errored_ids:
+                result = {"type": "errored", "error": {"type": "error", "error": {
+                    "type": "api_error", "message": "모의 배치 요청 실패"}}}
+            else:
+                text = self.state.batch_response_text
+                message = self._build_message(params, self.state.usage_for(segments),
+                                              self.state.response_text if text is None else text)
+                result = {"type": "succeeded", "message": message}
+            results.append({"custom_id": request["custom_id"], "result": result})
+
+        batch = MockBatch(requests, self.state.batch_processing_seconds)
+        batch.results = results
+        with self.state.lock:
+            self.state.batches[batch.id] = batch
+            self.state.requests.append({"batch_id": batch.id, "requests": len(requests)})
+        self._send_json(200, batch.to_dict(self.base_url))
+
+    def _cancel_batch(self, batch_id: str):
+        batch = self.state.batches.get(batch_id)
+        if batch is None:
+            self._send_error(404, "not_found_error", f"배치 없음: {batch_id}")
+            return
+        if batch.ended_at is None:
+            batch.cancel_initiated_at = time.time()
+            # 처리되지 않은 요청은 canceled
+            batch.results = [
+                {"custom_id": result["custom_id"], "result": {"type": "canceled"}} for result in batch.results
+            ]
+        self._send_json(200, batch.to_dict(self.base_url))
+
+    def _send_batch_results(self, batch_id: str):
+        batch = self.state.batches.get(batch_id)
+        if batch is None or batch.ended_at is None:
+            self._send_error(404, "not_found_error", f"결과가 아직 없습니다: {batch_id}")
+            return
+        data = "".join(json.dumps(result, ensure_ascii=False) + "\n" for result in batch.results).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/binary")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_event(self, event: str, data: Dict[str, Any]):
+        body = json.dumps(data, ensure_ascii=False)
+        self.wfile.write(f"event: {event}\ndata: {body}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def _send_stream(self, message: Dict[str, Any]):
+        """Messages API 스트리밍 이벤트 순서대로 응답 텍스트를 나눠 전송"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        usage = message["usage"]
+        text = message["content"][0]["text"]
+        self._send_event("message_start", {
+            "type": "message_start",
+            "message": {**message, "content": [], "stop_reason": None, "usage": {**usage, "output_tokens": 1}},
+        })
+        self._send_event("content_block_start", {
+            "type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""},
+        })
+        size = max(1, self.state.stream_chunk_chars)
+        for start in range(0, len(text), size):
+            time.sleep(self.state.stream_chunk_delay)
+            self._send_event("content_block_delta", {
+                "type": "content_block_delta", "index": 0,
+                "delta": {"type": "text_delta", "text": text[start:start + size]},
+            })
+        self._send_event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        self._send_event("message_delta", {
+            "type": "message_delta",
+            "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+            "usage": {"output_tokens": usage["output_tokens"]},
+        })
+        self._send_event("message_stop", {"type": "message_stop"})
+
+
+def start_mock_server(host: str = "127.0.0.1", port: int = 0, verbose: bool = False) -> ThreadingHTTPServer:
+    """백그라운드 스레드에서 모의 서버 시작 - server.server_address로 실제 포트 확인"""
+    server = ThreadingHTTPServer((host, port), MockAnthropicHandler)
+    server.state = MockAnthropicState()
+    server.verbose = verbose
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_self_check() -> bool:
+    """캐시 배치 요청 2회 + 스트리밍 요청 1회 + Message Batch 1회로 요청 형식, 캐시 읽기 토큰 보고, 스트리밍 이벤트, 배치 결과 확인"""
+    import anthropic
+    from prompt_caching import build_message_content, extract_usage
+
+    server = start_mock_server()
+    host, port = server.server_address
+    client = anthropic.Anthropic(api_key="mock-key", base_url=f"http://{host}:{port}")
+
+    prefix = "핵심 원칙\n\n# 현재 분석 블록\n블록 DSL ... 프로젝트 정보 ... PDF 요약 ..."
+    usages = []
+    for suffix in ["# 📚 이전 분석 결과\n1단계 결과", "# 📚 이전 분석 결과\n1~2단계 결과"]:
+        response = client.messages.create(
+            model="claude-3-5-sonnet-20241022",
+            max_tokens=8000,
+            messages=[{"role": "user", "content": build_message_content(suffix, prefix)}],
+        )
+        usages.append(extract_usage(response))
+
+    # 스트리밍: 여러 조각으로 나뉘어 도착하고, 합친 텍스트와 사용량이 일반 응답과 같아야 함
+    chunks = []
+    started = time.perf_counter()
+    first_chunk_at = None
+    with client.messages.stream(
+        model="claude-3-5-sonnet-20241022",
+        max_tokens=8000,
+        messages=[{"role": "user", "content": build_message_content(suffix, prefix)}],
+    ) as stream:
+        for delta in stream.text_stream:
+            if first_chunk_at is None:
+                first_chunk_at = time.perf_counter() - started
+            chunks.append(delta)
+        final_message = stream.get_final_message()
+    total_elapsed = time.perf_counter() - started
+
+    # Message Batches: 제출 → 완료 대기 → custom_id별 결과 (실패 지정한 요청은 errored)
+    from message_batches import run_message_batch
+    server.state.batch_processing_seconds = 0.3
+    server.state.batch_errored_ids = {"chunk-2"}
+    batch_prompts = {f"chunk-{i}": f"청크 {i} 내용" for i in range(4)}
+    batch_results = run_message_batch(batch_prompts, client=client, poll_interval=0.1, timeout=10)
+    server.shutdown()
+
+    cache_ok = usages[0]["cache_creation_input_tokens"] > 0 and usages[1]["cache_read_input_tokens"] > 0
+    stream_usage = extract_usage(final_message)
+    stream_ok = (
+        len(chunks) > 1
+        and "".join(chunks) == server.state.response_text
+        and stream_usage["cache_read_input_tokens"] > 0
+        and stream_usage["output_tokens"] == usages[1]["output_tokens"]
+    )
+    batch_ok = (
+        set(batch_results) == set(batch_prompts)
+        and batch_results["chunk-2"].status == "errored"
+        and all(r.text == server.state.response_text for cid, r in batch_results.items() if cid != "chunk-2")
+    )
+    for i, usage in enumerate(usages, 1):
+        print(f"요청 {i}: {usage}")
+    print(f"스트리밍: {len(chunks)}개 조각, 첫 조각 {first_chunk_at:.3f}초 / 전체 {total_elapsed:.3f}초, {stream_usage}")
+    print("✅ 프롬프트 캐싱 요청 형식 확인" if cache_ok else "❌ 캐시 읽기 토큰이 보고되지 않았습니다.")
+    print("✅ 스트리밍 응답 형식 확인" if stream_ok else "❌ 스트리밍 응답이 일반 응답과 다릅니다.")
+    print("✅ Message Batches 결과 대응 확인" if batch_ok else f"❌ Message Batches 결과가 요청과 맞지 않습니다: {batch_results}")
+    return cache_ok and stream_ok and batch_ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 Anthropic API 모의 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--self-check", action="store_true", help="캐싱 요청 형식 자체 점검 후 종료")
+    args = parser.parse_args()
+
+    if args.self_check:
+        raise SystemExit(0 if run_self_check() else 1)
+
+    server = ThreadingHTTPServer((args.host, args.port), MockAnthropicHandler)
+    server.state = MockAnthropicState()
+    server.verbose = True
+    print(f"🧪 모의 Anthropic 서버: http://{args.host}:{args.port}  (ANTHROPIC_BASE_URL로 지정)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
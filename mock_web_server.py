@@ -0,0 +1,189 @@
+# mock_web_server.py
+
+"""
+로컬 웹 페이지 모의 서버 (웹 검색 본문 보강 오프라인 검증용)
+- GET /article/<번호>: 메뉴·스크립트·바닥글이 섞인 한국어 기사 HTML
+- GET /missing: 404, GET /file.pdf: HTML이 아닌 응답
+- ?delay=초 로 응답 지연 모사 (동시 가져오기 확인용)
+
+사용법:
+    python mock_web_server.py --port 8766
+    python mock_web_server.py --self-check   # 동시 가져오기·본문 추출·요약·캐시 확인
+"""
+
+import argparse
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+from urllib.parse import parse_qs, urlparse
+
+# 기사 본문 (번호별 주제)
+ARTICLE_TOPICS = {
+    1: ("친환경 연수원 설계", "연수원 설계에서는 자연 채광과 환기를 고려한 배치가 에너지 사용량을 크게 줄입니다."),
+    2: ("캠퍼스 매스 전략", "캠퍼스형 시설은 중정을 중심으로 매스를 분절하여 보행 동선과 조망을 함께 확보합니다."),
+    3: ("공사비 동향", "최근 공사비는 자재비와 노무비 상승으로 전년 대비 꾸준히 오르는 추세입니다."),
+}
+
+NAVIGATION_TEXT = "홈 | 뉴스 | 로그인 | 회원가입 | 전체 메뉴 보기"
+FOOTER_TEXT = "Copyright 모의 건축 뉴스. 무단 전재 및 재배포 금지. 고객센터 02-000-0000"
+SCRIPT_TEXT = "window.tracking = 'analytics-script-should-not-appear';"
+
+
+def render_article(number: int) -> str:
+    """모의 기사 HTML"""
+    title, lead = ARTICLE_TOPICS.get(number, (f"건축 기사 {number}", f"{number}번 건축 기사의 핵심 내용을 설명하는 첫 문장입니다."))
+    paragraphs = [
+        lead,
+        f"{title} 분야에서 전문가들은 초기 기획 단계에서 대지 조건과 사용자 요구를 함께 검토해야 한다고 강조합니다.",
+        "특히 설계 초기에 법규와 예산 범위를 확인하면 이후 설계 변경으로 인한 비용 증가를 줄일 수 있습니다.",
+        "해외 사례에서도 사용자 참여형 워크숍을 통해 요구사항을 구체화하는 방식이 자주 활용됩니다.",
+        "이 기사는 본문 추출과 추출 요약 기능을 점검하기 위한 모의 기사입니다.",
+    ]
+    body = "\n".join(f"<p>{paragraph}</p>" for paragraph in paragraphs)
+    return f"""<!DOCTYPE html>
+<html lang="ko">
+<head><meta charset="utf-8"><title>{title}</title>
+<style>body {{ font-family: sans-serif; }}</style>
+<script>{SCRIPT_TEXT}</script></head>
+<body>
+<header><nav>{NAVIGATION_TEXT}</nav></header>
+<aside><ul><li>많이 본 기사: 오늘의 부동산 시세 총정리</li><li>광고: 인테리어 견적 무료 상담 신청</li></ul></aside>
+<article><h1>{title}</h1>
+{body}
+</article>
+<footer><p>{FOOTER_TEXT}</p></footer>
+</body></html>"""
+
+
+class MockWebState:
+    """경로별 요청 수 기록"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+
+    def record(self, path: str):
+        with self.lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def total(self) -> int:
+        with self.lock:
+            return sum(self.requests.values())
+
+
+class MockWebHandler(BaseHTTPRequestHandler):
+    server_version = "MockWeb/1.0"
+
+    def log_message(self, format, *args):
+        if getattr(self.server, "verbose", False):
+            super().log_message(format, *args)
+
+    def _send(self, status: int, content_type: str, data: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        self.server.state.record(parsed.path)
+        delay = float(parse_qs(parsed.query).get("delay", ["0"])[0])
+        if delay:
+            time.sleep(delay)
+
+        if parsed.path.startswith("/article/"):
+            try:
+                number = int(parsed.path.rsplit("/", 1)[-1])
+            except ValueError:
+                number = 0
+            self._send(200, "text/html; charset=utf-8", render_article(number).encode("utf-8"))
+        elif parsed.path == "/file.pdf":
+            self._send(200, "application/pdf", b"%PDF-1.4 mock")
+        else:
+            self._send(404, "text/html; charset=utf-8", "<h1>페이지를 찾을 수 없습니다</h1>".encode("utf-8"))
+
+
+def start_mock_server(host: str = "127.0.0.1", port: int = 0, verbose: bool = False) -> ThreadingHTTPServer:
+    """백그라운드 스레드에서 모의 서버 시작 - server.server_address로 실제 포트 확인"""
+    server = ThreadingHTTPServer((host, port), MockWebHandler)
+    server.state = MockWebState()
+    server.verbose = verbose
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_self_check(delay: float = 0.5) -> bool:
+    """지연 페이지 3개 + 404 + PDF를 보강하여 동시성, 본문 추출, 요약, 캐시 재사용 확인"""
+    from persistent_cache import PersistentCache
+    from search_backends import SearchResult
+    import page_enrichment
+
+    server = start_mock_server()
+    host, port = server.server_address
+    base_url = f"http://{host}:{port}"
+    page_enrichment.set_page_cache(
+        PersistentCache("web_pages", ttl_seconds=3600, path=f"{tempfile.mkdtemp()}/web_pages.sqlite3")
+    )
+
+    results = [
+        SearchResult(title=f"기사 {i}", snippet="스니펫", link=f"{base_url}/article/{i}?delay={delay}")
+        for i in ARTICLE_TOPICS
+    ] + [
+        SearchResult(title="없는 페이지", snippet="스니펫", link=f"{base_url}/missing"),
+        SearchResult(title="PDF", snippet="스니펫", link=f"{base_url}/file.pdf"),
+    ]
+
+    started = time.perf_counter()
+    summaries = page_enrichment.enrich_search_results("연수원 설계", results)
+    first_elapsed = time.perf_counter() - started
+    requests_after_first = server.state.total()
+
+    started = time.perf_counter()
+    cached_summaries = page_enrichment.enrich_search_results("연수원 설계", results)
+    second_elapsed = time.perf_counter() - started
+    server.shutdown()
+    page_enrichment.set_page_cache(None)
+
+    for link, summary in summaries.items():
+        print(f"- {link}\n  {summary}")
+    print(f"첫 보강: {first_elapsed:.2f}초 (페이지 {len(ARTICLE_TOPICS)}개 × 지연 {delay}초), "
+          f"캐시 재사용: {second_elapsed * 1000:.1f}ms, 추가 요청 {server.state.total() - requests_after_first}건")
+
+    joined = "\n".join(summaries.values())
+    checks = {
+        "기사 페이지만 요약": len(summaries) == len(ARTICLE_TOPICS),
+        "동시 가져오기": first_elapsed < delay * len(ARTICLE_TOPICS),
+        "메뉴·스크립트·바닥글 제외": not any(text in joined for text in (NAVIGATION_TEXT, FOOTER_TEXT, "analytics-script")),
+        "검색어 관련 문장 우선": "연수원 설계에서는" in summaries.get(results[0].link, ""),
+        "캐시 재사용": cached_summaries == summaries and server.state.total() == requests_after_first,
+    }
+    for name, passed in checks.items():
+        print(f"{'✅' if passed else '❌'} {name}")
+    return all(checks.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 웹 페이지 모의 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--self-check", action="store_true", help="본문 보강 자체 점검 후 종료")
+    args = parser.parse_args()
+
+    if args.self_check:
+        raise SystemExit(0 if run_self_check() else 1)
+
+    server = ThreadingHTTPServer((args.host, args.port), MockWebHandler)
+    server.state = MockWebState()
+    server.verbose = True
+    print(f"🧪 모의 웹 서버: http://{args.host}:{args.port}/article/1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
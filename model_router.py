@@ -0,0 +1,144 @@
+# model_router.py
+
+"""
+작업별 모델 자동 선택 (라우팅)
+- 작업 유형, 추정 입력 토큰, 예상 출력 토큰으로 모델 등급을 정함
+- 가벼운 추출 작업(PDF 유형 감지, 청크 요약)은 light 등급(Haiku), 분석 블록은 standard 등급(Sonnet)
+- light 작업이라도 입력·출력이 크면 standard로 올림
+- 결정은 콘솔과 프로세스 전체 기록(관리자 화면)에 남김
+
+재정의 (우선순위 순):
+    1. route_model(..., override=모델) - 사이드바에서 자동 선택을 끄면 선택한 모델이 모든 작업에 사용됨
+    2. MODEL_ROUTES 환경 변수 - 블록 ID 또는 작업 유형별 모델 지정
+       예) MODEL_ROUTES="cost_estimation=claude-3-opus-20240229,chunk_summary=claude-3-5-sonnet-20241022"
+"""
+
+import os
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import streamlit as st
+
+# 등급별 모델
+TIER_MODELS = {
+    "light": "claude-3-5-haiku-20241022",
+    "standard": "claude-3-5-sonnet-20241022",
+    "heavy": "claude-3-opus-20240229",
+}
+
+# 작업 유형별 기본 등급 (없는 작업은 standard)
+TASK_TIERS = {
+    "pdf_type_detection": "light",
+    "chunk_summary": "light",
+    "site_field_extraction": "standard",
+    "chunk_analysis": "standard",       # 배치 모드: 요약·유형·대지 필드를 한 번에 추출
+    "analysis_block": "standard",
+    # init_dspy.get_optimal_model 호환
+    "quick_analysis": "light",
+    "cost_sensitive": "light",
+    "detailed_analysis": "standard",
+    "complex_analysis": "heavy",
+}
+
+# light 등급 상한 (넘으면 standard로 올림)
+LIGHT_MAX_INPUT_TOKENS = int(os.environ.get("LIGHT_MAX_INPUT_TOKENS", 20000))
+LIGHT_MAX_OUTPUT_TOKENS = 2000
+
+# 분석 블록 출력 구조 하나당 예상 출력 토큰
+OUTPUT_TOKENS_PER_SECTION = 700
+
+# 프로세스 전체 기록 최대 건수
+ROUTING_LOG_MAX_SIZE = 500
+
+
+def parse_model_routes(raw: str) -> Dict[str, str]:
+    """"키=모델,키=모델" 형식의 재정의 목록 해석 (잘못된 항목은 무시)"""
+    routes = {}
+    for item in raw.split(","):
+        key, sep, model = item.partition("=")
+        if sep and key.strip() and model.strip():
+            routes[key.strip()] = model.strip()
+    return routes
+
+
+MODEL_ROUTES = parse_model_routes(os.environ.get("MODEL_ROUTES", ""))
+
+_routing_log: deque = deque(maxlen=ROUTING_LOG_MAX_SIZE)
+_routing_lock = threading.Lock()
+
+
+@dataclass
+class RoutingDecision:
+    """모델 선택 결과"""
+    task: str
+    model: str
+    tier: str
+    reason: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    block_id: Optional[str] = None
+    overridden: bool = False
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def estimate_block_output_tokens(output_structure: Sequence[str]) -> int:
+    """분석 블록의 예상 출력 토큰 (출력 구조 수 기준)"""
+    return max(1, len(output_structure)) * OUTPUT_TOKENS_PER_SECTION
+
+
+def get_session_override() -> Optional[str]:
+    """사이드바에서 자동 선택을 끈 경우 선택한 모델 (켜져 있으면 None)"""
+    if st.session_state.get("auto_model_routing", True):
+        return None
+    return st.session_state.get("selected_model")
+
+
+def route_model(task: str, input_tokens: int = 0, output_tokens: int = 0,
+                block_id: Optional[str] = None, override: Optional[str] = None) -> RoutingDecision:
+    """
+    작업에 사용할 모델 결정
+
+    Args:
+        task: 작업 유형 (TASK_TIERS의 키, 분석 블록은 "analysis_block")
+        input_tokens: 추정 입력 토큰 수
+        output_tokens: 예상 출력 토큰 수
+        block_id: 분석 블록 ID (MODEL_ROUTES에서 블록별 재정의 확인)
+        override: 지정하면 정책과 관계없이 이 모델 사용
+
+    Returns:
+        RoutingDecision: 선택한 모델과 이유 (프로세스 전체 기록에 추가됨)
+    """
+    route_key = block_id if block_id in MODEL_ROUTES else task
+    if override:
+        decision = RoutingDecision(task, override, "override", "수동 선택", overridden=True)
+    elif route_key in MODEL_ROUTES:
+        decision = RoutingDecision(task, MODEL_ROUTES[route_key], "override", f"MODEL_ROUTES[{route_key}]",
+                                   overridden=True)
+    else:
+        tier = TASK_TIERS.get(task, "standard")
+        reason = f"작업 유형 {task} → {tier}"
+        if tier == "light" and input_tokens > LIGHT_MAX_INPUT_TOKENS:
+            tier, reason = "standard", f"입력 {input_tokens:,} 토큰 > {LIGHT_MAX_INPUT_TOKENS:,} → standard"
+        elif tier == "light" and output_tokens > LIGHT_MAX_OUTPUT_TOKENS:
+            tier, reason = "standard", f"예상 출력 {output_tokens:,} 토큰 > {LIGHT_MAX_OUTPUT_TOKENS:,} → standard"
+        decision = RoutingDecision(task, TIER_MODELS[tier], tier, reason)
+
+    decision.input_tokens = input_tokens
+    decision.output_tokens = output_tokens
+    decision.block_id = block_id
+    print(f"🧭 모델 선택 [{block_id or task}] {decision.model} ({decision.reason}, 입력 {input_tokens:,} / 출력 {output_tokens:,} 토큰)")
+    with _routing_lock:
+        _routing_log.append(decision)
+    return decision
+
+
+def get_routing_log() -> List[Dict]:
+    """프로세스 전체 모델 선택 기록 (오래된 순)"""
+    with _routing_lock:
+        return [decision.to_dict() for decision in _routing_log]
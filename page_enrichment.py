@@ -0,0 +1,273 @@
+# page_enrichment.py
+
+"""
+웹 검색 결과 본문 보강
+- 검색 결과 페이지를 동시에 가져와 BeautifulSoup으로 본문만 추출
+- 추출한 본문은 영속 캐시에 저장하여 같은 URL은 다시 가져오지 않음
+- 로컬 추출 요약(문장 점수화)으로 압축한 뒤 프롬프트의 검색 결과에 덧붙임
+- 마감 시간 안에 가져오지 못한 페이지는 검색 스니펫만 사용
+"""
+
+import os
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from persistent_cache import PersistentCache, SingleFlight, make_cache_key
+
+# 페이지 가져오기 설정
+PAGE_FETCH_TIMEOUT = float(os.environ.get("PAGE_FETCH_TIMEOUT", 5))
+PAGE_ENRICH_DEADLINE = float(os.environ.get("PAGE_ENRICH_DEADLINE", 8))
+PAGE_MAX_BYTES = 2 * 1024 * 1024
+PAGE_MAX_WORKERS = int(os.environ.get("PAGE_MAX_WORKERS", 8))
+PAGE_CACHE_TTL = int(os.environ.get("PAGE_CACHE_TTL", 7 * 24 * 3600))
+PAGE_USER_AGENT = "Mozilla/5.0 (compatible; ArchInsightBot/1.0)"
+
+# 추출 요약 설정
+SUMMARY_MAX_SENTENCES = 3
+SUMMARY_MAX_CHARS = 500
+MIN_PARAGRAPH_CHARS = 20
+
+# 본문이 아닌 요소
+NON_CONTENT_TAGS = ["script", "style", "noscript", "iframe", "svg", "nav", "header", "footer", "aside", "form", "button"]
+
+_WORD_PATTERN = re.compile(r"[0-9A-Za-z가-힣]{2,}")
+_SENTENCE_PATTERN = re.compile(r"(?<=[.!?。])\s+|\n+")
+
+_page_cache = None
+_page_session = None
+_page_executor = None
+_page_lock = threading.Lock()
+_page_flight = SingleFlight()
+
+
+def get_page_cache() -> PersistentCache:
+    """추출 본문 캐시 (URL 기준, 기본 7일)"""
+    global _page_cache
+    with _page_lock:
+        if _page_cache is None:
+            _page_cache = PersistentCache("web_pages", ttl_seconds=PAGE_CACHE_TTL)
+        return _page_cache
+
+
+def set_page_cache(cache: Optional[PersistentCache]):
+    """본문 캐시 교체 (None이면 다음 사용 시 기본 위치에 다시 생성)"""
+    global _page_cache
+    with _page_lock:
+        _page_cache = cache
+
+
+def get_page_session() -> requests.Session:
+    """페이지 가져오기용 공유 HTTP 세션"""
+    global _page_session
+    with _page_lock:
+        if _page_session is None:
+            session = requests.Session()
+            session.headers["User-Agent"] = PAGE_USER_AGENT
+            adapter = HTTPAdapter(pool_connections=PAGE_MAX_WORKERS, pool_maxsize=PAGE_MAX_WORKERS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _page_session = session
+        return _page_session
+
+
+def get_page_executor() -> ThreadPoolExecutor:
+    """페이지 동시 가져오기용 스레드 풀 (검색 스레드 풀과 분리하여 중첩 대기로 막히지 않게 함)"""
+    global _page_executor
+    with _page_lock:
+        if _page_executor is None:
+            _page_executor = ThreadPoolExecutor(max_workers=PAGE_MAX_WORKERS, thread_name_prefix="page-fetch")
+        return _page_executor
+
+
+def extract_main_text(html, from_encoding: Optional[str] = None) -> str:
+    """
+    HTML에서 본문 텍스트 추출
+
+    article/main 요소가 있으면 그 안에서, 없으면 문단 텍스트가 가장 많은 컨테이너에서
+    문단(p, li)만 모읍니다. 메뉴·머리글·바닥글·스크립트는 제외합니다.
+
+    Args:
+        html: HTML 문자열 또는 바이트
+        from_encoding: 바이트일 때 응답 헤더의 문자 인코딩
+
+    Returns:
+        str: 문단을 줄바꿈으로 이은 본문 (없으면 빈 문자열)
+    """
+    soup = BeautifulSoup(html, "html.parser", from_encoding=from_encoding if isinstance(html, bytes) else None)
+    for tag in soup(NON_CONTENT_TAGS):
+        tag.decompose()
+
+    root = soup.find("article") or soup.find("main") or soup.find(attrs={"role": "main"})
+    if root is None:
+        text_by_parent: Dict[int, list] = {}
+        for paragraph in soup.find_all("p"):
+            entry = text_by_parent.setdefault(id(paragraph.parent), [paragraph.parent, 0])
+            entry[1] += len(paragraph.get_text(strip=True))
+        if text_by_parent:
+            root = max(text_by_parent.values(), key=lambda entry: entry[1])[0]
+        else:
+            root = soup.body or soup
+
+    paragraphs = []
+    seen = set()
+    for element in root.find_all(["p", "li"]):
+        text = " ".join(element.get_text(" ", strip=True).split())
+        if len(text) < MIN_PARAGRAPH_CHARS or text in seen:
+            continue
+        seen.add(text)
+        paragraphs.append(text)
+    return "\n".join(paragraphs)
+
+
+def split_sentences(text: str) -> List[str]:
+    """문장 단위 분리 (마침표·물음표·느낌표 뒤 공백, 줄바꿈 기준)"""
+    return [sentence.strip() for sentence in _SENTENCE_PATTERN.split(text) if sentence.strip()]
+
+
+def summarize_extractive(text: str, query: str = "", max_sentences: int = SUMMARY_MAX_SENTENCES,
+                         max_chars: int = SUMMARY_MAX_CHARS) -> str:
+    """
+    로컬 추출 요약 - 본문에서 점수가 높은 문장을 원래 순서대로 선택
+
+    문장 점수 = 본문 전체 단어 빈도 평균 + 검색어 단어 포함 비율 + 앞쪽 문장 가산점
+
+    Args:
+        text: 본문
+        query: 검색어 (검색어 단어를 포함한 문장 우선)
+        max_sentences: 최대 문장 수
+        max_chars: 최대 글자 수
+
+    Returns:
+        str: 요약 (본문이 없거나 점수를 매길 단어가 있는 문장이 없으면 빈 문자열)
+    """
+    sentences = [s for s in split_sentences(text) if MIN_PARAGRAPH_CHARS <= len(s) <= 400]
+    if not sentences:
+        return ""
+
+    sentence_words = [_WORD_PATTERN.findall(s.lower()) for s in sentences]
+    frequency = Counter(word for words in sentence_words for word in words)
+    top_frequency = max(frequency.values()) if frequency else 1
+    query_words = set(_WORD_PATTERN.findall(query.lower()))
+
+    scored = []
+    for index, (sentence, words) in enumerate(zip(sentences, sentence_words)):
+        if not words:
+            continue
+        unique_words = set(words)
+        score = sum(frequency[word] for word in unique_words) / top_frequency / len(unique_words)
+        if query_words:
+            # 한국어 조사가 붙은 형태도 포함 ("설계" → "설계를")
+            matched = sum(1 for q in query_words if any(word.startswith(q) for word in unique_words))
+            score += matched / len(query_words)
+        score += 0.1 * (1 - index / len(sentences))
+        scored.append((score, index))
+    if not scored:
+        return ""
+
+    selected = sorted(index for _, index in sorted(scored, reverse=True)[:max_sentences])
+    summary = ""
+    for index in selected:
+        candidate = f"{summary} {sentences[index]}".strip()
+        if len(candidate) > max_chars:
+            break
+        summary = candidate
+    return summary or sentences[selected[0]][:max_chars]
+
+
+def fetch_page_text(url: str, use_cache: bool = True) -> str:
+    """
+    페이지 본문 추출 (캐시 우선, 같은 URL 동시 요청은 한 번만 가져옴)
+
+    Returns:
+        str: 추출 본문 (HTTP 오류, HTML이 아닌 응답, 네트워크 오류 시 빈 문자열)
+    """
+    parsed = urlparse(url)
+    # .invalid는 예약 도메인 (오프라인 픽스처 검색 결과 링크)
+    if parsed.scheme not in ("http", "https") or (parsed.hostname or "").endswith(".invalid"):
+        return ""
+
+    cache = get_page_cache() if use_cache else None
+    cache_key = make_cache_key("page", url)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached.value
+
+    def skip(reason: str, remember: bool) -> str:
+        # 4xx, HTML이 아닌 응답은 다시 시도해도 같으므로 빈 본문으로 캐시 (5xx, 네트워크 오류는 캐시하지 않음)
+        print(f"페이지 가져오기 건너뜀 ({url}): {reason}")
+        if remember and cache is not None:
+            cache.set(cache_key, "")
+        return ""
+
+    def fetch_once() -> str:
+        try:
+            with get_page_session().get(url, timeout=PAGE_FETCH_TIMEOUT, stream=True) as resp:
+                if resp.status_code != 200:
+                    return skip(f"HTTP {resp.status_code}", remember=400 <= resp.status_code < 500)
+                content_type = resp.headers.get("Content-Type", "")
+                if "html" not in content_type:
+                    return skip(content_type or "형식 없음", remember=True)
+                body = b""
+                for chunk in resp.iter_content(64 * 1024):
+                    body += chunk
+                    if len(body) >= PAGE_MAX_BYTES:
+                        break
+                encoding = resp.encoding if "charset" in content_type.lower() else None
+        except requests.exceptions.RequestException as e:
+            return skip(str(e), remember=False)
+
+        text = extract_main_text(body, from_encoding=encoding)
+        if cache is not None:
+            cache.set(cache_key, text)
+        return text
+
+    text, _ = _page_flight.do(url, fetch_once)
+    return text
+
+
+def enrich_search_results(query: str, results: list, deadline: Optional[float] = None,
+                          use_cache: bool = True) -> Dict[str, str]:
+    """
+    검색 결과 페이지를 동시에 가져와 검색어 중심 추출 요약 생성
+
+    Args:
+        query: 검색어
+        results: SearchResult 목록 (link 사용)
+        deadline: 전체 마감 시간 (초, None이면 PAGE_ENRICH_DEADLINE)
+        use_cache: 추출 본문 캐시 사용 여부
+
+    Returns:
+        Dict[str, str]: 링크 → 요약 (가져오지 못했거나 본문이 없는 페이지는 제외)
+    """
+    links = list(dict.fromkeys(r.link for r in results if r.link))
+    if not links:
+        return {}
+
+    deadline = PAGE_ENRICH_DEADLINE if deadline is None else deadline
+    executor = get_page_executor()
+    futures = {executor.submit(fetch_page_text, link, use_cache): link for link in links}
+    done, not_done = wait(futures, timeout=deadline)
+    for future in not_done:
+        future.cancel()
+        print(f"페이지 가져오기 마감 시간 초과 ({futures[future]}): {deadline}초")
+
+    summaries = {}
+    for future in done:
+        try:
+            text = future.result()
+            summary = summarize_extractive(text, query) if text else ""
+        except Exception as e:
+            print(f"페이지 본문 추출 실패 ({futures[future]}): {e}")
+            continue
+        if summary:
+            summaries[futures[future]] = summary
+    return summaries
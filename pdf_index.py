@@ -0,0 +1,387 @@
+# pdf_index.py
+
+"""
+메모리 매핑 가능한 PDF 검색 인덱스
+- 문단 텍스트 + 문자 bigram 역색인을 하나의 파일로 저장
+- mmap으로 열어 여러 세션/워커 프로세스가 복사 없이 공유
+- 검색 결과는 utils_pdf.simple_search와 동일
+
+파일 구성 (모든 정수는 little-endian, 섹션은 8바이트 정렬):
+    헤더        : magic, version, 문단 수, term 수, 각 섹션 오프셋
+    문단 오프셋  : uint64 × (문단 수 + 1)   → 문단 텍스트 blob 내 바이트 위치
+    term 오프셋  : uint64 × (term 수 + 1)   → term blob 내 바이트 위치 (term은 정렬됨)
+    posting 오프셋: uint64 × (term 수 + 1)  → posting 배열 내 원소 위치
+    posting     : uint32 × N               → term을 포함하는 문단 번호 (오름차순)
+    term blob   : UTF-8
+    문단 blob    : UTF-8
+"""
+
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+INDEX_MAGIC = b"INNIIDX1"
+INDEX_VERSION = 1
+
+# magic, version, 문단 수, term 수, 섹션 오프셋 7개
+_HEADER = struct.Struct("<8sIIQ7Q")
+
+# 검색 대상 문단 최소 길이 (간단 검색과 동일)
+MIN_PARAGRAPH_LENGTH = 50
+
+# 인덱스 파일 저장 위치
+INDEX_DIR = os.environ.get("PDF_INDEX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".pdf_index"))
+
+# 프로세스 안에서 동시에 열어 두는 최대 인덱스 수 (넘으면 가장 오래 쓰지 않은 인덱스를 닫음)
+INDEX_OPEN_MAX = int(os.environ.get("PDF_INDEX_OPEN_MAX", 32))
+
+# 인덱스 디렉터리 정리 기준 - 최대 전체 크기, 마지막 사용 후 보관 기간 (ensure_index에서 실행)
+INDEX_DIR_MAX_BYTES = int(os.environ.get("PDF_INDEX_MAX_BYTES", 512 * 1024 * 1024))
+INDEX_MAX_AGE_SECONDS = float(os.environ.get("PDF_INDEX_MAX_AGE_DAYS", 30)) * 24 * 3600
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """검색 대상 문단 분리 (간단 검색과 같은 기준)"""
+    return [para.strip() for para in text.split('\n\n') if len(para.strip()) >= MIN_PARAGRAPH_LENGTH]
+
+
+def _grams(text: str) -> set:
+    """소문자 텍스트의 문자 bigram 집합"""
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _align(buf: bytearray, boundary: int = 8):
+    """섹션 정렬용 패딩"""
+    remainder = len(buf) % boundary
+    if remainder:
+        buf.extend(b"\0" * (boundary - remainder))
+
+
+def _le_bytes(values: array) -> bytes:
+    """array를 little-endian 바이트로 변환"""
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def build_index(text: str, index_path: str) -> str:
+    """
+    문서 텍스트로 인덱스 파일 생성
+
+    임시 파일에 쓴 뒤 rename하므로 다른 프로세스가 읽는 중에도 안전합니다.
+
+    Args:
+        text: 문서 전체 텍스트
+        index_path: 저장할 인덱스 파일 경로
+
+    Returns:
+        str: 인덱스 파일 경로
+    """
+    paragraphs = split_paragraphs(text)
+
+    # 역색인 구성 (문단은 순서대로 처리하므로 posting은 자동으로 정렬됨)
+    postings: Dict[str, List[int]] = {}
+    for doc_id, para in enumerate(paragraphs):
+        for gram in _grams(para.lower()):
+            postings.setdefault(gram, []).append(doc_id)
+    terms = sorted(postings)
+
+    para_blob = bytearray()
+    para_offsets = array("Q", [0])
+    for para in paragraphs:
+        para_blob.extend(para.encode("utf-8"))
+        para_offsets.append(len(para_blob))
+
+    term_blob = bytearray()
+    term_offsets = array("Q", [0])
+    posting_offsets = array("Q", [0])
+    posting_values = array("I")
+    for term in terms:
+        term_blob.extend(term.encode("utf-8"))
+        term_offsets.append(len(term_blob))
+        posting_values.extend(postings[term])
+        posting_offsets.append(len(posting_values))
+
+    body = bytearray()
+    sections = []
+    for data in (_le_bytes(para_offsets), _le_bytes(term_offsets), _le_bytes(posting_offsets),
+                 _le_bytes(posting_values), bytes(term_blob), bytes(para_blob)):
+        sections.append(_HEADER.size + len(body))
+        body.extend(data)
+        _align(body)
+    sections.append(_HEADER.size + len(body))
+
+    header = _HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(paragraphs), len(terms), *sections)
+
+    directory = os.path.dirname(os.path.abspath(index_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(body)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, index_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return index_path
+
+
+class MmapIndex:
+    """mmap으로 연 읽기 전용 인덱스 - 로드 시 데이터를 복사하지 않음"""
+
+    def __init__(self, index_path: str):
+        self.path = index_path
+        with open(index_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.num_paragraphs, self.num_terms, *sections = _HEADER.unpack_from(self._mmap, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            self._mmap.close()
+            raise ValueError(f"지원하지 않는 인덱스 형식: {index_path}")
+
+        view = memoryview(self._mmap)
+        self._para_offsets = self._uint_view(view, sections[0], sections[1], "Q")
+        self._term_offsets = self._uint_view(view, sections[1], sections[2], "Q")
+        self._posting_offsets = self._uint_view(view, sections[2], sections[3], "Q")
+        self._postings = self._uint_view(view, sections[3], sections[4], "I")
+        self._term_blob = view[sections[4]:sections[5]]
+        self._para_blob = view[sections[5]:sections[6]]
+
+    @staticmethod
+    def _uint_view(view: memoryview, start: int, end: int, typecode: str):
+        """섹션을 정수 배열 뷰로 해석 (little-endian 플랫폼에서는 복사 없음)"""
+        item_size = struct.calcsize(typecode)
+        raw = view[start:end]
+        raw = raw[:len(raw) - len(raw) % item_size]
+        if sys.byteorder == "little":
+            return raw.cast(typecode)
+        values = array(typecode, raw.tobytes())
+        values.byteswap()
+        return values
+
+    def close(self):
+        """mmap 해제"""
+        for name in ("_para_offsets", "_term_offsets", "_posting_offsets", "_postings", "_term_blob", "_para_blob"):
+            value = getattr(self, name, None)
+            if isinstance(value, memoryview):
+                value.release()
+        self._mmap.close()
+
+    def paragraph(self, doc_id: int) -> str:
+        """문단 번호로 텍스트 조회"""
+        start, end = self._para_offsets[doc_id], self._para_offsets[doc_id + 1]
+        return bytes(self._para_blob[start:end]).decode("utf-8")
+
+    def _term(self, term_id: int) -> str:
+        start, end = self._term_offsets[term_id], self._term_offsets[term_id + 1]
+        return bytes(self._term_blob[start:end]).decode("utf-8")
+
+    def _find_term(self, term: str) -> int:
+        """정렬된 term 테이블 이진 탐색"""
+        lo, hi = 0, self.num_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < term:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.num_terms and self._term(lo) == term:
+            return lo
+        return -1
+
+    def postings(self, term: str) -> List[int]:
+        """term을 포함하는 문단 번호 목록"""
+        term_id = self._find_term(term)
+        if term_id < 0:
+            return []
+        start, end = self._posting_offsets[term_id], self._posting_offsets[term_id + 1]
+        return list(self._postings[start:end])
+
+    def candidates(self, keyword: str) -> Optional[set]:
+        """
+        키워드를 포함할 수 있는 문단 후보
+
+        키워드의 모든 bigram을 가진 문단만 후보가 됩니다.
+        한 글자 키워드는 bigram으로 거를 수 없으므로 None(전체)을 반환합니다.
+        """
+        grams = _grams(keyword)
+        if not grams:
+            return None
+        result = None
+        for gram in sorted(grams, key=lambda g: len(self.postings(g))):
+            ids = set(self.postings(gram))
+            result = ids if result is None else result & ids
+            if not result:
+                return set()
+        return result
+
+    def search(self, query: str, top_k: int = 3) -> List[Tuple[int, str]]:
+        """
+        키워드 일치 개수 기준 검색
+
+        Returns:
+            List[Tuple[int, str]]: (관련도, 문단) 목록 - 간단 검색과 같은 순서
+        """
+        keywords = re.findall(r'\w+', query.lower())
+        scores: Dict[int, int] = {}
+        for keyword in keywords:
+            candidates = self.candidates(keyword)
+            if candidates is None:
+                candidates = range(self.num_paragraphs)
+            for doc_id in candidates:
+                # bigram 후보는 실제 부분 문자열 포함 여부로 확인
+                if keyword in self.paragraph(doc_id).lower():
+                    scores[doc_id] = scores.get(doc_id, 0) + 1
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(score, self.paragraph(doc_id)) for doc_id, score in ranked[:top_k]]
+
+
+# 프로세스 내에서 열린 인덱스 (문서 해시 → MmapIndex, 최근 사용 순)
+_open_indexes: "OrderedDict[str, MmapIndex]" = OrderedDict()
+# 검색 중인 인덱스의 사용자 수 - 캐시에서 밀려나도 사용이 끝난 뒤에 닫음
+_index_users: Dict[int, int] = {}
+_retired_indexes: Dict[int, MmapIndex] = {}
+_open_lock = threading.Lock()
+
+
+def index_path_for(doc_hash: str) -> str:
+    """문서 해시에 해당하는 인덱스 파일 경로"""
+    return os.path.join(INDEX_DIR, f"{doc_hash}.idx")
+
+
+def _touch(path: str):
+    """마지막 사용 시각 기록 (디렉터리 정리 기준, 다른 프로세스와 공유)"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def ensure_index(doc_hash: str, text: str) -> str:
+    """인덱스 파일이 없으면 생성 (같은 문서는 프로세스 간에 공유) 후 인덱스 디렉터리 정리"""
+    path = index_path_for(doc_hash)
+    if os.path.exists(path):
+        _touch(path)
+    else:
+        build_index(text, path)
+    cleanup_index_dir(keep=path)
+    return path
+
+
+def cleanup_index_dir(max_bytes: int = INDEX_DIR_MAX_BYTES, max_age_seconds: float = INDEX_MAX_AGE_SECONDS,
+                      keep: Optional[str] = None) -> int:
+    """
+    오래된 인덱스 파일 삭제 - 보관 기간이 지난 파일, 전체 크기를 넘으면 오래 쓰지 않은 파일부터
+
+    열려 있는 인덱스는 파일을 지워도 mmap이 유지되므로 검색 중인 세션에 영향이 없고,
+    지워진 문서는 다음 검색부터 간단 검색으로 대체됩니다.
+
+    Args:
+        max_bytes: 인덱스 디렉터리 최대 전체 크기
+        max_age_seconds: 마지막 사용 후 보관 기간
+        keep: 삭제하지 않을 파일 경로 (방금 만든 인덱스)
+
+    Returns:
+        int: 삭제한 파일 수
+    """
+    try:
+        names = os.listdir(INDEX_DIR)
+    except FileNotFoundError:
+        return 0
+
+    files = []
+    for name in names:
+        if not name.endswith(".idx"):
+            continue
+        path = os.path.join(INDEX_DIR, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    files.sort()
+
+    now = time.time()
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for mtime, size, path in files:
+        if total <= max_bytes and now - mtime <= max_age_seconds:
+            continue
+        if keep is not None and os.path.abspath(path) == os.path.abspath(keep):
+            continue
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"⚠️ 인덱스 파일 삭제 실패 ({path}): {e}")
+            continue
+        total -= size
+        removed += 1
+    if removed:
+        print(f"🧹 PDF 인덱스 {removed}개 삭제 (남은 용량 {total / 1024 / 1024:.1f}MB)")
+    return removed
+
+
+def _release_index(index: MmapIndex):
+    """사용 종료 - 캐시에서 밀려난 인덱스는 마지막 사용자가 닫음 (잠금 안에서 호출)"""
+    key = id(index)
+    _index_users[key] -= 1
+    if _index_users[key] == 0:
+        del _index_users[key]
+        retired = _retired_indexes.pop(key, None)
+        if retired is not None:
+            retired.close()
+
+
+def _evict_indexes():
+    """열린 인덱스가 INDEX_OPEN_MAX를 넘으면 가장 오래 쓰지 않은 것부터 닫음 (잠금 안에서 호출)"""
+    while len(_open_indexes) > INDEX_OPEN_MAX:
+        _, index = _open_indexes.popitem(last=False)
+        if _index_users.get(id(index)):
+            _retired_indexes[id(index)] = index
+        else:
+            index.close()
+
+
+@contextmanager
+def open_index(doc_hash: str) -> Iterator[Optional[MmapIndex]]:
+    """
+    문서 해시로 인덱스 열기 (with 문으로 사용) - 파일이 없으면 None
+
+    열린 인덱스는 INDEX_OPEN_MAX개까지 재사용하며, 캐시에서 밀려난 인덱스는 with 블록이 끝난 뒤에 닫힙니다.
+    """
+    with _open_lock:
+        index = _open_indexes.get(doc_hash)
+        if index is not None:
+            _open_indexes.move_to_end(doc_hash)
+        else:
+            path = index_path_for(doc_hash)
+            if not os.path.exists(path):
+                index = None
+            else:
+                index = MmapIndex(path)
+                _touch(path)
+                _open_indexes[doc_hash] = index
+        if index is not None:
+            _index_users[id(index)] = _index_users.get(id(index), 0) + 1
+            _evict_indexes()
+
+    try:
+        yield index
+    finally:
+        if index is not None:
+            with _open_lock:
+                _release_index(index)
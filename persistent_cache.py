@@ -0,0 +1,287 @@
+# persistent_cache.py
+
+"""
+SQLite 기반 영속 TTL 캐시
+- 프로세스 재시작 후에도 유지되며 여러 워커 프로세스가 같은 파일을 공유
+- 메모리 계층을 함께 두어 반복 조회는 디스크 접근 없이 반환
+- TTL이 지난 항목도 보존 기간 동안 남겨 두어 원본 API 장애 시 만료된 결과를 대신 제공
+- max_bytes를 지정하면 저장 용량이 넘을 때 오래된 항목부터 삭제
+- SingleFlight: 같은 키로 동시에 들어온 요청을 원본 호출 한 번으로 합침
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# 캐시 파일 위치
+CACHE_DIR = os.environ.get("CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+
+# 만료 후에도 장애 대비용으로 보존하는 기간 (초)
+DEFAULT_STALE_RETENTION = 30 * 24 * 3600
+
+# 메모리 계층 최대 항목 수
+MEMORY_MAX_ENTRIES = 1024
+
+
+@dataclass
+class CacheEntry:
+    """캐시 조회 결과"""
+    value: Any
+    stored_at: float
+    is_stale: bool
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.stored_at
+
+
+def normalize_text(text: str) -> str:
+    """캐시 키용 정규화 (NFKC, 소문자, 공백 정리)"""
+    return " ".join(unicodedata.normalize("NFKC", text).lower().split())
+
+
+def make_cache_key(*parts: Any) -> str:
+    """키 구성 요소를 JSON으로 직렬화한 뒤 SHA-256"""
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class PersistentCache:
+    """네임스페이스별 TTL 캐시 (값은 JSON 직렬화 가능해야 함)"""
+
+    def __init__(self, namespace: str, ttl_seconds: float, path: Optional[str] = None,
+                 stale_retention_seconds: float = DEFAULT_STALE_RETENTION,
+                 max_bytes: Optional[int] = None):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.stale_retention_seconds = stale_retention_seconds
+        self.max_bytes = max_bytes
+        self.path = path or os.path.join(CACHE_DIR, f"{namespace}.sqlite3")
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self._local = threading.local()
+        self._memory: Dict[str, tuple] = {}
+        self._memory_lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_stored_at ON cache(stored_at)")
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """스레드별 연결 (sqlite3 연결은 스레드 간 공유하지 않음)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, key: str, value: Any, stored_at: float):
+        with self._memory_lock:
+            if len(self._memory) >= MEMORY_MAX_ENTRIES and key not in self._memory:
+                self._memory.pop(next(iter(self._memory)))
+            self._memory[key] = (value, stored_at)
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[CacheEntry]:
+        """
+        캐시 조회
+
+        Args:
+            key: 캐시 키
+            allow_stale: True이면 TTL이 지난 항목도 is_stale=True로 반환
+
+        Returns:
+            Optional[CacheEntry]: 없으면 None
+        """
+        now = time.time()
+        with self._memory_lock:
+            cached = self._memory.get(key)
+        if cached is None:
+            try:
+                row = self._connection().execute(
+                    "SELECT value, stored_at FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"⚠️ 캐시 조회 실패 ({self.namespace}): {e}")
+                row = None
+            if row is not None:
+                cached = (json.loads(row[0]), row[1])
+                self._remember(key, *cached)
+
+        if cached is None:
+            self.misses += 1
+            return None
+
+        value, stored_at = cached
+        is_stale = now - stored_at > self.ttl_seconds
+        if is_stale and not allow_stale:
+            self.misses += 1
+            return None
+        if is_stale:
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        return CacheEntry(value=value, stored_at=stored_at, is_stale=is_stale)
+
+    def set(self, key: str, value: Any):
+        """캐시 저장 (보존 기간이 지난 항목, max_bytes를 넘는 오래된 항목은 함께 정리)"""
+        stored_at = time.time()
+        try:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), stored_at)
+            )
+            conn.execute(
+                "DELETE FROM cache WHERE stored_at < ?",
+                (stored_at - self.ttl_seconds - self.stale_retention_seconds,)
+            )
+            if self.max_bytes is not None:
+                self._evict_over_size(conn)
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ 캐시 저장 실패 ({self.namespace}): {e}")
+        self._remember(key, value, stored_at)
+
+    def _evict_over_size(self, conn: sqlite3.Connection):
+        """저장 용량(값의 UTF-8 바이트 합)이 max_bytes 이하가 될 때까지 오래된 항목부터 삭제"""
+        total = conn.execute("SELECT COALESCE(SUM(LENGTH(CAST(value AS BLOB))), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in conn.execute(
+            "SELECT key, LENGTH(CAST(value AS BLOB)) FROM cache ORDER BY stored_at"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM cache WHERE key = ?", evicted)
+        self.evictions += len(evicted)
+        with self._memory_lock:
+            for (key,) in evicted:
+                self._memory.pop(key, None)
+
+    def delete(self, key: str):
+        with self._memory_lock:
+            self._memory.pop(key, None)
+        conn = self._connection()
+        conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+        conn.commit()
+
+    def clear(self):
+        with self._memory_lock:
+            self._memory.clear()
+        conn = self._connection()
+        conn.execute("DELETE FROM cache")
+        conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """적중률 및 저장 항목 수"""
+        total = self.hits + self.stale_hits + self.misses
+        try:
+            entries, size_bytes = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(value AS BLOB))), 0) FROM cache"
+            ).fetchone()
+        except sqlite3.Error:
+            entries = size_bytes = None
+        return {
+            "namespace": self.namespace,
+            "entries": entries,
+            "size_bytes": size_bytes,
+            "evictions": self.evictions,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.stale_hits) / total * 100, 1) if total else 0.0,
+        }
+
+
+class _Flight:
+    """진행 중인 호출 하나 (결과를 기다리는 모든 호출자가 공유)"""
+    __slots__ = ("done", "value", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    같은 키의 동시 호출 병합
+
+    먼저 들어온 호출만 fn을 실행하고, 실행 중에 같은 키로 들어온 호출은 그 결과(또는 예외)를 함께 받습니다.
+    호출이 끝나면 키가 비워지므로 이후 호출은 다시 fn을 실행합니다 (결과 보관은 캐시의 역할).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self.calls = 0
+        self.merged = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Args:
+            key: 병합 기준 키
+            fn: 원본 호출
+
+        Returns:
+            Tuple[Any, bool]: (결과, 다른 호출의 결과를 공유했는지 여부)
+
+        Raises:
+            fn이 던진 예외 (대기 중이던 호출자에게도 같은 예외 전달)
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                self.merged += 1
+                leader = False
+            else:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.calls += 1
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, True
+
+        try:
+            flight.value = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+        return flight.value, False
+
+    def stats(self) -> Dict[str, int]:
+        """원본 호출 수와 병합된 호출 수"""
+        with self._lock:
+            in_flight = len(self._flights)
+        return {"calls": self.calls, "merged": self.merged, "in_flight": in_flight}
@@ -0,0 +1,96 @@
+# prompt_anatomy.py
+
+"""
+프롬프트 구성 분석 기록
+- 단계별 섹션 추정 토큰 수를 콘솔과 세션(prompt_anatomy_log)에 기록
+- 관리자 화면용 프로세스 전체 기록 및 블록별 집계 (평균 대비 급증 단계 표시)
+"""
+
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import streamlit as st
+
+# 프로세스 전체 기록 최대 건수
+ANATOMY_LOG_MAX_SIZE = 500
+
+# 블록 평균 대비 이 배율을 넘으면 급증으로 표시
+REGRESSION_RATIO = 1.3
+
+_anatomy_log: deque = deque(maxlen=ANATOMY_LOG_MAX_SIZE)
+_anatomy_lock = threading.Lock()
+
+
+def record_prompt_anatomy(step_id: str, step_title: str, breakdown: Dict[str, int], user: Optional[str] = None) -> Dict:
+    """
+    단계 프롬프트의 섹션별 토큰 수 기록
+
+    Args:
+        step_id: 블록 ID
+        step_title: 블록 제목
+        breakdown: convert_dsl_to_prompt(..., return_breakdown=True)의 섹션별 추정 토큰
+        user: 실행 사용자 (기본값: 현재 로그인 사용자)
+
+    Returns:
+        Dict: 기록된 항목
+    """
+    entry = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "user": user if user is not None else st.session_state.get("current_user"),
+        "step_id": step_id,
+        "step": step_title,
+        **breakdown,
+    }
+
+    sections = ", ".join(f"{name} {tokens:,}" for name, tokens in breakdown.items() if name != "total")
+    print(f"🧮 프롬프트 구성 [{step_id}] 총 {breakdown.get('total', 0):,} 토큰 - {sections}")
+
+    with _anatomy_lock:
+        _anatomy_log.append(entry)
+    if "prompt_anatomy_log" not in st.session_state:
+        st.session_state.prompt_anatomy_log = []
+    st.session_state.prompt_anatomy_log.append(entry)
+    return entry
+
+
+def get_prompt_anatomy_log() -> List[Dict]:
+    """프로세스 전체 기록 (오래된 순)"""
+    with _anatomy_lock:
+        return list(_anatomy_log)
+
+
+def summarize_prompt_anatomy(entries: Optional[List[Dict]] = None) -> List[Dict]:
+    """
+    블록별 프롬프트 크기 집계
+
+    Returns:
+        List[Dict]: 블록별 실행 횟수, 평균/최대/최근 총 토큰, 가장 큰 섹션,
+            급증 여부 (최근 값이 이전 실행 평균의 REGRESSION_RATIO배 초과)
+    """
+    entries = get_prompt_anatomy_log() if entries is None else entries
+    by_step: Dict[str, List[Dict]] = {}
+    for entry in entries:
+        by_step.setdefault(entry["step_id"], []).append(entry)
+
+    summary = []
+    for step_id, step_entries in by_step.items():
+        totals = [e.get("total", 0) for e in step_entries]
+        last = step_entries[-1]
+        average = sum(totals) / len(totals)
+        previous = totals[:-1]
+        sections = {k: v for k, v in last.items()
+                    if isinstance(v, int) and k != "total"}
+        summary.append({
+            "step_id": step_id,
+            "step": last["step"],
+            "runs": len(totals),
+            "avg_total": round(average),
+            "max_total": max(totals),
+            "last_total": totals[-1],
+            "largest_section": max(sections, key=sections.get) if sections else "",
+            "regression": bool(previous) and totals[-1] > sum(previous) / len(previous) * REGRESSION_RATIO,
+        })
+    summary.sort(key=lambda row: row["last_total"], reverse=True)
+    return summary
@@ -0,0 +1,104 @@
+# prompt_caching.py
+
+"""
+Anthropic 프롬프트 캐싱 지원
+- 고정 접두부(핵심 원칙·프로젝트·PDF 맥락, 블록 DSL)의 구간마다 cache_control 지정
+- 응답 usage에서 캐시 생성/읽기 토큰 수 집계
+"""
+
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+# 캐시 지점 표시 (5분 TTL ephemeral 캐시)
+CACHE_CONTROL = {"type": "ephemeral"}
+
+# 요청 하나에 지정할 수 있는 최대 캐시 지점 수
+MAX_CACHE_BREAKPOINTS = 4
+
+
+class CachePrefix(str):
+    """
+    캐시 지점이 여러 개인 고정 접두부
+
+    문자열로는 구간을 빈 줄로 이은 전체 텍스트와 같아 기존 str 접두부와 똑같이 쓸 수 있고,
+    build_message_content는 구간마다 cache_control을 붙입니다.
+    """
+
+    segments: tuple
+
+    def __new__(cls, segments: Iterable[str]):
+        segments = tuple(segment for segment in segments if segment)
+        if len(segments) > MAX_CACHE_BREAKPOINTS:
+            raise ValueError(f"캐시 지점은 최대 {MAX_CACHE_BREAKPOINTS}개입니다: {len(segments)}")
+        prefix = super().__new__(cls, "\n\n".join(segments))
+        prefix.segments = segments
+        return prefix
+
+
+def build_message_content(prompt: str, cache_prefix: Optional[str] = None) -> Union[str, List[Dict[str, Any]]]:
+    """
+    user 메시지 content 생성
+
+    Args:
+        prompt: 가변 접미부 (또는 캐시를 쓰지 않을 때 전체 프롬프트)
+        cache_prefix: 요청 간에 동일한 고정 접두부 (CachePrefix이면 구간마다 캐시 지점 지정)
+
+    Returns:
+        캐시 접두부가 없으면 문자열, 있으면 cache_control이 붙은 텍스트 블록 목록
+    """
+    if not cache_prefix:
+        return prompt
+
+    segments = getattr(cache_prefix, "segments", None) or (cache_prefix,)
+    content = [{"type": "text", "text": segment, "cache_control": dict(CACHE_CONTROL)} for segment in segments]
+    if prompt:
+        content.append({"type": "text", "text": prompt})
+    return content
+
+
+def extract_usage(response) -> Dict[str, int]:
+    """응답 usage를 dict로 변환 (캐시 필드가 없는 SDK 버전은 0)"""
+    usage = getattr(response, "usage", None)
+    return {
+        "input_tokens": getattr(usage, "input_tokens", 0) or 0,
+        "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+        "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", 0) or 0,
+        "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", 0) or 0,
+    }
+
+
+class CacheUsageStats:
+    """프로세스 전체 캐시 사용량 누계"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.totals = {
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0,
+        }
+        self.last: Dict[str, int] = {}
+
+    def record(self, usage: Dict[str, int]):
+        with self._lock:
+            self.requests += 1
+            for key in self.totals:
+                self.totals[key] += usage.get(key, 0)
+            self.last = dict(usage)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            prompt_tokens = (self.totals["input_tokens"] + self.totals["cache_creation_input_tokens"]
+                             + self.totals["cache_read_input_tokens"])
+            return {
+                "requests": self.requests,
+                **self.totals,
+                "cache_read_ratio": round(self.totals["cache_read_input_tokens"] / prompt_tokens * 100, 1)
+                if prompt_tokens else 0.0,
+                "last": dict(self.last),
+            }
+
+
+cache_usage_stats = CacheUsageStats()
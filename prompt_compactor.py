@@ -0,0 +1,137 @@
+# prompt_compactor.py
+
+"""
+DSL 생성 프롬프트 압축
+- 반복되는 지시문(⚠️ 중요 지시사항, 블록 고유 분석 안내) 축약
+- 출력 구조의 자리표시 줄 제거, 제목 이모지 제거, 공백 정리
+- 이미 나온 목록 항목(예: 평가 기준과 같은 검증 규칙) 제거
+- 출력 섹션 구성(구조 제목, 섹션 템플릿, 필수 컬럼, 필수 문구)이 그대로인지 검증
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List
+
+from utils import estimate_tokens
+
+# 출력 구조 아래 6줄 지시사항 → 한 줄 요약
+_IMPORTANT_BLOCK = re.compile(r"⚠️ \*\*중요 지시사항:\*\*\n(?:\d+\. .*\n?){1,6}")
+COMPACT_INSTRUCTIONS = (
+    "⚠️ 각 구조는 '## 번호. 구조명'으로 시작하고, 빠짐없이·중복 없이 해당 내용만 작성하며, "
+    "이 블록의 고유한 분석만 포함하세요."
+)
+
+# 위 요약과 중복되는 안내문
+_REDUNDANT_LINES = [
+    re.compile(r"^\*\*분석 목적:\*\* 이 블록만의 고유한 분석을 수행하세요\.$"),
+    re.compile(r"^\*\*중요: 이 블록\(.*\)의 고유한 분석만 수행하세요\.\*\*$"),
+    re.compile(r"^다음 구조로 분석 결과를 제공하세요\..*$"),
+]
+
+# 출력 구조 자리표시 줄: [X에 해당하는 내용만 여기에 작성]
+_PLACEHOLDER_LINE = re.compile(r"^\[.+에 해당하는 내용만 여기에 작성\]$")
+
+# 제목 앞 이모지·기호
+_HEADING_EMOJI = re.compile(r"^(#{1,6} )[^\w\s#*\[(]+\s*")
+
+# 목록 항목 (들여쓰기 없는 것만 - 섹션별 필수 컬럼처럼 들여쓴 항목과 "필수 컬럼:" 같은 라벨 항목은 반복이 의미 있음)
+_LIST_ITEM = re.compile(r"^(?:-|\d+\.)\s+(.*)$")
+_LABEL_LINE = re.compile(r"^[^#\-\d].{0,20}:$")
+
+
+@lru_cache(maxsize=256)
+def compact_prompt(text: str) -> str:
+    """
+    프롬프트 텍스트 압축
+
+    Args:
+        text: DSL에서 생성된 프롬프트 (또는 그 정적 구간)
+
+    Returns:
+        str: 압축된 프롬프트
+    """
+    text = _IMPORTANT_BLOCK.sub(COMPACT_INSTRUCTIONS + "\n", text)
+
+    lines = []
+    seen_items = set()
+    for raw_line in text.split("\n"):
+        line = raw_line.rstrip()
+        stripped = line.strip()
+
+        if _PLACEHOLDER_LINE.match(stripped) or any(p.match(stripped) for p in _REDUNDANT_LINES):
+            continue
+
+        line = _HEADING_EMOJI.sub(r"\1", line)
+        line = re.sub(r"^ {3,}", "", line)  # 과도한 들여쓰기 (2칸 들여쓴 필수 컬럼은 유지)
+
+        item = _LIST_ITEM.match(line)
+        if item and not item.group(1).rstrip("*").endswith(":"):
+            key = re.sub(r"\s+", " ", item.group(1)).strip()
+            if key in seen_items:
+                continue
+            seen_items.add(key)
+
+        lines.append(line)
+
+    # 항목이 모두 제거된 라벨 줄(예: "검증 규칙:") 제거
+    cleaned = []
+    for i, line in enumerate(lines):
+        if _LABEL_LINE.match(line.strip()):
+            following = next((l for l in lines[i + 1:] if l.strip()), "")
+            if not _LIST_ITEM.match(following) and not following.startswith("  "):
+                continue
+        cleaned.append(line)
+
+    compacted = "\n".join(cleaned)
+    compacted = re.sub(r"\n{3,}", "\n\n", compacted)
+    return compacted.strip()
+
+
+def extract_section_coverage(prompt: str) -> Dict[str, List[str]]:
+    """
+    프롬프트가 요구하는 출력 섹션 구성 추출
+
+    Returns:
+        Dict[str, List[str]]: 출력 구조 제목, 섹션 템플릿 이름, 섹션별 필수 컬럼, 필수 포함 문구
+    """
+    section_templates = re.findall(r"^### (.+):$", prompt, re.M)
+    template_bodies = re.split(r"^### .+:$", prompt, flags=re.M)[1:]
+    required_columns = [
+        f"{name}: " + ", ".join(re.findall(r"^  \d+\. (.+)$", body, re.M))
+        for name, body in zip(section_templates, template_bodies)
+        if "필수 컬럼" in body
+    ]
+    return {
+        "output_sections": re.findall(r"^## (\d+\. .+)$", prompt, re.M),
+        "section_templates": section_templates,
+        "required_columns": required_columns,
+        "required_phrases": re.findall(r"필수 포함 문구: (.+)$", prompt, re.M),
+    }
+
+
+def verify_section_coverage(original: str, compacted: str) -> List[str]:
+    """
+    압축 전후 출력 섹션 구성 비교
+
+    Returns:
+        List[str]: 차이 설명 (비어 있으면 동일)
+    """
+    before = extract_section_coverage(original)
+    after = extract_section_coverage(compacted)
+    return [
+        f"{key}: {before[key]} → {after[key]}"
+        for key in before
+        if before[key] != after[key]
+    ]
+
+
+def compaction_report(original: str, compacted: str) -> Dict[str, int]:
+    """압축 전후 추정 토큰 수"""
+    original_tokens = estimate_tokens(original)
+    compact_tokens = estimate_tokens(compacted)
+    return {
+        "original_tokens": original_tokens,
+        "compact_tokens": compact_tokens,
+        "saved_tokens": original_tokens - compact_tokens,
+        "saved_percent": round((original_tokens - compact_tokens) / original_tokens * 100, 1) if original_tokens else 0.0,
+    }
@@ -1,6 +1,11 @@
 #prompt_loader.py
 
 import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+from block_model import PromptBlock, build_block_models
 
 # ✅ 핵심 원칙 선언 블록 (항상 맨 앞에 삽입됨)
 CORE_PRINCIPLES_BLOCK = {
@@ -15,23 +20,106 @@ CORE_PRINCIPLES_BLOCK = {
 }
 
 
+class PromptBlockRegistry:
+    """
+    프로세스 전역 프롬프트 블럭 레지스트리
+    
+    JSON은 한 번만 파싱하고, 파일 수정 시각(mtime)이 바뀌었을 때만 다시 읽습니다.
+    블럭 ID로 O(1) 조회가 가능합니다.
+    로드할 때 모든 블럭을 검증된 PromptBlock 모델로 변환하며, 스키마 오류는 BlockValidationError로 즉시 실패합니다.
+    """
+    
+    def __init__(self, json_path: str = "prompt_blocks_dsl.json"):
+        self.json_path = json_path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._core: List[dict] = []
+        self._extra: List[dict] = []
+        self._by_id: Dict[str, dict] = {}
+        self._models: Dict[str, PromptBlock] = {}
+        self.load_count = 0
+    
+    def _refresh(self):
+        """파일이 변경되었으면 다시 로드"""
+        mtime = os.stat(self.json_path).st_mtime_ns
+        if mtime == self._mtime:
+            return
+        
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            
+            with open(self.json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            
+            # JSON에서 default_intro 로드
+            default_intro = data.get("default_intro", {})
+            core = [default_intro] if default_intro else []
+            
+            # JSON에 정의된 나머지 블럭
+            extra = data["blocks"] if isinstance(data, dict) else []
+            models = build_block_models(extra)
+            
+            self._core = core
+            self._extra = extra
+            self._by_id = {block["id"]: block for block in extra}
+            self._models = models
+            self._mtime = mtime
+            self.load_count += 1
+    
+    def get_blocks(self) -> dict:
+        """load_prompt_blocks와 같은 형식 반환 (리스트는 호출자별 복사본)"""
+        self._refresh()
+        return {
+            "core": list(self._core),
+            "extra": list(self._extra)
+        }
+    
+    def get_extra_blocks(self) -> List[dict]:
+        """분석 블럭 목록"""
+        self._refresh()
+        return list(self._extra)
+    
+    def get_block(self, block_id: str) -> Optional[dict]:
+        """블럭 ID로 조회"""
+        self._refresh()
+        return self._by_id.get(block_id)
+    
+    def get_blocks_by_id(self) -> Dict[str, dict]:
+        """블럭 ID → 블럭 매핑"""
+        self._refresh()
+        return dict(self._by_id)
+    
+    def get_block_model(self, block_id: str) -> Optional[PromptBlock]:
+        """블럭 ID로 검증된 모델 조회"""
+        self._refresh()
+        return self._models.get(block_id)
+    
+    def get_block_models(self) -> List[PromptBlock]:
+        """검증된 블럭 모델 목록 (JSON 순서)"""
+        self._refresh()
+        return list(self._models.values())
+
+
+_registries: Dict[str, PromptBlockRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_prompt_block_registry(json_path="prompt_blocks_dsl.json") -> PromptBlockRegistry:
+    """경로별 레지스트리 반환 (프로세스 전체에서 공유)"""
+    key = os.path.abspath(json_path)
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = PromptBlockRegistry(key)
+        return _registries[key]
+
+
 def load_prompt_blocks(json_path="prompt_blocks_dsl.json"):
     """
     고정 블럭(core)은 따로, 나머지 분석 블럭은 따로 리턴.
+    레지스트리에 캐시된 결과를 사용하므로 rerun마다 JSON을 다시 파싱하지 않음.
     """
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    
-    # JSON에서 default_intro 로드
-    default_intro = data.get("default_intro", {})
-    core = [default_intro] if default_intro else []
-    
-    # JSON에 정의된 나머지 블럭
-    extra = data["blocks"] if isinstance(data, dict) else []
-    return {
-        "core": core,      # 리스트 형태
-        "extra": extra     # 리스트 형태
-    }
+    return get_prompt_block_registry(json_path).get_blocks()
 
 
 
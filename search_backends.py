@@ -0,0 +1,204 @@
+# search_backends.py
+
+"""
+웹 검색 백엔드
+- 검색 제공자별 구현을 같은 인터페이스(search → SearchResult 목록)로 통일
+- serpapi: SerpAPI Google 검색 (공유 세션으로 연결 재사용)
+- fixture: 네트워크 없이 JSON 픽스처/결정적 결과를 반환 (성능 테스트, CI용)
+- 사용할 백엔드는 환경 변수 SEARCH_BACKEND로 선택 (기본 serpapi)
+"""
+
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from persistent_cache import normalize_text
+
+# 기본 백엔드 (serpapi | fixture)
+DEFAULT_SEARCH_BACKEND = "serpapi"
+
+# 동시 검색 스레드 수 (연결 풀 크기와 동일하게 맞춤)
+SEARCH_MAX_WORKERS = int(os.environ.get("SEARCH_MAX_WORKERS", 8))
+
+# 픽스처 백엔드 설정
+SEARCH_FIXTURE_PATH = os.environ.get(
+    "SEARCH_FIXTURE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "search_fixtures.json")
+)
+SEARCH_FIXTURE_LATENCY = float(os.environ.get("SEARCH_FIXTURE_LATENCY", 0))
+
+
+@dataclass
+class SearchResult:
+    """검색 결과 항목"""
+    title: str
+    snippet: str
+    link: str = ""
+
+    def to_dict(self) -> Dict[str, str]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SearchResult":
+        return cls(
+            title=data.get("title") or "제목 없음",
+            snippet=data.get("snippet") or "내용 없음",
+            link=data.get("link") or "",
+        )
+
+
+class SearchBackendError(Exception):
+    """
+    검색 실패
+
+    Attributes:
+        message: 화면에 표시할 안내 메시지
+        error_text: 검색 결과 대신 반환할 오류 문자열
+        level: 안내 메시지에 사용할 st 함수 이름 (error, warning, info)
+    """
+
+    def __init__(self, message: str, error_text: str, level: str = "error"):
+        super().__init__(message)
+        self.message = message
+        self.error_text = error_text
+        self.level = level
+
+
+class SearchBackend(ABC):
+    """검색 백엔드 인터페이스"""
+
+    name = "base"
+
+    @abstractmethod
+    def search(self, query: str, gl: str = "kr", hl: str = "ko", num: int = 3) -> List[SearchResult]:
+        """
+        검색 실행
+
+        Returns:
+            List[SearchResult]: 결과가 없으면 빈 목록
+
+        Raises:
+            SearchBackendError: API 키 없음, API 오류, 시간 초과, 네트워크 오류
+        """
+
+
+class SerpApiBackend(SearchBackend):
+    """SerpAPI Google 검색"""
+
+    name = "serpapi"
+    endpoint = "https://serpapi.com/search"
+
+    def __init__(self, api_key: Optional[str], timeout: float = 10):
+        self.api_key = api_key
+        self.timeout = timeout
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """공유 HTTP 세션 (keep-alive 연결 재사용, 동시 검색 스레드 수만큼 연결 풀 확보)"""
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=SEARCH_MAX_WORKERS)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    def search(self, query: str, gl: str = "kr", hl: str = "ko", num: int = 3) -> List[SearchResult]:
+        if not self.api_key:
+            raise SearchBackendError("⚠️ SERP_API_KEY가 설정되지 않았습니다.", "[검색 API 키 없음]", level="warning")
+
+        params = {
+            "q": query,
+            "api_key": self.api_key,
+            "engine": "google",
+            "num": num,
+            "gl": gl,  # 한국 지역 설정
+            "hl": hl   # 한국어 결과
+        }
+        try:
+            resp = self.session.get(self.endpoint, params=params, timeout=self.timeout)
+        except requests.exceptions.Timeout:
+            raise SearchBackendError("❌ 검색 시간 초과", "[검색 시간 초과]") from None
+        except requests.exceptions.RequestException as e:
+            raise SearchBackendError(f"❌ 네트워크 오류: {e}", f"[네트워크 오류: {e}]") from None
+
+        # 응답 상태 확인
+        if resp.status_code != 200:
+            raise SearchBackendError(f"❌ SerpAPI 오류: {resp.status_code}", f"[검색 API 오류: {resp.status_code}]")
+
+        data = resp.json()
+
+        # 오류 응답 확인
+        if "error" in data:
+            raise SearchBackendError(f"❌ SerpAPI 오류: {data['error']}", f"[검색 API 오류: {data['error']}]")
+
+        return [SearchResult.from_dict(r) for r in data.get("organic_results") or []]
+
+
+class FixtureBackend(SearchBackend):
+    """
+    오프라인 픽스처 검색
+
+    픽스처 파일({"검색어": [{"title", "snippet", "link"}, ...]})에 있는 검색어는 그 결과를,
+    없는 검색어는 검색어로부터 만든 결정적 결과를 반환합니다. latency로 네트워크 지연을 흉내 낼 수 있습니다.
+    """
+
+    name = "fixture"
+
+    def __init__(self, path: Optional[str] = SEARCH_FIXTURE_PATH, latency: float = SEARCH_FIXTURE_LATENCY):
+        self.path = path
+        self.latency = latency
+        self.fixtures: Dict[str, List[Dict[str, Any]]] = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.fixtures = {normalize_text(query): results for query, results in json.load(f).items()}
+
+    def search(self, query: str, gl: str = "kr", hl: str = "ko", num: int = 3) -> List[SearchResult]:
+        if self.latency:
+            time.sleep(self.latency)
+
+        results = self.fixtures.get(normalize_text(query))
+        if results is None:
+            results = [
+                {
+                    "title": f"{query} - 참고 자료 {i}",
+                    "snippet": f"{query}에 대한 오프라인 픽스처 검색 결과 {i}입니다.",
+                    "link": f"https://fixture.invalid/{i}",
+                }
+                for i in range(1, num + 1)
+            ]
+        return [SearchResult.from_dict(r) for r in results[:num]]
+
+
+# 백엔드 이름 → 생성 함수
+SEARCH_BACKENDS = {
+    SerpApiBackend.name: lambda api_key: SerpApiBackend(api_key),
+    FixtureBackend.name: lambda api_key: FixtureBackend(),
+}
+
+
+def create_search_backend(name: Optional[str] = None, api_key: Optional[str] = None) -> SearchBackend:
+    """
+    검색 백엔드 생성
+
+    Args:
+        name: 백엔드 이름 (None이면 SEARCH_BACKEND 환경 변수, 없으면 serpapi)
+        api_key: 검색 API 키 (serpapi만 사용)
+
+    Raises:
+        ValueError: 알 수 없는 백엔드 이름
+    """
+    name = (name or os.environ.get("SEARCH_BACKEND") or DEFAULT_SEARCH_BACKEND).strip().lower()
+    if name not in SEARCH_BACKENDS:
+        raise ValueError(f"알 수 없는 검색 백엔드: {name} (사용 가능: {', '.join(SEARCH_BACKENDS)})")
+    return SEARCH_BACKENDS[name](api_key)
@@ -1,8 +1,14 @@
 # search_helper.py
-import requests
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Optional, Tuple
 import streamlit as st
 from dotenv import load_dotenv
+from persistent_cache import PersistentCache, SingleFlight, make_cache_key, normalize_text
+from search_backends import (
+    SEARCH_MAX_WORKERS, SearchBackend, SearchBackendError, SearchResult, create_search_backend
+)
 
 # .env 파일 로드
 load_dotenv()
@@ -14,57 +20,269 @@ SERP_API_KEY = st.secrets.get("SERP_API_KEY")
 if not SERP_API_KEY:
     SERP_API_KEY = os.environ.get("SERP_API_KEY")
 
-def search_web_serpapi(query):
-    """웹 검색 함수 - 오류 처리 및 디버깅 강화"""
+# 검색 결과 캐시 (백엔드 + 정규화된 검색어 + 지역/언어/결과 수 기준, 기본 1일)
+SEARCH_CACHE_TTL = int(os.environ.get("SEARCH_CACHE_TTL", 24 * 3600))
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+# 같은 검색이 동시에 여러 번 들어오면 (블록 간 중복 검색어, 같은 용도의 동시 사용자, 미리 가져오기) 원본 호출 한 번으로 합침
+_search_flight = SingleFlight()
+
+# 블록당 여러 검색어를 동시에 실행 (전체 마감 시간)
+SEARCH_DEADLINE = float(os.environ.get("SEARCH_DEADLINE", 12))
+_search_backend = None
+_search_executor = None
+_search_backend_lock = threading.Lock()
+
+
+def get_search_cache() -> PersistentCache:
+    """웹 검색 결과 캐시 (프로세스 전체 공유, 첫 사용 시 생성)"""
+    global _search_cache
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = PersistentCache("web_search", ttl_seconds=SEARCH_CACHE_TTL)
+        return _search_cache
+
+
+def search_cache_key(backend_name: str, query: str, gl: str = "kr", hl: str = "ko", num: int = 3) -> str:
+    """백엔드 + 검색어 정규화 + 지역/언어/결과 수로 캐시 키 생성"""
+    return make_cache_key(backend_name, normalize_text(query), gl, hl, num)
+
+
+def get_search_backend() -> SearchBackend:
+    """검색 백엔드 (SEARCH_BACKEND 환경 변수로 선택, 프로세스 전체 공유)"""
+    global _search_backend
+    with _search_backend_lock:
+        if _search_backend is None:
+            _search_backend = create_search_backend(api_key=SERP_API_KEY)
+        return _search_backend
+
+
+def get_search_flight_stats() -> dict:
+    """검색 병합 통계 (원본 호출 수, 병합된 호출 수)"""
+    return _search_flight.stats()
+
+
+def set_search_backend(backend: Optional[SearchBackend]):
+    """검색 백엔드 교체 (None이면 다음 검색 시 SEARCH_BACKEND 기준으로 다시 생성)"""
+    global _search_backend
+    with _search_backend_lock:
+        _search_backend = backend
+
+
+def get_search_executor() -> ThreadPoolExecutor:
+    """검색 동시 실행용 스레드 풀 (프로세스 전체 공유)"""
+    global _search_executor
+    with _search_backend_lock:
+        if _search_executor is None:
+            _search_executor = ThreadPoolExecutor(max_workers=SEARCH_MAX_WORKERS, thread_name_prefix="web-search")
+        return _search_executor
+
+
+def format_search_results(results: List[SearchResult], summaries: Optional[dict] = None) -> str:
+    """프롬프트에 넣을 검색 결과 텍스트 (summaries: 링크 → 본문 요약, 있으면 스니펫 뒤에 덧붙임)"""
+    formatted_results = []
+    for r in results:
+        text = f"📄 {r.title}\n{r.snippet}"
+        summary = (summaries or {}).get(r.link)
+        if summary:
+            text += f"\n📝 본문 요약: {summary}"
+        formatted_results.append(text)
+    return "\n---\n".join(formatted_results)
+
+
+def fetch_web_results(query, gl: str = "kr", hl: str = "ko", num: int = 3, use_cache: bool = True
+                      ) -> Tuple[Optional[List[SearchResult]], str, List[Tuple[str, str]]]:
+    """
+    웹 검색 (Streamlit 호출 없음 - 작업 스레드에서 사용 가능)
     
-    # API 키 확인
-    if not SERP_API_KEY:
-        st.warning("⚠️ SERP_API_KEY가 설정되지 않았습니다.")
-        return "[검색 API 키 없음]"
+    같은 검색어는 영속 캐시에서 바로 반환하며, 검색이 실패하면 만료된 캐시 결과라도 대신 반환합니다.
+    
+    Returns:
+        Tuple: (결과 목록 - 실패 시 None, 실패 시 반환할 오류 문자열, [(st 함수 이름, 메시지)])
+    """
+    notices: List[Tuple[str, str]] = []
+    backend = get_search_backend()
+    cache_key = search_cache_key(backend.name, query, gl, hl, num)
+    cache = get_search_cache() if use_cache else None
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return [SearchResult.from_dict(r) for r in cached.value], "", notices
+    
+    def search_once() -> List[SearchResult]:
+        # 앞선 호출이 방금 끝났다면 캐시에 이미 결과가 있음
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return [SearchResult.from_dict(r) for r in cached.value]
+        results = backend.search(query, gl=gl, hl=hl, num=num)
+        if results and cache is not None:
+            cache.set(cache_key, [r.to_dict() for r in results])
+        return results
     
     try:
-        params = {
-            "q": query,
-            "api_key": SERP_API_KEY,
-            "engine": "google",
-            "num": 3,
-            "gl": "kr",  # 한국 지역 설정
-            "hl": "ko"   # 한국어 결과
-        }
-        
-        resp = requests.get("https://serpapi.com/search", params=params, timeout=10)
-        
-        # 응답 상태 확인
-        if resp.status_code != 200:
-            st.error(f"❌ SerpAPI 오류: {resp.status_code}")
-            return f"[검색 API 오류: {resp.status_code}]"
-        
-        data = resp.json()
-        
-        # 오류 응답 확인
-        if "error" in data:
-            st.error(f"❌ SerpAPI 오류: {data['error']}")
-            return f"[검색 API 오류: {data['error']}]"
-        
-        # 결과 처리
-        if "organic_results" in data and data["organic_results"]:
-            results = data["organic_results"]
-            formatted_results = []
-            for r in results:
-                title = r.get('title', '제목 없음')
-                snippet = r.get('snippet', '내용 없음')
-                formatted_results.append(f"📄 {title}\n{snippet}")
-            return "\n---\n".join(formatted_results)
+        # 캐시를 쓰지 않는 호출은 병합하지 않음 (항상 새로 검색)
+        if cache is not None:
+            results, _ = _search_flight.do(cache_key, search_once)
         else:
-            st.info("ℹ️ 검색 결과가 없습니다.")
-            return "[검색 결과 없음]"
-            
-    except requests.exceptions.Timeout:
-        st.error("❌ 검색 시간 초과")
-        return "[검색 시간 초과]"
-    except requests.exceptions.RequestException as e:
-        st.error(f"❌ 네트워크 오류: {e}")
-        return f"[네트워크 오류: {e}]"
+            results = search_once()
+    except Exception as e:
+        if isinstance(e, SearchBackendError):
+            notices.append((e.level, e.message))
+            error_text = e.error_text
+        else:
+            notices.append(("error", f"❌ 예상치 못한 오류: {e}"))
+            error_text = f"[검색 오류: {e}]"
+        
+        # 검색 실패 시 만료된 캐시 결과 사용
+        stale = cache.get(cache_key, allow_stale=True) if cache is not None else None
+        if stale is not None:
+            notices.append(("info", f"ℹ️ 검색 API를 사용할 수 없어 {int(stale.age_seconds // 3600)}시간 전 캐시 결과를 사용합니다."))
+            return [SearchResult.from_dict(r) for r in stale.value], "", notices
+        return None, error_text, notices
+    
+    return results, "", notices
+
+
+def fetch_web_search(query, gl: str = "kr", hl: str = "ko", num: int = 3,
+                     use_cache: bool = True, enrich: bool = False) -> Tuple[str, List[Tuple[str, str]]]:
+    """
+    웹 검색 결과 텍스트 (Streamlit 호출 없음)
+    
+    Args:
+        enrich: True이면 결과 페이지 본문을 가져와 추출 요약을 덧붙임 (page_enrichment)
+    
+    Returns:
+        Tuple[str, List[Tuple[str, str]]]: (검색 결과 또는 오류 문자열, [(st 함수 이름, 메시지)])
+    """
+    results, error_text, notices = fetch_web_results(query, gl=gl, hl=hl, num=num, use_cache=use_cache)
+    if results is None:
+        return error_text, notices
+    if not results:
+        notices.append(("info", "ℹ️ 검색 결과가 없습니다."))
+        return "[검색 결과 없음]", notices
+    summaries = None
+    if enrich:
+        from page_enrichment import enrich_search_results
+        summaries = enrich_search_results(query, results, use_cache=use_cache)
+    return format_search_results(results, summaries), notices
+
+
+def show_search_notices(notices: List[Tuple[str, str]]):
+    """fetch_web_search가 모아 둔 안내 메시지를 화면에 표시 (메인 스크립트 스레드에서 호출)"""
+    for level, message in notices:
+        getattr(st, level)(message)
+
+
+def search_web(query, gl: str = "kr", hl: str = "ko", num: int = 3, use_cache: bool = True):
+    """
+    웹 검색 함수 - 오류 처리 및 디버깅 강화
+    
+    설정된 검색 백엔드(SEARCH_BACKEND)를 사용하며, 같은 검색어는 영속 캐시에서 바로 반환하고
+    검색이 실패하면 만료된 캐시 결과라도 대신 반환합니다.
+    """
+    result, notices = fetch_web_search(query, gl=gl, hl=hl, num=num, use_cache=use_cache)
+    show_search_notices(notices)
+    return result
+
+
+# 기존 호출부 호환
+search_web_serpapi = search_web
+
+
+def search_web_many(queries: List[str], deadline: Optional[float] = None,
+                    use_cache: bool = True, enrich: bool = False) -> List[Tuple[str, Optional[str]]]:
+    """
+    여러 검색어를 동시에 검색
+    
+    전체 소요 시간은 가장 느린 검색어 하나로 제한되며, 마감 시간까지 끝나지 않은 검색어는 결과 없이 건너뜁니다.
+    
+    Args:
+        queries: 검색어 목록
+        deadline: 전체 마감 시간 (초, None이면 SEARCH_DEADLINE)
+        use_cache: 영속 캐시 사용 여부
+        enrich: 결과 페이지 본문 요약 포함 여부 (마감 시간에 페이지 보강 마감 시간이 더해짐)
+    
+    Returns:
+        List[Tuple[str, Optional[str]]]: 입력 순서대로 (검색어, 결과 또는 None)
+    """
+    deadline = SEARCH_DEADLINE if deadline is None else deadline
+    if enrich:
+        from page_enrichment import PAGE_ENRICH_DEADLINE
+        deadline += PAGE_ENRICH_DEADLINE
+    executor = get_search_executor()
+    futures = {
+        executor.submit(fetch_web_search, query, use_cache=use_cache, enrich=enrich): query
+        for query in queries
+    }
+    done, not_done = wait(futures, timeout=deadline)
+    
+    results = []
+    notices: List[Tuple[str, str]] = []
+    for future, query in futures.items():
+        if future in not_done:
+            future.cancel()
+            print(f"웹 검색 마감 시간 초과 ({query}): {deadline}초")
+            results.append((query, None))
+            continue
+        try:
+            result, query_notices = future.result()
+        except Exception as e:
+            print(f"웹 검색 실패 ({query}): {e}")
+            results.append((query, None))
+            continue
+        # 같은 안내가 검색어마다 반복되지 않도록 한 번씩만 표시
+        notices.extend(notice for notice in query_notices if notice not in notices)
+        results.append((query, result))
+    
+    show_search_notices(notices)
+    return results
+
+
+def prefetch_web_searches(queries: List[str], use_cache: bool = True, enrich: bool = False) -> list:
+    """
+    검색어들을 백그라운드에서 미리 검색하여 캐시에 저장 (결과를 기다리지 않음)
+    
+    이미 캐시에 유효한 결과가 있는 검색어와 중복 검색어는 건너뜁니다.
+    enrich=True이면 결과 페이지 본문도 미리 가져와 본문 캐시에 저장합니다.
+    
+    Returns:
+        list: 시작한 검색의 Future 목록
+    """
+    backend = get_search_backend()
+    cache = get_search_cache() if use_cache else None
+    
+    seen = set()
+    pending = []
+    for query in queries:
+        cache_key = search_cache_key(backend.name, query)
+        if cache_key in seen:
+            continue
+        seen.add(cache_key)
+        # 본문 보강 시에는 검색 결과가 캐시에 있어도 페이지 본문을 채우기 위해 실행
+        if cache is not None and not enrich and cache.get(cache_key) is not None:
+            continue
+        pending.append(query)
+    
+    executor = get_search_executor()
+    futures = []
+    for query in pending:
+        future = executor.submit(fetch_web_search, query, use_cache=use_cache, enrich=enrich)
+        future.add_done_callback(lambda f, query=query: _log_prefetch_result(query, f))
+        futures.append(future)
+    if futures:
+        print(f"🌐 웹 검색 미리 가져오기 시작: {len(futures)}개 검색어")
+    return futures
+
+
+def _log_prefetch_result(query: str, future):
+    """미리 가져오기 실패는 화면 대신 로그로만 남김 (실행 시점 검색에서 다시 안내)"""
+    try:
+        _, notices = future.result()
     except Exception as e:
-        st.error(f"❌ 예상치 못한 오류: {e}")
-        return f"[검색 오류: {e}]"
\ No newline at end of file
+        print(f"웹 검색 미리 가져오기 실패 ({query}): {e}")
+        return
+    for level, message in notices:
+        if level != "info":
+            print(f"웹 검색 미리 가져오기 ({query}): {message}")
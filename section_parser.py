@@ -0,0 +1,111 @@
+# section_parser.py
+
+"""
+스트리밍 응답 구조별 점진 파싱
+- 응답이 도착하는 대로 "## N. 구조명" 헤더를 찾아 구조별 내용을 나눔
+- 다음 구조의 헤더가 나타나면 직전 구조를 완료로 처리 (완료된 구조는 바로 화면에 표시 가능)
+- 새로 도착한 부분(헤더가 청크 경계에 걸친 경우를 위한 여유분 포함)만 검색하여 처음부터 다시 훑지 않음
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from block_model import build_output_markers
+
+
+class IncrementalSectionParser:
+    """
+    출력 구조별 점진 파서
+
+    헤더 마커("## N. 구조명", "## 구조명", "N. 구조명", "### 구조명")가 줄 맨 앞에 나올 때만 경계로 인정합니다.
+    최종 결과 표시는 parse_analysis_result_by_structure를 사용하고, 이 파서는 생성 중 미리보기에 사용합니다.
+    """
+
+    def __init__(self, output_structure: Sequence[str], output_markers=None):
+        self.output_structure = list(output_structure)
+        if output_markers is None:
+            output_markers = build_output_markers(tuple(self.output_structure))
+        # 구조명 단독 마커와 굵은 글씨 마커(**구조명**)는 본문 강조에도 흔히 나오므로 경계 판단에서 제외
+        self.header_markers = [
+            tuple(marker for marker in markers[:-1] if not marker.startswith("**"))
+            for markers in output_markers
+        ]
+        self._longest_marker = max((len(m) for markers in self.header_markers for m in markers), default=0)
+        self.reset()
+
+    def reset(self):
+        """처음부터 다시 파싱 (재시도로 응답이 다시 시작된 경우)"""
+        self.buffer = ""
+        self.sections: Dict[str, str] = {}      # 완료된 구조 → 내용
+        self.current_index: Optional[int] = None  # 생성 중인 구조 위치
+        self._body_start = 0
+        self._next_index = 0                       # 이 위치 이후의 구조 헤더만 탐색
+        self._scan_from = 0
+
+    def update(self, text: str) -> List[str]:
+        """
+        지금까지 누적된 전체 응답으로 갱신 (init_dspy.execute_with_sdk_streaming의 on_text 형식)
+
+        Returns:
+            List[str]: 이번 갱신으로 완료된 구조명
+        """
+        if not text.startswith(self.buffer):
+            self.reset()
+        return self.feed(text[len(self.buffer):])
+
+    def feed(self, delta: str) -> List[str]:
+        """
+        새로 도착한 텍스트 추가
+
+        Returns:
+            List[str]: 이번 추가로 완료된 구조명
+        """
+        if not delta:
+            return []
+        previous_length = len(self.buffer)
+        self.buffer += delta
+        # 청크 경계에 걸친 헤더를 찾기 위해 가장 긴 마커 길이 + 줄바꿈 1자만큼 되돌아가 검색
+        self._scan_from = max(self._body_start, previous_length - self._longest_marker - 1, 0)
+
+        completed = []
+        while True:
+            found = self._find_next_header()
+            if found is None:
+                break
+            index, position, marker = found
+            if self.current_index is not None:
+                completed.append(self._close_current(position))
+            self.current_index = index
+            self._body_start = position + len(marker)
+            self._next_index = index + 1
+            self._scan_from = self._body_start
+        return completed
+
+    def _find_next_header(self) -> Optional[Tuple[int, int, str]]:
+        """검색 구간에서 가장 먼저 나오는 다음 구조 헤더 (구조 위치, 시작 위치, 마커)"""
+        best = None
+        for index in range(self._next_index, len(self.output_structure)):
+            for marker in self.header_markers[index]:
+                position = self.buffer.find(marker, self._scan_from)
+                while position != -1 and position > 0 and self.buffer[position - 1] != "\n":
+                    position = self.buffer.find(marker, position + 1)
+                if position != -1 and (best is None or position < best[1]):
+                    best = (index, position, marker)
+        return best
+
+    def _close_current(self, end: int) -> str:
+        name = self.output_structure[self.current_index]
+        self.sections[name] = self.buffer[self._body_start:end].strip()
+        return name
+
+    def current(self) -> Tuple[Optional[str], str]:
+        """생성 중인 구조명과 지금까지의 내용"""
+        if self.current_index is None:
+            return None, ""
+        return self.output_structure[self.current_index], self.buffer[self._body_start:].strip()
+
+    def finish(self) -> Dict[str, str]:
+        """응답 완료 - 생성 중이던 구조까지 완료 처리하여 구조별 내용 반환"""
+        if self.current_index is not None:
+            self._close_current(len(self.buffer))
+            self.current_index = None
+        return dict(self.sections)
@@ -9,6 +9,10 @@ import streamlit as st
 import time
 import random
 import anthropic
+import json
+from chunk_dedup import find_near_duplicates
+from model_router import route_model, get_session_override
+from utils import estimate_tokens
 
 # === Rate Limiting 및 재시도 설정 ===
 MAX_RETRIES = 5
@@ -57,16 +61,30 @@ class RateLimitHandler:
 
 # === DSPy Signature 클래스들 ===
 
+# 대지·법규 필드 설명 (DSPy Signature와 배치 모드 JSON 프롬프트가 함께 사용)
+SITE_FIELD_DESCRIPTIONS = {
+    "site_area": "대지면적",
+    "site_address": "대지 주소",
+    "site_slope": "대지 경사, 고도, 방위",
+    "zoning": "용도지역, 지구단위계획 등",
+    "restrictions": "고도제한, 일조권, 환경, 소음, 특이 규제",
+    "traffic": "주변 도로, 교통, 진출입",
+    "precedent_comparison": "유사 연수원·교육시설과 비교 포인트",
+    "risk_factors": "대지·법규 관련 주요 리스크",
+}
+
+PDF_TYPES = ["architectural_plan", "land_use_plan", "environmental_assessment", "general_document"]
+
 class SiteAnalysisFields(Signature):
     text: str = InputField(desc="PDF에서 추출한 전체 텍스트")
-    site_area: str = OutputField(desc="대지면적")
-    site_address: str = OutputField(desc="대지 주소")
-    site_slope: str = OutputField(desc="대지 경사, 고도, 방위")
-    zoning: str = OutputField(desc="용도지역, 지구단위계획 등")
-    restrictions: str = OutputField(desc="고도제한, 일조권, 환경, 소음, 특이 규제")
-    traffic: str = OutputField(desc="주변 도로, 교통, 진출입")
-    precedent_comparison: str = OutputField(desc="유사 연수원·교육시설과 비교 포인트")
-    risk_factors: str = OutputField(desc="대지·법규 관련 주요 리스크")
+    site_area: str = OutputField(desc=SITE_FIELD_DESCRIPTIONS["site_area"])
+    site_address: str = OutputField(desc=SITE_FIELD_DESCRIPTIONS["site_address"])
+    site_slope: str = OutputField(desc=SITE_FIELD_DESCRIPTIONS["site_slope"])
+    zoning: str = OutputField(desc=SITE_FIELD_DESCRIPTIONS["zoning"])
+    restrictions: str = OutputField(desc=SITE_FIELD_DESCRIPTIONS["restrictions"])
+    traffic: str = OutputField(desc=SITE_FIELD_DESCRIPTIONS["traffic"])
+    precedent_comparison: str = OutputField(desc=SITE_FIELD_DESCRIPTIONS["precedent_comparison"])
+    risk_factors: str = OutputField(desc=SITE_FIELD_DESCRIPTIONS["risk_factors"])
 
 class PDFSummary(Signature):
     text: str = InputField(desc="PDF에서 추출한 전체 텍스트")
@@ -111,10 +129,17 @@ class AdvancedPDFAnalyzer:
             "risk_factors": "리스크 요인 정보 없음"
         }
     
+    def routed_lm(self, task: str, text: str, output_tokens: int):
+        """작업별로 선택한 모델을 이 호출에만 적용하는 DSPy 컨텍스트 (전역 모델 설정은 그대로)"""
+        from init_dspy import get_lm
+        decision = route_model(task, estimate_tokens(text), output_tokens, override=get_session_override())
+        return dspy.context(lm=get_lm(decision.model))
+    
     def detect_pdf_type(self, pdf_text: str) -> Dict[str, str]:
         """PDF 유형 자동 감지"""
         try:
-            result = self.type_detector(text=pdf_text)
+            with self.routed_lm("pdf_type_detection", pdf_text, 50):
+                result = self.type_detector(text=pdf_text)
             return {
                 "pdf_type": getattr(result, "pdf_type", "general_document"),
                 "document_category": getattr(result, "document_category", "일반문서")
@@ -256,6 +281,24 @@ class AdvancedPDFAnalyzer:
         
         return fallback_data
     
+    def build_analysis_result(self, pdf_text: str, summary: str, extracted_data: Dict[str, str],
+                              pdf_type_info: Dict[str, str]) -> Dict[str, Any]:
+        """추출 결과를 검증·정제하고 품질을 평가하여 분석 결과 형식으로 구성"""
+        cleaned_data = self.validate_and_clean_data(extracted_data)
+        quality_assessment = self.assess_extraction_quality(cleaned_data)
+        
+        return {
+            "summary": summary,
+            "site_fields": cleaned_data,
+            "pdf_type": pdf_type_info,
+            "quality": quality_assessment,
+            "metadata": {
+                "analysis_timestamp": datetime.now().isoformat(),
+                "text_length": len(pdf_text),
+                "status": "success"
+            }
+        }
+    
     def comprehensive_analysis(self, pdf_text: str) -> Dict[str, Any]:
         """종합적인 PDF 분석 - Rate Limiting 처리 포함"""
         for attempt in range(MAX_RETRIES):
@@ -264,8 +307,10 @@ class AdvancedPDFAnalyzer:
                 pdf_type_info = self.detect_pdf_type(pdf_text)
                 
                 # 2. 기본 분석 수행
-                summary_result = self.summary_predictor(text=pdf_text)
-                site_result = self.site_parser(text=pdf_text)
+                with self.routed_lm("chunk_summary", pdf_text, 500):
+                    summary_result = self.summary_predictor(text=pdf_text)
+                with self.routed_lm("site_field_extraction", pdf_text, 800):
+                    site_result = self.site_parser(text=pdf_text)
                 
                 # 3. 데이터 추출
                 extracted_data = {
@@ -279,23 +324,13 @@ class AdvancedPDFAnalyzer:
                     "risk_factors": getattr(site_result, "risk_factors", "")
                 }
                 
-                # 4. 데이터 검증 및 정제
-                cleaned_data = self.validate_and_clean_data(extracted_data)
-                
-                # 5. 품질 평가
-                quality_assessment = self.assess_extraction_quality(cleaned_data)
-                
-                return {
-                    "summary": getattr(summary_result, "summary", "요약을 생성할 수 없습니다."),
-                    "site_fields": cleaned_data,
-                    "pdf_type": pdf_type_info,
-                    "quality": quality_assessment,
-                    "metadata": {
-                        "analysis_timestamp": datetime.now().isoformat(),
-                        "text_length": len(pdf_text),
-                        "status": "success"
-                    }
-                }
+                # 4~5. 데이터 검증·정제 및 품질 평가
+                return self.build_analysis_result(
+                    pdf_text,
+                    getattr(summary_result, "summary", "요약을 생성할 수 없습니다."),
+                    extracted_data,
+                    pdf_type_info
+                )
                 
             except Exception as e:
                 # Rate Limit 오류 처리
@@ -417,8 +452,103 @@ def analyze_pdf_comprehensive(pdf_text: str) -> Dict[str, Any]:
     """종합적인 PDF 분석 (새로운 고급 기능)"""
     return analyzer.comprehensive_analysis(pdf_text)
 
-def analyze_pdf_in_chunks(pdf_text: str, chunk_size: int = 4000, max_chunks: int = 20) -> Dict[str, Any]:
-    """큰 PDF를 청크로 나누어 분석 - 개선된 버전"""
+# === Message Batches 모드 (청크 분석을 배치 하나로 제출) ===
+
+def build_chunk_analysis_prompt(chunk_text: str) -> str:
+    """청크 하나의 요약·유형·대지 필드를 JSON 하나로 받는 프롬프트 (배치 요청용)"""
+    fields = ",\n".join(f'  "{name}": "{desc}"' for name, desc in SITE_FIELD_DESCRIPTIONS.items())
+    return f"""다음은 건축 프로젝트 관련 PDF 문서의 일부입니다. 내용을 분석하여 아래 JSON 형식으로만 답하세요.
+문서에 없는 정보는 빈 문자열로 두세요.
+
+{{
+  "summary": "이 부분의 핵심 요약",
+  "pdf_type": "{' / '.join(PDF_TYPES)} 중 하나",
+  "document_category": "문서 카테고리",
+{fields}
+}}
+
+[문서]
+{chunk_text}"""
+
+def parse_chunk_analysis_response(text: str) -> Optional[Dict[str, str]]:
+    """배치 응답에서 JSON 객체 추출 (코드 블록·앞뒤 설명 허용, 실패 시 None)"""
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    return {key: str(value) if value is not None else "" for key, value in data.items()}
+
+def analyze_chunks_with_batch(chunks: Dict[int, str], model: Optional[str] = None) -> Dict[int, Dict[str, Any]]:
+    """
+    청크 분석 요청을 Message Batch 하나로 제출하고 결과를 청크 위치별 분석 결과로 변환
+    
+    Args:
+        chunks: 청크 위치 → 청크 텍스트
+        model: 모델명 (None이면 model_router로 선택)
+    
+    Returns:
+        Dict[int, Dict[str, Any]]: 청크 위치 → comprehensive_analysis와 같은 형식의 결과
+                                   (실패했거나 응답을 해석하지 못한 청크는 빠짐)
+    """
+    from message_batches import run_message_batch
+    
+    if not chunks:
+        return {}
+    if model is None:
+        model = route_model(
+            "chunk_analysis", max(estimate_tokens(chunk) for chunk in chunks.values()), 1000,
+            override=get_session_override()
+        ).model
+    
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    status_text.text(f"📦 청크 {len(chunks)}개를 일괄 처리(Message Batch)로 제출합니다...")
+    
+    def show_progress(batch):
+        counts = batch.request_counts
+        finished = counts.succeeded + counts.errored + counts.canceled + counts.expired
+        progress_bar.progress(finished / len(chunks))
+        status_text.text(f"📦 일괄 처리 중... {finished}/{len(chunks)} 완료 ({batch.processing_status})")
+    
+    batch_results = run_message_batch(
+        {f"chunk-{i}": build_chunk_analysis_prompt(chunk) for i, chunk in chunks.items()},
+        model=model,
+        on_progress=show_progress
+    )
+    progress_bar.empty()
+    status_text.empty()
+    
+    results = {}
+    for i, chunk in chunks.items():
+        batch_result = batch_results.get(f"chunk-{i}")
+        data = parse_chunk_analysis_response(batch_result.text) if batch_result and batch_result.succeeded else None
+        if data is None:
+            continue
+        pdf_type = data.get("pdf_type", "").strip()
+        results[i] = analyzer.build_analysis_result(
+            chunk,
+            data.get("summary") or "요약을 생성할 수 없습니다.",
+            {field: data.get(field, "") for field in analyzer.required_fields},
+            {
+                "pdf_type": pdf_type if pdf_type in PDF_TYPES else "general_document",
+                "document_category": data.get("document_category") or "일반문서"
+            }
+        )
+    return results
+
+def analyze_pdf_in_chunks(pdf_text: str, chunk_size: int = 4000, max_chunks: int = 20,
+                          batch: bool = False, model: Optional[str] = None) -> Dict[str, Any]:
+    """
+    큰 PDF를 청크로 나누어 분석 - 개선된 버전
+    
+    batch=True이면 청크 분석 요청을 Message Batch 하나로 제출합니다 (응답은 늦지만 비용이 낮고 처리량이 큼).
+    배치에서 실패했거나 응답을 해석하지 못한 청크만 기존 방식(DSPy)으로 다시 분석합니다.
+    """
     if len(pdf_text) <= chunk_size:
         return analyzer.comprehensive_analysis(pdf_text)
     
@@ -456,6 +586,25 @@ def analyze_pdf_in_chunks(pdf_text: str, chunk_size: int = 4000, max_chunks: int
     total_chunks = len(chunks)
     st.info(f"총 {total_chunks}개 청크로 분할되었습니다.")
     
+    # 부록 등에서 반복되는 유사 중복 청크는 대표 청크만 분석하고 결과 재사용
+    dedup = find_near_duplicates(chunks)
+    if dedup.calls_saved:
+        st.info(f"♻️ 유사 중복 청크 {dedup.calls_saved}개 발견 - 대표 청크 결과를 재사용합니다.")
+    # 대표 청크 번호 → 그룹에서 처음 성공한 분석 결과
+    group_results = {}
+    calls_reused = 0
+    
+    # 배치 모드: 분석할 청크(너무 짧은 청크, 중복 청크 제외)를 한 번에 제출
+    batch_results = {}
+    if batch:
+        batch_chunks = {
+            i: chunk for i, chunk in enumerate(chunks)
+            if len(chunk.strip()) >= 100 and dedup.representative_of[i] == i
+        }
+        batch_results = analyze_chunks_with_batch(batch_chunks, model)
+        if len(batch_results) < len(batch_chunks):
+            st.warning(f"⚠️ 일괄 처리에서 {len(batch_chunks) - len(batch_results)}개 청크를 받지 못해 개별 분석합니다.")
+    
     # 진행 상황 표시를 위한 프로그레스 바
     progress_bar = st.progress(0)
     status_text = st.empty()
@@ -475,9 +624,18 @@ def analyze_pdf_in_chunks(pdf_text: str, chunk_size: int = 4000, max_chunks: int
             if len(chunk.strip()) < 100:
                 st.info(f"청크 {i+1} 건너뛰기 (너무 짧음)")
                 continue
+            
+            # 중복 청크는 대표 청크의 결과 재사용 (통합 요약에는 한 번만 반영)
+            # 대표 청크가 실패했거나 건너뛰었으면 중복 청크를 직접 분석
+            representative = dedup.representative_of[i]
+            if representative != i and representative in group_results:
+                calls_reused += 1
+                successful_chunks += 1
+                continue
                 
-            result = analyzer.comprehensive_analysis(chunk)
+            result = batch_results.get(i) or analyzer.comprehensive_analysis(chunk)
             chunk_results.append(result)
+            group_results[representative] = result
             successful_chunks += 1
             
             # 성공률이 낮으면 경고
@@ -492,6 +650,9 @@ def analyze_pdf_in_chunks(pdf_text: str, chunk_size: int = 4000, max_chunks: int
     progress_bar.empty()
     status_text.empty()
     
+    if calls_reused:
+        st.info(f"♻️ 중복 청크 {calls_reused}개에 대표 청크 결과를 재사용했습니다. (LLM 호출 {calls_reused}회 절약)")
+    
     # 결과 요약 표시
     if successful_chunks == total_chunks:
         st.success(f"✅ 모든 청크 분석 완료! ({successful_chunks}/{total_chunks})")
@@ -516,7 +677,8 @@ def analyze_pdf_in_chunks(pdf_text: str, chunk_size: int = 4000, max_chunks: int
                 "text_length": len(pdf_text),
                 "status": "failed_all_chunks",
                 "chunks_processed": 0,
-                "total_chunks": total_chunks
+                "total_chunks": total_chunks,
+                "llm_calls_saved": calls_reused
             }
         }
     
@@ -563,7 +725,10 @@ def analyze_pdf_in_chunks(pdf_text: str, chunk_size: int = 4000, max_chunks: int
             "status": "success_chunked",
             "chunks_processed": len(chunk_results),
             "total_chunks": total_chunks,
-            "success_rate": round(successful_chunks / total_chunks * 100, 1)
+            "success_rate": round(successful_chunks / total_chunks * 100, 1),
+            "duplicate_clusters": dedup.clusters,
+            "llm_calls_saved": calls_reused,
+            "batch_chunks": len(batch_results)
         }
     }
 
@@ -46,6 +46,16 @@ def adjust_length(text: str, max_length: int) -> str:
         return text[:max_length] + "..."
 
 
+def estimate_tokens(text: str) -> int:
+    """
+    토크나이저 없이 토큰 수를 근사 (영문·숫자 약 4자당 1토큰, 한글 등 약 1.5자당 1토큰)
+    """
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return int(ascii_chars / 4 + (len(text) - ascii_chars) / 1.5) + 1
+
+
 def extract_insight(result: str) -> str:
     """
     GPT 출력 텍스트에서 전략 제언 또는 시사점 섹션을 추출 (향상된 버전)
@@ -8,13 +8,118 @@
 import streamlit as st
 import fitz  # PyMuPDF
 import re
-from typing import List, Dict, Any
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+import pdf_index
+from chunk_store import ChunkStore, chunk_page
 
 # 전역 변수 (벡터 시스템용)
 embedder = None
 collection = None
 chroma_client = None
 
+# 검색 결과 캐시 크기 (프로세스 전체 공유)
+SEARCH_CACHE_MAX_SIZE = 256
+
+# 검색 실패 시 반환하는 메시지 (캐시하지 않음)
+SEARCH_ERROR_MESSAGE = "[검색 중 오류가 발생했습니다.]"
+
+
+class SearchResultCache:
+    """
+    PDF 검색 결과용 LRU 캐시
+
+    값은 인용 표기 전의 (관련도, 문단) 목록입니다. 인용 표기에는 세션별 PDF 식별자가 들어가므로
+    조회한 세션에서 따로 붙입니다.
+    키는 (문서 해시, 정규화된 쿼리, top_k)이므로 문서 내용이 바뀌면
+    해시가 달라져 이전 결과는 자연스럽게 무효화되고 LRU 순서에 따라 밀려납니다.
+    Streamlit 세션들이 스레드로 동시에 접근하므로 잠금으로 보호합니다.
+    """
+
+    def __init__(self, max_size: int = SEARCH_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, str, int], Tuple[Tuple[int, str], ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str, int]) -> Optional[Tuple[Tuple[int, str], ...]]:
+        """캐시 조회 - 적중 시 최근 사용으로 갱신"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Tuple[str, str, int], value: Tuple[Tuple[int, str], ...]):
+        """캐시 저장 - 용량 초과 시 가장 오래된 항목 제거"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """캐시 및 통계 초기화"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """적중/실패 통계 반환"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total * 100, 1) if total else 0.0
+            }
+
+
+search_cache = SearchResultCache()
+
+
+def compute_document_hash(text: str) -> str:
+    """문서 텍스트의 내용 해시"""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def normalize_query(query: str) -> str:
+    """캐시 키용 쿼리 정규화 (대소문자, 공백 차이 무시)"""
+    return " ".join(query.lower().split())
+
+
+def get_document_hash(pdf_id: str) -> Optional[str]:
+    """
+    세션에 저장된 PDF의 해시 반환
+
+    저장 시 계산한 해시를 재사용하고, 텍스트가 직접 교체된 경우에는 다시 계산합니다.
+    """
+    text = st.session_state.get('pdf_chunks', {}).get(pdf_id)
+    if text is None:
+        return None
+    
+    hashes = st.session_state.setdefault('pdf_chunk_hashes', {})
+    cached = hashes.get(pdf_id)
+    if cached and cached[0] is text:
+        return cached[1]
+    
+    doc_hash = compute_document_hash(text)
+    hashes[pdf_id] = (text, doc_hash)
+    return doc_hash
+
+
+def get_search_cache_stats() -> Dict[str, Any]:
+    """PDF 검색 캐시 통계 반환"""
+    return search_cache.stats()
+
 def initialize_vector_system():
     """벡터 시스템 초기화 - 간단 검색만 사용"""
     global embedder, collection, chroma_client
@@ -62,6 +167,38 @@ def extract_text_from_pdf(pdf_input, input_type="path") -> str:
         st.error(f"❌ PDF 텍스트 추출 오류: {e}")
         return ""
 
+def extract_pages_from_pdf(pdf_input, input_type="path") -> List[str]:
+    """
+    PDF 페이지별 텍스트 추출
+    
+    Args:
+        pdf_input: PDF 파일 경로(str) 또는 바이트(bytes)
+        input_type: "path" 또는 "bytes"
+    
+    Returns:
+        List[str]: 페이지별 텍스트
+    """
+    try:
+        if input_type == "path":
+            doc = fitz.open(pdf_input)
+        elif input_type == "bytes":
+            doc = fitz.open(stream=pdf_input, filetype="pdf")
+        else:
+            raise ValueError("input_type must be 'path' or 'bytes'")
+        
+        with doc:
+            return [page.get_text() for page in doc]
+            
+    except Exception as e:
+        st.error(f"❌ PDF 페이지 추출 오류: {e}")
+        return []
+
+def get_chunk_store() -> ChunkStore:
+    """세션의 청크 저장소 반환 (없으면 생성)"""
+    if 'pdf_chunk_store' not in st.session_state:
+        st.session_state.pdf_chunk_store = ChunkStore()
+    return st.session_state.pdf_chunk_store
+
 def save_pdf_chunks_to_chroma(pdf_path: str, pdf_id: str = "default") -> bool:
     """
     PDF 청크를 간단 저장으로 처리
@@ -74,10 +211,11 @@ def save_pdf_chunks_to_chroma(pdf_path: str, pdf_id: str = "default") -> bool:
         bool: 저장 성공 여부
     """
     try:
-        # PDF 텍스트 추출
-        text = extract_text_from_pdf(pdf_path, "path")
+        # PDF 텍스트 추출 (페이지 단위로 한 번만 추출하여 재사용)
+        pages = extract_pages_from_pdf(pdf_path, "path")
+        text = "".join(page + "\n" for page in pages)
         
-        if not text:
+        if not text.strip():
             st.error("❌ PDF 텍스트 추출 실패")
             return False
         
@@ -85,7 +223,19 @@ def save_pdf_chunks_to_chroma(pdf_path: str, pdf_id: str = "default") -> bool:
         if 'pdf_chunks' not in st.session_state:
             st.session_state.pdf_chunks = {}
         
+        doc_hash = compute_document_hash(text)
         st.session_state.pdf_chunks[pdf_id] = text
+        st.session_state.setdefault('pdf_chunk_hashes', {})[pdf_id] = (text, doc_hash)
+        
+        # 디스크 인덱스 생성 (실패해도 간단 검색으로 동작)
+        try:
+            pdf_index.ensure_index(doc_hash, text)
+        except Exception as index_error:
+            print(f"⚠️ PDF 인덱스 생성 실패: {index_error}")
+        
+        # 페이지·오프셋 정보가 있는 청크 저장
+        get_chunk_store().add_document(pdf_id, pages)
+        
         st.success(f"✅ PDF가 저장되었습니다. (간단 모드)")
         return True
         
@@ -105,7 +255,98 @@ def search_pdf_chunks(query: str, pdf_id: str = "default", top_k: int = 3) -> st
     Returns:
         str: 검색 결과
     """
-    return fallback_to_simple_search(query, pdf_id, top_k)
+    doc_hash = get_document_hash(pdf_id)
+    if doc_hash is None:
+        return fallback_to_simple_search(query, pdf_id, top_k)
+    
+    # 캐시에는 세션과 무관한 (관련도, 문단) 목록만 저장하고 인용 표기는 조회한 세션의 청크 저장소로 붙임
+    cache_key = (doc_hash, normalize_query(query), top_k)
+    scored_paragraphs = search_cache.get(cache_key)
+    if scored_paragraphs is None:
+        scored_paragraphs = search_with_index(query, doc_hash, top_k)
+        if scored_paragraphs is None:
+            try:
+                scored_paragraphs = simple_search(query, st.session_state.pdf_chunks[pdf_id], top_k)
+            except Exception as e:
+                # 실패한 검색은 캐시하지 않음
+                st.error(f"❌ 검색 오류: {e}")
+                return SEARCH_ERROR_MESSAGE
+        scored_paragraphs = tuple(scored_paragraphs)
+        search_cache.put(cache_key, scored_paragraphs)
+    return format_search_results(scored_paragraphs, pdf_id)
+
+def format_search_results(scored_paragraphs: List[Tuple[int, str]], pdf_id: Optional[str] = None) -> str:
+    """
+    (관련도, 문단) 목록을 검색 결과 문자열로 변환
+
+    pdf_id가 청크 저장소에 있으면 문단이 시작되는 페이지·오프셋 인용 표기를 붙입니다.
+    """
+    store = get_chunk_store() if pdf_id is not None else None
+    if store is not None and not store.has_document(pdf_id):
+        store = None
+
+    results = []
+    for i, (score, para) in enumerate(scored_paragraphs, 1):
+        chunk = store.locate(pdf_id, para) if store is not None else None
+        citation = f" {chunk.citation}" if chunk is not None else ""
+        if len(para) > 500:
+            para = para[:500] + "..."
+        results.append(f"간단 검색 결과 {i} (관련도: {score}){citation}:\n{para}")
+    
+    if results:
+        return "\n---\n".join(results)
+    else:
+        return "[관련 정보를 찾을 수 없습니다.]"
+
+def search_with_index(query: str, doc_hash: str, top_k: int) -> Optional[List[Tuple[int, str]]]:
+    """
+    메모리 매핑 인덱스 검색 - 인덱스가 없거나 읽기에 실패하면 None
+    
+    Args:
+        query: 검색 쿼리
+        doc_hash: 문서 해시
+        top_k: 반환할 결과 수
+    
+    Returns:
+        Optional[List[Tuple[int, str]]]: (관련도, 문단) 목록
+    """
+    try:
+        with pdf_index.open_index(doc_hash) as index:
+            if index is None:
+                return None
+            return index.search(query, top_k)
+    except Exception as e:
+        print(f"⚠️ 인덱스 검색 실패, 간단 검색으로 대체: {e}")
+        return None
+
+def simple_search(query: str, text: str, top_k: int) -> List[Tuple[int, str]]:
+    """
+    키워드 일치 개수 기준 문단 검색
+    
+    Args:
+        query: 검색 쿼리
+        text: PDF 전체 텍스트
+        top_k: 반환할 결과 수
+    
+    Returns:
+        List[Tuple[int, str]]: (관련도, 문단) 목록 (관련도 높은 순)
+    """
+    keywords = re.findall(r'\w+', query.lower())
+    paragraphs = text.split('\n\n')
+    
+    scored_paragraphs = []
+    for para in paragraphs:
+        if len(para.strip()) < 50:
+            continue
+            
+        para_lower = para.lower()
+        score = sum(1 for keyword in keywords if keyword in para_lower)
+        
+        if score > 0:
+            scored_paragraphs.append((score, para.strip()))
+    
+    scored_paragraphs.sort(key=lambda x: x[0], reverse=True)
+    return scored_paragraphs[:top_k]
 
 def fallback_to_simple_search(query: str, pdf_id: str, top_k: int) -> str:
     """
@@ -124,39 +365,11 @@ def fallback_to_simple_search(query: str, pdf_id: str, top_k: int) -> str:
         if 'pdf_chunks' not in st.session_state or pdf_id not in st.session_state.pdf_chunks:
             return "[PDF가 로드되지 않았습니다. 먼저 PDF를 업로드해주세요.]"
         
-        text = st.session_state.pdf_chunks[pdf_id]
-        
-        # 키워드 기반 검색
-        keywords = re.findall(r'\w+', query.lower())
-        paragraphs = text.split('\n\n')
-        
-        scored_paragraphs = []
-        for para in paragraphs:
-            if len(para.strip()) < 50:
-                continue
-                
-            para_lower = para.lower()
-            score = sum(1 for keyword in keywords if keyword in para_lower)
-            
-            if score > 0:
-                scored_paragraphs.append((score, para.strip()))
-        
-        scored_paragraphs.sort(key=lambda x: x[0], reverse=True)
-        
-        results = []
-        for i, (score, para) in enumerate(scored_paragraphs[:top_k], 1):
-            if len(para) > 500:
-                para = para[:500] + "..."
-            results.append(f"간단 검색 결과 {i} (관련도: {score}):\n{para}")
-        
-        if results:
-            return "\n---\n".join(results)
-        else:
-            return "[관련 정보를 찾을 수 없습니다.]"
+        return format_search_results(simple_search(query, st.session_state.pdf_chunks[pdf_id], top_k), pdf_id)
             
     except Exception as e:
         st.error(f"❌ 검색 오류: {e}")
-        return "[검색 중 오류가 발생했습니다.]"
+        return SEARCH_ERROR_MESSAGE
 
 def get_pdf_summary(pdf_id: str = "default") -> str:
     """
@@ -176,7 +389,7 @@ def get_pdf_summary(pdf_id: str = "default") -> str:
 
 def pdf_to_chunks(pdf_path: str, chunk_size: int = 400) -> List[str]:
     """
-    PDF를 청크로 분할
+    PDF를 청크로 분할 (한국어 문장 경계 기준)
     
     Args:
         pdf_path: PDF 파일 경로
@@ -186,30 +399,9 @@ def pdf_to_chunks(pdf_path: str, chunk_size: int = 400) -> List[str]:
         List[str]: 분할된 청크들
     """
     try:
-        doc = fitz.open(pdf_path)
         chunks = []
-        
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            text = page.get_text()
-            
-            # 텍스트를 문장 단위로 분할
-            sentences = text.split('. ')
-            
-            current_chunk = ""
-            for sentence in sentences:
-                if len(current_chunk) + len(sentence) < chunk_size:
-                    current_chunk += sentence + ". "
-                else:
-                    if current_chunk:
-                        chunks.append(current_chunk.strip())
-                    current_chunk = sentence + ". "
-            
-            # 마지막 청크 추가
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-        
-        doc.close()
+        for text in extract_pages_from_pdf(pdf_path, "path"):
+            chunks.extend(text[start:end] for start, end in chunk_page(text, chunk_size))
         return chunks
         
     except Exception as e:
@@ -18,7 +18,7 @@ from agent_executor import execute_agent
 from user_state import get_user_inputs, save_step_result, append_step_history
 from report_generator import generate_pdf_report, generate_word_report
 from webpage_generator import create_webpage_download_button
-from prompt_loader import load_prompt_blocks
+from prompt_loader import get_prompt_block_registry
 from analysis_system import (
     AnalysisSystem, PurposeType, ObjectiveType, AnalysisStep, AnalysisWorkflow
 )
@@ -28,7 +28,7 @@ from agent_executor import (
     run_precedent_comparison,
     run_strategy_recommendation,
 )
-from utils import extract_summary, extract_insight
+from utils import extract_summary, extract_insight, estimate_tokens
 from utils_pdf import (
     initialize_vector_system,
     extract_text_from_pdf,
@@ -38,23 +38,81 @@ from utils_pdf import (
     get_pdf_summary_from_session
 )
 from dsl_to_prompt import convert_dsl_to_prompt
+from context_manager import get_carry_forward_context
+from prompt_anatomy import record_prompt_anatomy
+from block_model import PromptBlock, build_output_markers
+from section_parser import IncrementalSectionParser
+from model_router import route_model, estimate_block_output_tokens, get_session_override
 
 # 파일 상단에 상수 정의
 REQUIRED_FIELDS = ["project_name", "building_type", "site_location", "owner", "site_area", "project_goal"]
 FEEDBACK_TYPES = ["추가 분석 요청", "수정 요청", "다른 관점 제시", "구조 변경", "기타"]
+# 스트리밍 응답 화면 갱신 간격 (초)
+STREAM_RENDER_INTERVAL = 0.15
 
-def execute_claude_analysis(prompt, description):
-    """Claude 분석 실행 함수 - 세션 상태 기반 모델 선택"""
+def execute_claude_analysis(prompt, description, cache_prefix=None, stream=True, block_model: PromptBlock = None,
+                            use_cache=None):
+    """
+    Claude 분석 실행 함수 - 세션 상태 기반 모델 선택 (cache_prefix 지정 시 프롬프트 캐싱)
     
-    # 세션 상태에서 선택된 모델 가져오기
-    selected_model = st.session_state.get('selected_model', 'claude-3-5-sonnet-20241022')
+    stream=True이면 응답을 생성되는 대로 화면에 표시하고, 완료되면 표시를 지운 뒤 전체 텍스트를 반환합니다.
+    block_model이 주어지면 출력 구조별 탭을 만들어 헤더가 완성된 구조부터 채웁니다.
+    사이드바의 "응답 캐시 사용"이 켜져 있으면 같은 프롬프트의 저장된 응답을 재사용합니다.
+    use_cache=False이면 (다시 분석) 저장된 응답을 쓰지 않고 새로 생성한 응답으로 캐시를 덮어씁니다.
+    모델은 model_router 정책으로 고르며, 사이드바에서 자동 선택을 끄면 선택한 모델을 사용합니다.
+    """
+    
+    # 작업·프롬프트 크기 기준 모델 선택 (자동 선택을 끄면 세션에서 선택된 모델)
+    decision = route_model(
+        "analysis_block",
+        input_tokens=estimate_tokens(prompt) + estimate_tokens(cache_prefix or ""),
+        output_tokens=estimate_block_output_tokens(block_model.output_structure) if block_model is not None else 0,
+        block_id=block_model.id if block_model is not None else None,
+        override=get_session_override()
+    )
+    selected_model = decision.model
+    st.caption(f"🧭 {description}: {selected_model} ({decision.reason})")
+    if use_cache is None:
+        use_cache = st.session_state.get('use_response_cache', True)
     
     # SDK 방식으로 실행 (DSPy 설정 변경 없이) - 재시도 로직 포함
-    from init_dspy import execute_with_sdk_with_retry
+    from init_dspy import execute_with_sdk_with_retry, execute_with_sdk_streaming
     
-    # 진행 상황 표시
-    with st.spinner(f"{description} 분석 중... (재시도 로직 포함)"):
-        result = execute_with_sdk_with_retry(prompt, selected_model, max_retries=3)
+    if stream and block_model is not None and block_model.output_structure:
+        result = _stream_into_section_tabs(
+            prompt, description, selected_model, cache_prefix,
+            list(block_model.output_structure), block_model.output_markers, use_cache=use_cache
+        )
+    elif stream:
+        # 생성 중인 응답 표시 (너무 잦은 화면 갱신을 피하기 위해 STREAM_RENDER_INTERVAL 간격으로 갱신)
+        placeholder = st.empty()
+        placeholder.info(f"⏳ {description} 응답 대기 중...")
+        last_render = [0.0]
+        
+        def render_partial(text):
+            now = time.monotonic()
+            if now - last_render[0] >= STREAM_RENDER_INTERVAL:
+                last_render[0] = now
+                placeholder.markdown(text + " ▌")
+        
+        result = execute_with_sdk_streaming(
+            prompt, selected_model, max_retries=3, cache_prefix=cache_prefix, on_text=render_partial,
+            use_cache=use_cache
+        )
+        placeholder.empty()
+    else:
+        # 진행 상황 표시
+        with st.spinner(f"{description} 분석 중... (재시도 로직 포함)"):
+            result = execute_with_sdk_with_retry(
+                prompt, selected_model, max_retries=3, cache_prefix=cache_prefix, use_cache=use_cache
+            )
+    
+    # 프롬프트 캐시 사용량 표시
+    if cache_prefix:
+        from prompt_caching import cache_usage_stats
+        usage = cache_usage_stats.summary()["last"]
+        if usage:
+            st.caption(f"📦 프롬프트 캐시 읽기 {usage['cache_read_input_tokens']:,} 토큰 · 생성 {usage['cache_creation_input_tokens']:,} 토큰 · 일반 입력 {usage['input_tokens']:,} 토큰")
     
     # 오류 메시지 개선
     if result.startswith("❌") or result.startswith("⚠️"):
@@ -65,6 +123,70 @@ def execute_claude_analysis(prompt, description):
     
     return result
 
+def _stream_into_section_tabs(prompt, description, selected_model, cache_prefix, output_structure, output_markers=None,
+                              use_cache=True):
+    """스트리밍 응답을 구조별로 점진 파싱하여 완료된 구조의 탭부터 채움 (완료 후 미리보기는 지움)"""
+    from init_dspy import execute_with_sdk_streaming
+    
+    preview = st.empty()
+    with preview.container():
+        status = st.empty()
+        status.info(f"⏳ {description} 응답 대기 중...")
+        tab_placeholders = {}
+        for tab, structure_name in zip(st.tabs(output_structure), output_structure):
+            with tab:
+                tab_placeholders[structure_name] = st.empty()
+                tab_placeholders[structure_name].caption("생성 대기 중...")
+    
+    parser = IncrementalSectionParser(output_structure, output_markers)
+    last_render = [0.0]
+    
+    def render_partial(text):
+        restarted = not text.startswith(parser.buffer)
+        completed = parser.update(text)
+        if restarted:
+            for placeholder in tab_placeholders.values():
+                placeholder.caption("생성 대기 중...")
+        # 완료된 구조는 한 번만 그림
+        for structure_name in completed:
+            tab_placeholders[structure_name].markdown(parser.sections[structure_name])
+        now = time.monotonic()
+        if completed or now - last_render[0] >= STREAM_RENDER_INTERVAL:
+            last_render[0] = now
+            current_name, partial = parser.current()
+            if current_name:
+                tab_placeholders[current_name].markdown(partial + " ▌")
+            status.info(f"⏳ {description} 생성 중... ({len(parser.sections)}/{len(output_structure)} 구조 완료)")
+    
+    result = execute_with_sdk_streaming(
+        prompt, selected_model, max_retries=3, cache_prefix=cache_prefix, on_text=render_partial,
+        use_cache=use_cache
+    )
+    preview.empty()
+    return result
+
+def start_web_search_prefetch(steps):
+    """웹 검색을 켠 단계만 백그라운드에서 미리 검색 (단계 실행 시 캐시에서 즉시 사용)"""
+    from dsl_to_prompt import prefetch_web_search_for_blocks
+    web_search_settings = st.session_state.get('web_search_settings', {})
+    block_ids = [step.id for step in steps if web_search_settings.get(f"web_search_{step.id}", False)]
+    if not block_ids:
+        return
+    try:
+        prefetch_web_search_for_blocks(
+            block_ids, get_user_inputs(),
+            enrich=st.session_state.get('enrich_web_search', False)
+        )
+    except Exception as e:
+        print(f"웹 검색 미리 가져오기 시작 실패: {e}")
+
+def on_web_search_toggled(step):
+    """단계의 웹 검색 체크박스를 켜면 그 단계의 검색을 바로 미리 시작"""
+    web_search_key = f"web_search_{step.id}"
+    if st.session_state.get(web_search_key):
+        st.session_state.web_search_settings[web_search_key] = True
+        start_web_search_prefetch([step])
+
 def create_analysis_workflow(purpose_enum, objective_enums):
     """워크플로우 생성 함수"""
     system = AnalysisSystem()
@@ -280,7 +402,9 @@ def render_workflow_summary(workflow: AnalysisWorkflow, system: AnalysisSystem):
             st.session_state.web_search_settings[web_search_key] = st.checkbox(
                 "웹 검색",
                 value=st.session_state.web_search_settings[web_search_key],
-                key=web_search_key
+                key=web_search_key,
+                on_change=on_web_search_toggled,
+                args=(step,)
             )
     
     # 분석 실행 버튼을 여기서 직접 처리
@@ -295,6 +419,7 @@ def render_workflow_summary(workflow: AnalysisWorkflow, system: AnalysisSystem):
             st.session_state.cot_history = []
         st.session_state.workflow_steps = final_steps
         st.session_state.show_feedback = False
+        start_web_search_prefetch(final_steps)
         
         st.success("✅ 분석이 시작되었습니다! 각 단계를 수동으로 진행하세요.")
         st.rerun()
@@ -384,11 +509,9 @@ def render_analysis_execution():
 
     # 2) prompt_loader에서 해당 단계들 매칭
     try:
-        # 프롬프트 블록 로드
-        from prompt_loader import load_prompt_blocks
-        blocks = load_prompt_blocks()
-        extra_blocks = blocks.get("extra", [])
-        blocks_by_id = {b["id"]: b for b in extra_blocks}
+        # 프롬프트 블록 로드 (레지스트리 캐시 사용)
+        block_registry = get_prompt_block_registry()
+        extra_blocks = block_registry.get_extra_blocks()
 
         # ordered_blocks 대신 workflow_steps 사용
         st.session_state.ordered_blocks = current_steps
@@ -414,15 +537,13 @@ def render_analysis_execution():
         current_step = current_steps[current_step_index]
         
         # 현재 단계에 해당하는 블록 찾기
-        current_block = None
-        if current_step.id in blocks_by_id:
-            current_block = blocks_by_id[current_step.id]
+        current_block = block_registry.get_block_model(current_step.id)
         
         # 현재 단계의 분석 상태 확인 (수정된 로직)
         step_completed = False
         if current_block:
-            # current_block['title']로 저장된 경우 체크
-            step_completed = any(h['step'] == current_block['title'] for h in st.session_state.get('cot_history', []))
+            # current_block.title로 저장된 경우 체크
+            step_completed = any(h['step'] == current_block.title for h in st.session_state.get('cot_history', []))
         else:
             # current_step.title로 저장된 경우 체크
             step_completed = any(h['step'] == current_step.title for h in st.session_state.get('cot_history', []))
@@ -448,13 +569,15 @@ def render_analysis_execution():
                 "🌐 웹 검색 포함",
                 value=st.session_state.web_search_settings[web_search_key],
                 key=web_search_key,
-                help="이 단계에서 최신 웹 검색 결과를 포함하여 분석합니다."
+                help="이 단계에서 최신 웹 검색 결과를 포함하여 분석합니다.",
+                on_change=on_web_search_toggled,
+                args=(current_step,)
             )
         
         # 분석 실행 버튼 (단계가 완료되지 않은 경우에만 표시)
         if not step_completed:
             if current_block:
-                button_text = f"{current_block['title']} 분석 실행"
+                button_text = f"{current_block.title} 분석 실행"
             else:
                 button_text = f"{current_step.title} 분석 실행"
             
@@ -484,58 +607,67 @@ def render_analysis_execution():
                     include_web_search = st.session_state.web_search_settings.get(web_search_key, False)
                     
                     # 분석 실행 부분에 디버깅 정보 추가
-                    with st.spinner(f"{current_block['title']} 분석 중..."):
-                        # DSL을 프롬프트로 변환
-                        from dsl_to_prompt import convert_dsl_to_prompt
+                    with st.spinner(f"{current_block.title} 분석 중..."):
+                        # DSL을 프롬프트로 변환 (캐시 가능한 고정 접두부 + 가변 접미부)
+                        from dsl_to_prompt import convert_dsl_to_cacheable_prompt
                         
-                        # 이전 분석 결과들 가져오기
-                        previous_results = ""
-                        if st.session_state.get('cot_history'):
-                            previous_results = "\n\n".join([f"**{h['step']}**: {h['result']}" for h in st.session_state.cot_history])
+                        # 이전 분석 결과들 가져오기 (토큰 예산 내 다이제스트)
+                        previous_results = get_carry_forward_context(current_block)
                         
                         # 프롬프트 생성 (웹 검색 설정 반영)
-                        prompt = convert_dsl_to_prompt(
+                        cache_prefix, prompt_suffix, prompt_breakdown = convert_dsl_to_cacheable_prompt(
                             dsl_block=current_block,
                             user_inputs=user_inputs,
                             previous_summary=previous_results,
                             pdf_summary=pdf_summary,
                             site_fields=st.session_state.get('site_fields', {}),
-                            include_web_search=include_web_search  # ✅ 사용자 선택 반영
+                            include_web_search=include_web_search,  # ✅ 사용자 선택 반영
+                            return_breakdown=True,
+                            compact=st.session_state.get('compact_prompts', False),
+                            enrich_web_search=st.session_state.get('enrich_web_search', False)
                         )
+                        record_prompt_anatomy(current_block.id, current_block.title, prompt_breakdown)
+                        prompt = f"{cache_prefix}\n\n{prompt_suffix}"
                         
                         # 웹 검색 상태 표시
                         if include_web_search:
                             st.info("🌐 웹 검색이 포함된 분석을 실행합니다...")
                         
                         # Claude 분석 실행
-                        result = execute_claude_analysis(prompt, current_block['title'])
+                        result = execute_claude_analysis(
+                            prompt_suffix, current_block.title, cache_prefix=cache_prefix,
+                            block_model=current_block
+                        )
                         # 실패 가드: 결과가 없거나 실패 메시지면 즉시 중단
-                        if not result or result == f"{current_block['title']} 분석 실패":
-                            st.error(f"❌ {current_block['title']} 분석 실패")
+                        if not result or result == f"{current_block.title} 분석 실패":
+                            st.error(f"❌ {current_block.title} 분석 실패")
                             return
                         
-                        if result and result != f"{current_block['title']} 분석 실패":
+                        if result and result != f"{current_block.title} 분석 실패":
                             # 결과 저장
                             save_step_result(current_step.id, result)
-                            append_step_history(current_step.id, current_block['title'], prompt, result)
+                            append_step_history(current_step.id, current_block.title, prompt, result)
                             
                             # cot_history에도 추가 (기존 호환성 유지)
                             if 'cot_history' not in st.session_state:
                                 st.session_state.cot_history = []
                             st.session_state.cot_history.append({
-                                'step': current_block['title'],
+                                'step': current_block.title,
+                                'step_id': current_step.id,
                                 'result': result
                             })
                             
-                            st.success(f"✅ {current_block['title']} 분석 완료!")
+                            st.success(f"✅ {current_block.title} 분석 완료!")
                             
                             # 분석 완료 후 즉시 결과 표시
                             st.markdown("---")
-                            st.markdown(f"### 📋 {current_block['title']} 분석 결과")
+                            st.markdown(f"### 📋 {current_block.title} 분석 결과")
                             
-                            output_structure = current_block.get("content_dsl", {}).get("output_structure", [])
+                            output_structure = list(current_block.output_structure)
                             if output_structure:
-                                parsed_results = parse_analysis_result_by_structure(result, output_structure)
+                                parsed_results = parse_analysis_result_by_structure(
+                                    result, output_structure, current_block.output_markers
+                                )
                                 result_tabs = st.tabs(output_structure)
                                 for i, (tab, structure_name) in enumerate(zip(result_tabs, output_structure)):
                                     with tab:
@@ -546,7 +678,7 @@ def render_analysis_execution():
                                         else:
                                             st.warning("⚠️ 이 구조의 결과를 찾을 수 없습니다.")
                             else:
-                                with st.expander(f"📋 {current_block['title']} - 분석 결과", expanded=True):
+                                with st.expander(f"📋 {current_block.title} - 분석 결과", expanded=True):
                                     st.markdown(result)
                             
                             # 컨트롤 버튼들
@@ -562,32 +694,32 @@ def render_analysis_execution():
                                         user_inputs = get_user_inputs()
                                         
                                         with st.spinner(f"{current_step.title} 재분석 중..."):
-                                            from dsl_to_prompt import convert_dsl_to_prompt
+                                            from dsl_to_prompt import convert_dsl_to_cacheable_prompt
                                             
-                                            previous_results = ""
-                                            if st.session_state.get('cot_history'):
-                                                # 현재 단계 결과 제외
-                                                previous_results = "\n\n".join([
-                                                    f"**{h['step']}**: {h['result']}" 
-                                                    for h in st.session_state.cot_history 
-                                                    if h['step'] != current_block['title']
-                                                ])
+                                            # 현재 단계 결과 제외
+                                            previous_results = get_carry_forward_context(current_block, exclude_current=True)
                                             
-                                            prompt = convert_dsl_to_prompt(
+                                            cache_prefix, prompt_suffix, prompt_breakdown = convert_dsl_to_cacheable_prompt(
                                                 dsl_block=current_block,
                                                 user_inputs=user_inputs,
                                                 previous_summary=previous_results,
                                                 pdf_summary=pdf_summary,
                                                 site_fields=st.session_state.get('site_fields', {}),
-                                                include_web_search=False
+                                                include_web_search=False,
+                                                return_breakdown=True,
+                                                compact=st.session_state.get('compact_prompts', False)
                                             )
+                                            record_prompt_anatomy(current_block.id, current_block.title, prompt_breakdown)
                                             
-                                            new_result = execute_claude_analysis(prompt, current_block['title'])
+                                            new_result = execute_claude_analysis(
+                                                prompt_suffix, current_block.title, cache_prefix=cache_prefix,
+                                                block_model=current_block, use_cache=False
+                                            )
                                             
-                                            if new_result and new_result != f"{current_block['title']} 분석 실패":
+                                            if new_result and new_result != f"{current_block.title} 분석 실패":
                                                 # 기존 결과 업데이트
                                                 for h in st.session_state.cot_history:
-                                                    if h['step'] == current_block['title']:
+                                                    if h['step'] == current_block.title:
                                                         h['result'] = new_result
                                                         break
                                                 
@@ -778,11 +910,11 @@ def render_analysis_execution():
             st.success(f"✅ {current_step.title} - 분석 완료")
             
             # 결과 표시 - output_structure 기반 탭으로 변경
-            step_title_for_history = current_block['title'] if current_block else current_step.title
+            step_title_for_history = current_block.title if current_block else current_step.title
             step_result = next((h['result'] for h in st.session_state.cot_history if h['step'] == step_title_for_history), "")
             
             # DSL에서 output_structure 가져오기
-            output_structure = current_block.get("content_dsl", {}).get("output_structure", []) if current_block else []
+            output_structure = list(current_block.output_structure) if current_block else []
             
             if output_structure:
                 # 디버깅 정보 표시 (개발 모드)
@@ -804,7 +936,9 @@ def render_analysis_execution():
                         st.code(step_result[:1000] + "..." if len(step_result) > 1000 else step_result)
                 
                 # 결과를 구조별로 파싱
-                parsed_results = parse_analysis_result_by_structure(step_result, output_structure)
+                parsed_results = parse_analysis_result_by_structure(
+                    step_result, output_structure, current_block.output_markers
+                )
                 
                 # output_structure 기반 탭 생성
                 result_tabs = st.tabs(output_structure)
@@ -837,7 +971,7 @@ def render_analysis_execution():
             else:
                 # output_structure가 없는 경우
                 if current_block:
-                    expander_title = f"{current_block['title']} - 분석 결과"
+                    expander_title = f"{current_block.title} - 분석 결과"
                 else:
                     expander_title = f"{current_step.title} - 분석 결과"
                 
@@ -856,33 +990,33 @@ def render_analysis_execution():
                         pdf_summary = get_pdf_summary()
                         user_inputs = get_user_inputs()
                         
-                        with st.spinner(f"{current_block['title']} 재분석 중..."):
-                            from dsl_to_prompt import convert_dsl_to_prompt
+                        with st.spinner(f"{current_block.title} 재분석 중..."):
+                            from dsl_to_prompt import convert_dsl_to_cacheable_prompt
                             
-                            previous_results = ""
-                            if st.session_state.get('cot_history'):
-                                # 현재 단계 결과 제외
-                                previous_results = "\n\n".join([
-                                    f"**{h['step']}**: {h['result']}" 
-                                    for h in st.session_state.cot_history 
-                                    if h['step'] != current_block['title']
-                                ])
+                            # 현재 단계 결과 제외
+                            previous_results = get_carry_forward_context(current_block, exclude_current=True)
                             
-                            prompt = convert_dsl_to_prompt(
+                            cache_prefix, prompt_suffix, prompt_breakdown = convert_dsl_to_cacheable_prompt(
                                 dsl_block=current_block,
                                 user_inputs=user_inputs,
                                 previous_summary=previous_results,
                                 pdf_summary=pdf_summary,
                                 site_fields=st.session_state.get('site_fields', {}),
-                                include_web_search=False
+                                include_web_search=False,
+                                return_breakdown=True,
+                                compact=st.session_state.get('compact_prompts', False)
                             )
+                            record_prompt_anatomy(current_block.id, current_block.title, prompt_breakdown)
                             
-                            new_result = execute_claude_analysis(prompt, current_block['title'])
+                            new_result = execute_claude_analysis(
+                                prompt_suffix, current_block.title, cache_prefix=cache_prefix,
+                                block_model=current_block, use_cache=False
+                            )
                             
-                            if new_result and new_result != f"{current_block['title']} 분석 실패":
+                            if new_result and new_result != f"{current_block.title} 분석 실패":
                                 # 기존 결과 업데이트
                                 for h in st.session_state.cot_history:
-                                    if h['step'] == current_block['title']:
+                                    if h['step'] == current_block.title:
                                         h['result'] = new_result
                                         break
                                 
@@ -1774,21 +1908,23 @@ def render_report_generation_tab():
     
     # 분석 결과 요약 제거 - 중복되는 부분 삭제
 
-def parse_analysis_result_by_structure(result: str, output_structure: list) -> dict:
-    """완전히 개선된 분석 결과 파싱 함수"""
+def parse_analysis_result_by_structure(result: str, output_structure, output_markers=None) -> dict:
+    """
+    완전히 개선된 분석 결과 파싱 함수
+    
+    Args:
+        result: 분석 결과 전문
+        output_structure: 출력 구조명 목록
+        output_markers: 구조별 마커 (PromptBlock.output_markers) - 없으면 여기서 생성
+    """
     parsed_results = {}
+    if output_markers is None:
+        output_markers = build_output_markers(tuple(output_structure))
     
     # 각 구조별로 정확한 경계 찾기
     for i, structure in enumerate(output_structure, 1):
         # 정확한 마커 패턴들 (우선순위 순)
-        markers = [
-            f"## {i}. {structure}",
-            f"## {structure}",
-            f"{i}. {structure}",
-            f"### {structure}",
-            f"**{structure}**",
-            structure
-        ]
+        markers = output_markers[i - 1]
         
         content = None
         start_idx = -1
@@ -1806,16 +1942,9 @@ def parse_analysis_result_by_structure(result: str, output_structure: list) -> d
             end_idx = len(result)
             
             # 다음 번호의 구조 찾기
-            for j, next_structure in enumerate(output_structure[i:], i+1):
-                next_markers = [
-                    f"## {j}. {next_structure}",
-                    f"## {next_structure}",
-                    f"{j}. {next_structure}",
-                    f"### {next_structure}",
-                    f"**{next_structure}**"
-                ]
-                
-                for next_marker in next_markers:
+            for next_markers in output_markers[i:]:
+                # 구조명 단독 마커는 다음 경계 판단에 사용하지 않음
+                for next_marker in next_markers[:-1]:
                     next_idx = result.find(next_marker, start_idx + len(used_marker))
                     if next_idx != -1 and next_idx < end_idx:
                         end_idx = next_idx
@@ -1882,23 +2011,6 @@ def create_pdf_summary_dict(user_inputs, pdf_summary):
         "project_goal": user_inputs.get("project_goal", "")
     }
 
-def validate_and_fix_prompt(dsl_block: dict) -> dict:
-    """DSL 블록 검증 및 수정"""
-    content_dsl = dsl_block.get("content_dsl", {})
-    output_structure = content_dsl.get("output_structure", [])
-    
-    if not output_structure:
-        st.warning("⚠️ output_structure가 정의되지 않았습니다.")
-        return dsl_block
-    
-    # 중복 제거
-    unique_structure = list(dict.fromkeys(output_structure))
-    if len(unique_structure) != len(output_structure):
-        st.info("ℹ️ 중복된 구조명이 제거되었습니다.")
-        content_dsl["output_structure"] = unique_structure
-    
-    return dsl_block
-
 def generate_optimization_analysis(user_inputs, cot_history):
     """최적화 조건 분석 생성 함수"""
     from agent_executor import execute_agent
@@ -2119,6 +2231,7 @@ def render_analysis_workflow():
                     # 분석 시작 시 editable_steps를 workflow_steps로 복사
                     st.session_state.workflow_steps = st.session_state.editable_steps.copy()
                     st.session_state.analysis_started = True
+                    start_web_search_prefetch(st.session_state.workflow_steps)
                     # current_step_index를 0으로 초기화하지 않고 기존 값 유지
                     if 'current_step_index' not in st.session_state:
                         st.session_state.current_step_index = 0